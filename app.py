@@ -1,11 +1,13 @@
 import streamlit as st
-from pyairtable import Table
 
-from data.airtable_client import read_all
+from data.airtable_client import find_first, read_all
+from utils.bootstrap import start_background_services
+from utils.fragments import timed_fragment
 from utils.layout import load_styles, render_footer, render_header
 
 st.set_page_config(page_title="Gestão de Eventos Escuteiros", page_icon="🍂", layout="wide")
 load_styles()
+start_background_services()
 
 
 def _reset_session() -> None:
@@ -31,6 +33,25 @@ def _escape_formula_value(value: str) -> str:
     return str(value).replace("'", "\\'")
 
 
+@timed_fragment("inicio.evento")
+def _render_event_picker(ativos_permitidos) -> None:
+    nomes = {evento.get("Nome", evento.get("id")): evento.get("id") for evento in ativos_permitidos}
+    default = st.session_state.get("evento_ativo_id")
+    default_label = None
+    if default:
+        for nome, eid in nomes.items():
+            if eid == default:
+                default_label = nome
+                break
+    label = st.selectbox(
+        "Evento Ativo",
+        list(nomes.keys()),
+        index=list(nomes.keys()).index(default_label) if default_label else 0,
+    )
+    st.session_state["evento_ativo_id"] = nomes[label]
+    st.info(f"Evento selecionado: {label}")
+
+
 if not st.session_state["autenticado"]:
     render_header("🔐 Login")
     email = st.text_input("Email").strip()
@@ -40,11 +61,6 @@ if not st.session_state["autenticado"]:
         if not email or not senha:
             st.warning("Preencha email e password.")
         else:
-            users_table = Table(
-                st.secrets["airtable"]["api_key"],
-                st.secrets["airtable"]["base_id"],
-                "Utilizadores",
-            )
             formula = (
                 "AND("
                 f"{{Email}}='{_escape_formula_value(email)}', "
@@ -52,21 +68,19 @@ if not st.session_state["autenticado"]:
                 "{Ativo}=TRUE())"
             )
             try:
-                users = users_table.all(filterByFormula=formula, max_records=1)
+                record = find_first("Utilizadores", formula)
             except Exception as error:  # pragma: no cover - Streamlit runtime feedback
-                st.error("Não foi possível validar as credenciais no Airtable.")
+                st.error("Não foi possível validar as credenciais.")
                 st.caption(str(error))
             else:
-                if users:
-                    record = users[0]
-                    fields = record.get("fields", {})
+                if record:
                     st.session_state.update(
                         {
                             "autenticado": True,
-                            "perfil": fields.get("Perfil"),
-                            "utilizador": fields.get("Nome", "Utilizador"),
+                            "perfil": record.get("Perfil"),
+                            "utilizador": record.get("Nome", "Utilizador"),
                             "utilizador_id": record.get("id"),
-                            "eventos_permitidos": fields.get("Eventos", []),
+                            "eventos_permitidos": list(record.get("Eventos", [])),
                         }
                     )
                     eventos = read_all("Eventos")
@@ -112,21 +126,7 @@ else:
     ]
 
     if ativos_permitidos:
-        nomes = {evento.get("Nome", evento.get("id")): evento.get("id") for evento in ativos_permitidos}
-        default = st.session_state.get("evento_ativo_id")
-        default_label = None
-        if default:
-            for nome, eid in nomes.items():
-                if eid == default:
-                    default_label = nome
-                    break
-        label = st.selectbox(
-            "Evento Ativo",
-            list(nomes.keys()),
-            index=list(nomes.keys()).index(default_label) if default_label else 0,
-        )
-        st.session_state["evento_ativo_id"] = nomes[label]
-        st.info(f"Evento selecionado: {label}")
+        _render_event_picker(ativos_permitidos)
     else:
         st.warning("Nenhum evento ativo disponível.")
 
@@ -0,0 +1,110 @@
+"""Compare plain-dict records with the typed ``__slots__`` models.
+
+Run from the repository root::
+
+    python -m benchmarks.records [n_records]
+
+Reports retained memory per record and throughput of normalisation and of a
+typical hot loop (event filter + value total) for both representations.
+"""
+from __future__ import annotations
+
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List
+
+from data.models import Pedido
+
+EVENTOS = ["recEvento0001", "recEvento0002", "recEvento0003"]
+
+
+def _raw_records(count: int) -> List[Dict[str, Any]]:
+    return [
+        {
+            "id": f"recPedido{index:08d}",
+            "createdTime": "2024-05-01T12:00:00.000Z",
+            "fields": {
+                "Evento": [EVENTOS[index % len(EVENTOS)]],
+                "Data": "2024-05-01",
+                "Ementa": [f"recEmenta{index % 12:05d}"],
+                "TipoCliente": [f"recTipo{index % 4:05d}"],
+                "Quantidade": 1 + index % 5,
+                "Valor": str(7.5 * (1 + index % 5)),
+                "Pago": bool(index % 2),
+            },
+        }
+        for index in range(count)
+    ]
+
+
+def _as_dict(record: Dict[str, Any]) -> Dict[str, Any]:
+    fields = dict(record.get("fields", {}))
+    fields["id"] = record["id"]
+    return fields
+
+
+def _as_model(record: Dict[str, Any]) -> Pedido:
+    return Pedido.from_fields(record.get("fields", {}), record.get("id"))
+
+
+def _total_dicts(records: List[Dict[str, Any]], event_id: str) -> float:
+    total = 0.0
+    for record in records:
+        evento = record.get("Evento")
+        if not (event_id in evento if isinstance(evento, list) else evento == event_id):
+            continue
+        try:
+            total += float(record.get("Valor") or 0)
+        except (TypeError, ValueError):
+            pass
+    return total
+
+
+def _total_models(records: List[Pedido], event_id: str) -> float:
+    return sum(pedido.valor for pedido in records if event_id in pedido.eventos)
+
+
+def _measure(count: int, convert: Callable, total: Callable) -> Dict[str, float]:
+    # Memory is what stays alive once the API response has been discarded.
+    tracemalloc.start()
+    raw = _raw_records(count)
+    records = [convert(record) for record in raw]
+    del raw
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    raw = _raw_records(count)
+    started = time.perf_counter()
+    records = [convert(record) for record in raw]
+    convert_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for event_id in EVENTOS:
+        total(records, event_id)
+    loop_seconds = time.perf_counter() - started
+
+    return {
+        "bytes_per_record": retained / count,
+        "normalise_per_s": count / convert_seconds,
+        "loop_per_s": count * len(EVENTOS) / loop_seconds,
+    }
+
+
+def main(argv: List[str]) -> None:
+    count = int(argv[0]) if argv else 50_000
+    results = {
+        "dict": _measure(count, _as_dict, _total_dicts),
+        "Pedido": _measure(count, _as_model, _total_models),
+    }
+    print(f"{count} registos")
+    print(f"{'':8} {'bytes/registo':>14} {'normalização/s':>16} {'ciclo/s':>14}")
+    for name, result in results.items():
+        print(
+            f"{name:8} {result['bytes_per_record']:>14,.0f} "
+            f"{result['normalise_per_s']:>16,.0f} {result['loop_per_s']:>14,.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -1,14 +1,38 @@
-"""Helpers for interacting with Airtable tables used in the project."""
+"""Helpers for interacting with Airtable tables used in the project.
+
+Every call goes through the configured :mod:`storage backend <data.storage>`,
+which is Airtable unless a local database is configured. Records are
+normalised into the models compiled by :mod:`data.schema`.
+"""
 from __future__ import annotations
 
+import hashlib
+import json
 import os
+import threading
+import time
+from collections import OrderedDict
 from collections.abc import Mapping
+from dataclasses import dataclass
 from functools import lru_cache
-from typing import Any, Dict, Iterable, List, Optional, Tuple
+from typing import Any, Callable, Dict, Hashable, Iterator, List, Optional, Sequence, Tuple, Type, Union
 
-from pyairtable import Table
+import requests
 import streamlit as st
 
+from .models import MODELS, Record
+from .partitioned import Partition, created_partitions, fetch_partitioned, id_partitions
+from .schema import get_schema_registry
+from .storage import get_backend
+
+PAGE_SIZE = 100
+IDEMPOTENCY_FIELD = "Chave Idempotência"
+RECENT_WRITES_MAX = 1000
+RECENT_WRITES_TTL = 3600
+
+NormalisedRecord = Union[Record, Dict[str, Any]]
+RecordFilter = Callable[[Mapping[str, Any]], bool]
+
 
 @lru_cache(maxsize=1)
 def _get_airtable_credentials() -> Tuple[str, str]:
@@ -40,44 +64,482 @@ def _get_airtable_credentials() -> Tuple[str, str]:
     return str(api_key), str(base_id)
 
 
-def get_table(name: str) -> Table:
-    """Return a :class:`~pyairtable.Table` instance for ``name``."""
-    api_key, base_id = _get_airtable_credentials()
-    return Table(api_key, base_id, name)
+def _model_for(name: str) -> Optional[Type[Record]]:
+    get_schema_registry()  # compiles the models against the base schema on first use
+    return MODELS.get(name)
+
+
+def _normalize_record(
+    name: str,
+    record: Dict[str, Any],
+    include_created_time: bool = False,
+    model: Optional[Type[Record]] = None,
+) -> NormalisedRecord:
+    """Convert an API record into its typed model, or a plain dict for unmodelled tables."""
+    fields = record.get("fields", {})
+    created_time = record.get("createdTime") if include_created_time else None
+    model = model or _model_for(name)
+    if model is not None:
+        return model.from_fields(fields, record.get("id"), created_time)
+    # The API response is discarded after normalisation, so its fields dict is reused.
+    record_id = record.get("id")
+    if record_id:
+        fields["id"] = record_id
+    if created_time:
+        fields["createdTime"] = created_time
+    return fields
+
+
+@dataclass(frozen=True)
+class LinksTo:
+    """Filter matching records whose link ``field`` contains ``record_id``.
+
+    A value object rather than a closure: equal filters hash equal, so
+    identical filtered reads in :func:`read_all` coalesce.
+    """
+
+    field: str
+    record_id: str
+
+    @property
+    def link(self) -> Tuple[str, str]:
+        # Lets indexed backends select the linked records instead of scanning.
+        return (self.field, self.record_id)
+
+    def __call__(self, record: Mapping[str, Any]) -> bool:
+        value = record.get(self.field)
+        if isinstance(value, (list, tuple)):
+            return self.record_id in value
+        return value == self.record_id
+
 
+def links_to(field: str, record_id: str) -> LinksTo:
+    """Return a filter matching records whose link ``field`` contains ``record_id``."""
+    return LinksTo(field, record_id)
 
-def _normalize(records: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
-    """Attach the record id to the fields dict for easier downstream usage."""
-    normalised: List[Dict[str, Any]] = []
+
+def _partitions(partition_by: str, boundaries: Sequence[str]) -> List[Partition]:
+    if partition_by == "id":
+        return id_partitions()
+    if partition_by == "created":
+        return created_partitions(boundaries)
+    raise ValueError(f"Partição desconhecida: {partition_by!r}")
+
+
+def iter_records(
+    name: str,
+    *,
+    fields: Optional[Sequence[str]] = None,
+    where: Optional[RecordFilter] = None,
+    page_size: int = PAGE_SIZE,
+    include_created_time: bool = False,
+    model: Optional[Type[Record]] = None,
+    partition_by: Optional[str] = None,
+    boundaries: Sequence[str] = (),
+    **kwargs: Any,
+) -> Iterator[NormalisedRecord]:
+    """Yield normalised records of ``name`` one Airtable page at a time.
+
+    ``fields`` is sent to Airtable as a projection, ``where`` is applied to each
+    normalised record before it is yielded and any remaining ``kwargs`` (e.g.
+    ``formula``, ``view`` or ``sort``) are forwarded to the storage backend. Only
+    the current page is held in memory. ``model`` overrides the record class
+    chosen from the table name (e.g. for archive tables). ``partition_by``
+    (``"id"`` or ``"created"`` with ``boundaries``) reads disjoint slices of
+    the table in parallel, a few pages at a time, see :mod:`data.partitioned`;
+    it only applies to the Airtable backend, where pages are fetched one after
+    another, and without ``sort`` yields records in no particular order.
+    """
+    links = getattr(where, "link", None)
+    model = model or _model_for(name)
+    backend = get_backend()
+    if partition_by and backend.name == "airtable":
+        partitions = _partitions(partition_by, boundaries)
+        records = fetch_partitioned(backend, name, partitions, page_size=page_size, fields=fields, links=links, **kwargs)
+    else:
+        pages = backend.iterate(name, page_size=page_size, fields=fields, links=links, **kwargs)
+        records = (record for page in pages for record in page)
     for record in records:
-        fields = dict(record.get("fields", {}))
-        record_id = record.get("id")
-        if record_id:
-            fields["id"] = record_id
-        normalised.append(fields)
-    return normalised
+        normalised = _normalize_record(name, record, include_created_time, model)
+        if where is None or where(normalised):
+            yield normalised
+
+
+class _Flight:
+    __slots__ = ("done", "result", "error")
 
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: List[NormalisedRecord] = []
+        self.error: Optional[BaseException] = None
 
-def read_all(name: str, **kwargs: Any) -> List[Dict[str, Any]]:
-    """Read all records from ``name`` applying optional Airtable query kwargs."""
-    table = get_table(name)
-    return _normalize(table.all(**kwargs))
+
+_in_flight: Dict[Hashable, _Flight] = {}
+_in_flight_lock = threading.Lock()
+_read_stats: Dict[str, int] = {"reads_started": 0, "reads_coalesced": 0}
+
+
+def _freeze(value: Any) -> Hashable:
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    if isinstance(value, dict):
+        return tuple(sorted((key, _freeze(item)) for key, item in value.items()))
+    hash(value)  # filters must hash by value (see LinksTo); anything unhashable skips coalescing
+    return value
+
+
+def _single_flight(key: Hashable, fetch: Callable[[], List[NormalisedRecord]]) -> List[NormalisedRecord]:
+    """Run ``fetch`` once for concurrent callers with the same ``key`` and share its result."""
+
+    with _in_flight_lock:
+        flight = _in_flight.get(key)
+        leader = flight is None
+        if leader:
+            flight = _in_flight[key] = _Flight()
+            _read_stats["reads_started"] += 1
+        else:
+            _read_stats["reads_coalesced"] += 1
+    if not leader:
+        flight.done.wait()
+        if flight.error is not None:
+            raise flight.error
+        return list(flight.result)
+
+    try:
+        flight.result = fetch()
+    except BaseException as error:
+        flight.error = error
+        raise
+    finally:
+        with _in_flight_lock:
+            del _in_flight[key]
+        flight.done.set()
+    return list(flight.result)
+
+
+def get_read_stats() -> Dict[str, int]:
+    """Return how many full reads were sent and how many were served by an in-flight read."""
+
+    with _in_flight_lock:
+        return dict(_read_stats)
+
+
+def read_all(
+    name: str,
+    *,
+    partition_by: Optional[str] = None,
+    boundaries: Sequence[str] = (),
+    **kwargs: Any,
+) -> List[NormalisedRecord]:
+    """Read all records from ``name`` applying optional Airtable query kwargs.
+
+    Identical concurrent reads (same table and arguments) are coalesced into
+    a single fetch whose result every caller receives. ``partition_by`` and
+    ``boundaries`` are passed to :func:`iter_records`.
+    """
+
+    def fetch() -> List[NormalisedRecord]:
+        return list(iter_records(name, partition_by=partition_by, boundaries=boundaries, **kwargs))
+
+    try:
+        key = (name, partition_by, tuple(boundaries), _freeze(kwargs))
+    except TypeError:
+        return fetch()
+    return _single_flight(key, fetch)
 
 
 def create_record(name: str, data: Dict[str, Any]) -> Dict[str, Any]:
-    return get_table(name).create(data)
+    return get_backend().create(name, data)
+
+
+_PENDING = object()
+_recent_writes: "OrderedDict[Tuple[str, str], Tuple[float, Any]]" = OrderedDict()
+_recent_writes_lock = threading.Lock()
+
+
+def _recent_write(name: str, key: str) -> Any:
+    with _recent_writes_lock:
+        entry = _recent_writes.get((name, key))
+        if entry is None:
+            return None
+        if time.monotonic() - entry[0] > RECENT_WRITES_TTL:
+            del _recent_writes[(name, key)]
+            return None
+        return entry[1]
+
+
+def prune_recent_writes() -> int:
+    """Drop expired entries of the recent-writes index; return how many were removed."""
+
+    limit = time.monotonic() - RECENT_WRITES_TTL
+    with _recent_writes_lock:
+        expired = [key for key, (written, _) in _recent_writes.items() if written < limit]
+        for key in expired:
+            del _recent_writes[key]
+    return len(expired)
+
+
+def _remember_write(name: str, key: str, value: Any) -> None:
+    with _recent_writes_lock:
+        _recent_writes[(name, key)] = (time.monotonic(), value)
+        _recent_writes.move_to_end((name, key))
+        while len(_recent_writes) > RECENT_WRITES_MAX:
+            _recent_writes.popitem(last=False)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("'", "\\'")
+
+
+def find_by_keys(name: str, keys: Sequence[str]) -> List[Dict[str, Any]]:
+    """Return the raw records of ``name`` created with any of the idempotency ``keys``, oldest first."""
+
+    formula = "OR(" + ",".join(f"{{{IDEMPOTENCY_FIELD}}}='{_escape(key)}'" for key in keys) + ")"
+    records = get_backend().all(name, formula=formula)
+    return sorted(records, key=lambda record: (record.get("createdTime", ""), record.get("id", "")))
+
+
+def find_by_key(name: str, key: str) -> List[Dict[str, Any]]:
+    return find_by_keys(name, [key])
+
+
+def _retryable(exc: requests.RequestException) -> bool:
+    """Whether a failed create may succeed if sent again (timeouts, throttling, server errors)."""
+
+    if isinstance(exc, (requests.Timeout, requests.ConnectionError)):
+        return True
+    status = getattr(exc.response, "status_code", None)
+    return status is not None and (status == 429 or status >= 500)
+
+
+def _require_idempotency_field(name: str) -> None:
+    # Without the column every create fails with 422 UNKNOWN_FIELD_NAME: say so plainly.
+    fields = get_schema_registry().tables.get(name)
+    if fields is not None and IDEMPOTENCY_FIELD not in fields:
+        raise RuntimeError(f"A tabela {name} não tem o campo de texto '{IDEMPOTENCY_FIELD}'.")
+
+
+def create_idempotent(
+    name: str,
+    data: Dict[str, Any],
+    key: str,
+    attempts: int = 3,
+    backoff: float = 0.5,
+) -> Tuple[Dict[str, Any], bool]:
+    """Create ``data`` at most once per idempotency ``key``.
+
+    The key is stored in :data:`IDEMPOTENCY_FIELD`. A key found in the index
+    of recent writes returns the stored record without a request; after a
+    failed or ambiguous attempt (e.g. a timeout) Airtable is searched for the
+    key before retrying, so retries never create a second row. Only
+    timeouts, connection errors, 429 and 5xx responses are retried; other
+    client errors (e.g. 422 unknown field, 403) are raised straight away.
+    Returns ``(record, created)`` where ``created`` is False for a
+    deduplicated call.
+    """
+
+    _require_idempotency_field(name)
+    known = _recent_write(name, key)
+    if known is not None and known is not _PENDING:
+        return known, False
+    payload = {**data, IDEMPOTENCY_FIELD: key}
+    check_first = known is _PENDING
+    attempt = 0
+    while True:
+        if check_first:
+            existing = find_by_key(name, key)
+            if existing:
+                _remember_write(name, key, existing[0])
+                return existing[0], False
+        _remember_write(name, key, _PENDING)
+        try:
+            record = get_backend().create(name, payload)
+        except requests.RequestException as exc:
+            attempt += 1
+            if attempt >= attempts or not _retryable(exc):
+                raise
+            check_first = True
+            time.sleep(backoff * 2 ** (attempt - 1))
+        else:
+            _remember_write(name, key, record)
+            return record, True
+
+
+def content_digest(data: Mapping[str, Any]) -> str:
+    """Short stable hash of a field dict, used to key writes by their content."""
+
+    encoded = json.dumps(data, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(encoded.encode()).hexdigest()[:16]
+
+
+def line_keys(key: str, records: Sequence[Mapping[str, Any]]) -> List[str]:
+    """Keys ``<key>/<content digest>/<n>`` for batch lines, ``n`` counting identical lines.
+
+    A line keeps its key when other lines are removed or reordered, so a
+    retry never matches a line against a different record already written.
+    """
+
+    seen: Dict[str, int] = {}
+    keys = []
+    for data in records:
+        digest = content_digest(data)
+        keys.append(f"{key}/{digest}/{seen.get(digest, 0)}")
+        seen[digest] = seen.get(digest, 0) + 1
+    return keys
+
+
+def batch_create_idempotent(
+    name: str,
+    records: List[Dict[str, Any]],
+    key: str,
+    attempts: int = 3,
+    backoff: float = 0.5,
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """Batch version of :func:`create_idempotent`; lines are keyed by :func:`line_keys`.
+
+    Lines already written (found in the recent-writes index or, after a
+    failure, in Airtable) are not sent again, so a retry after a timeout in
+    the middle of a batch only creates the missing lines. Returns all stored
+    records in input order and the subset created by this call.
+    """
+
+    _require_idempotency_field(name)
+    keys = line_keys(key, records)
+    payloads = {line_key: {**data, IDEMPOTENCY_FIELD: line_key} for line_key, data in zip(keys, records)}
+    stored: Dict[str, Dict[str, Any]] = {}
+    check_first = False
+    for line_key in keys:
+        known = _recent_write(name, line_key)
+        if known is _PENDING:
+            check_first = True
+        elif known is not None:
+            stored[line_key] = known
+
+    created: List[Dict[str, Any]] = []
+    attempt = 0
+    while True:
+        pending = [line_key for line_key in keys if line_key not in stored]
+        if check_first and pending:
+            for record in find_by_keys(name, pending):
+                line_key = record.get("fields", {}).get(IDEMPOTENCY_FIELD)
+                if line_key not in stored:  # oldest first: keep the first copy
+                    stored[line_key] = record
+                    _remember_write(name, line_key, record)
+            pending = [line_key for line_key in keys if line_key not in stored]
+        if not pending:
+            break
+        for line_key in pending:
+            _remember_write(name, line_key, _PENDING)
+        try:
+            new_records = get_backend().batch_create(name, [payloads[line_key] for line_key in pending])
+        except requests.RequestException as exc:
+            attempt += 1
+            if attempt >= attempts or not _retryable(exc):
+                raise
+            check_first = True
+            time.sleep(backoff * 2 ** (attempt - 1))
+        else:
+            for line_key, record in zip(pending, new_records):
+                stored[line_key] = record
+                _remember_write(name, line_key, record)
+            created.extend(new_records)
+            break
+    return [stored[line_key] for line_key in keys], created
+
+
+def batch_create(name: str, records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Create ``records`` (field dicts) in as few requests as Airtable allows."""
+    return get_backend().batch_create(name, records)
+
+
+def batch_update(name: str, updates: List[Tuple[str, Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """Apply ``(record_id, fields)`` updates in as few requests as Airtable allows."""
+    _count_write(updates_sent=len(updates))
+    return get_backend().batch_update(name, updates)
+
+
+def batch_delete(name: str, record_ids: List[str]) -> List[Dict[str, Any]]:
+    return get_backend().batch_delete(name, record_ids)
+
+
+_write_stats: Dict[str, int] = {"updates_sent": 0, "updates_skipped": 0, "fields_skipped": 0}
+_write_stats_lock = threading.Lock()
+
+
+def _count_write(**increments: int) -> None:
+    with _write_stats_lock:
+        for key, amount in increments.items():
+            _write_stats[key] = _write_stats.get(key, 0) + amount
+
+
+def get_write_stats() -> Dict[str, int]:
+    """Return a snapshot of the update counters (sent, skipped and dropped fields)."""
+
+    with _write_stats_lock:
+        return dict(_write_stats)
+
+
+def _is_blank(value: Any) -> bool:
+    # Airtable omits empty cells and unchecked checkboxes from ``fields``.
+    return value is None or value is False or value == "" or value == [] or value == ()
+
+
+def _same_value(old: Any, new: Any) -> bool:
+    if _is_blank(old) and _is_blank(new):
+        return True
+    if isinstance(old, (list, tuple)) or isinstance(new, (list, tuple)):
+        old_list = list(old) if isinstance(old, (list, tuple)) else [old]
+        new_list = list(new) if isinstance(new, (list, tuple)) else [new]
+        # Links and multi-selects come back in Airtable's order, widgets return
+        # them in option order: the same selection must not count as a change.
+        try:
+            return set(old_list) == set(new_list)
+        except TypeError:  # unhashable items such as attachments
+            return old_list == new_list
+    return old == new
+
+
+def diff_fields(current: Mapping[str, Any], data: Mapping[str, Any]) -> Dict[str, Any]:
+    """Return the entries of ``data`` whose value differs from ``current``."""
+
+    return {key: value for key, value in data.items() if not _same_value(current.get(key), value)}
+
+
+def update_record(
+    name: str,
+    record_id: str,
+    data: Dict[str, Any],
+    current: Optional[Mapping[str, Any]] = None,
+) -> Optional[Dict[str, Any]]:
+    """Update ``record_id`` sending only the fields that changed.
+
+    When ``current`` (the last-known normalised record) is given, unchanged
+    fields are dropped and no request is made if nothing differs; in that case
+    ``None`` is returned so callers can also skip cache invalidation.
+    """
+
+    if current is not None:
+        changed = diff_fields(current, data)
+        skipped = len(data) - len(changed)
+        if not changed:
+            _count_write(updates_skipped=1, fields_skipped=skipped)
+            return None
+        _count_write(updates_sent=1, fields_skipped=skipped)
+        data = changed
+    else:
+        _count_write(updates_sent=1)
+    return get_backend().update(name, record_id, data)
 
 
-def update_record(name: str, record_id: str, data: Dict[str, Any]) -> Dict[str, Any]:
-    return get_table(name).update(record_id, data)
+def get_record(name: str, record_id: str) -> NormalisedRecord:
+    """Read ``record_id`` straight from storage, bypassing any cache."""
+    return _normalize_record(name, get_backend().get(name, record_id))
 
 
 def delete_record(name: str, record_id: str) -> Dict[str, Any]:
-    return get_table(name).delete(record_id)
+    return get_backend().delete(name, record_id)
 
 
-def find_first(name: str, formula: Optional[str] = None) -> Optional[Dict[str, Any]]:
-    table = get_table(name)
-    records = table.all(max_records=1, filterByFormula=formula)
-    normalised = _normalize(records)
-    return normalised[0] if normalised else None
+def find_first(name: str, formula: Optional[str] = None) -> Optional[NormalisedRecord]:
+    record = get_backend().first(name, formula)
+    return _normalize_record(name, record) if record else None
@@ -0,0 +1,246 @@
+"""Per-event columnar aggregates used by the multi-event analytics page.
+
+Each event is reduced to a small table with one row per ementa × tipo de
+cliente (orders, quantity and value). Aggregates of archived or snapshotted
+events never change, so they are written to ``agregados/<evento_id>.arrow``
+tagged with their source (the snapshot's creation time, or the archive) and
+rebuilt only when that source changes, e.g. when a snapshot is re-created.
+Every other event keeps running totals in process memory: they are built
+once from a single pass over Pedidos and then fed only the orders created
+since the last view (the kitchen queue's incremental read), with a full
+rebuild every :data:`~data.event_summary.RECONCILE_INTERVAL` to pick up
+edits and deletions.
+"""
+from __future__ import annotations
+
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import pandas as pd
+import pyarrow as pa
+
+from .airtable_client import iter_records
+from .archive import ARCHIVE_TABLES, archived_event_ids
+from .event_summary import RECONCILE_INTERVAL
+from .export import Lookups, load_lookups
+from .kitchen import fetch_new_orders
+from .models import Pedido
+from .snapshots import load_snapshot, snapshot_version
+
+AGGREGATE_DIR = Path(os.getenv("EVENT_AGGREGATE_DIR", Path(__file__).resolve().parent.parent / "agregados"))
+AGGREGATE_SCHEMA = pa.schema(
+    [
+        ("Ementa", pa.string()),
+        ("Tipo", pa.string()),
+        ("Pedidos", pa.int64()),
+        ("Quantidade", pa.int64()),
+        ("Valor", pa.float64()),
+    ]
+)
+AGGREGATE_FIELDS = ("Evento", "Ementa", "TipoCliente", "Quantidade", "Valor")
+# Orders created while a full pass runs are picked up by the next incremental read.
+SCAN_MARGIN = timedelta(seconds=30)
+
+_SOURCE_KEY = b"origem"
+
+
+def _aggregate_path(event_id: str) -> Path:
+    if not event_id or not event_id.isalnum():
+        raise ValueError(f"ID de evento inválido: {event_id!r}")
+    return AGGREGATE_DIR / f"{event_id}.arrow"
+
+
+def _from_snapshot(event_id: str) -> Optional[pa.Table]:
+    snapshot = load_snapshot(event_id)
+    if snapshot is None:
+        return None
+    grouped = snapshot.pedidos.group_by(["Ementa", "Tipo"]).aggregate(
+        [("id", "count"), ("Quantidade", "sum"), ("Valor", "sum")]
+    )
+    return pa.table(
+        {
+            "Ementa": grouped["Ementa"],
+            "Tipo": grouped["Tipo"],
+            "Pedidos": grouped["id_count"],
+            "Quantidade": grouped["Quantidade_sum"],
+            "Valor": grouped["Valor_sum"],
+        }
+    ).cast(AGGREGATE_SCHEMA)
+
+
+def _write_aggregate(path: Path, table: pa.Table, source: str) -> None:
+    AGGREGATE_DIR.mkdir(parents=True, exist_ok=True)
+    staging = path.with_suffix(".tmp")
+    schema = AGGREGATE_SCHEMA.with_metadata({_SOURCE_KEY: source.encode()})
+    with pa.OSFile(str(staging), "wb") as sink, pa.ipc.new_file(sink, schema) as writer:
+        writer.write_table(table.replace_schema_metadata(schema.metadata))
+    staging.replace(path)
+
+
+def _read_aggregate(path: Path, source: str) -> Optional[pa.Table]:
+    if not path.exists():
+        return None
+    table = pa.ipc.open_file(pa.memory_map(str(path), "r")).read_all()
+    # Built from another snapshot (or before the event was frozen): rebuild it.
+    if (table.schema.metadata or {}).get(_SOURCE_KEY) != source.encode():
+        return None
+    return table.replace_schema_metadata(None)
+
+
+@dataclass
+class _Totals:
+    """Running ementa × tipo totals of one event; ``cursor`` feeds the incremental reads."""
+
+    cursor: str = ""
+    built: float = field(default_factory=time.monotonic)
+    linhas: Dict[Tuple[Optional[str], Optional[str]], List[float]] = field(default_factory=dict)
+    seen: Set[str] = field(default_factory=set)
+
+    def add(self, pedido: Pedido) -> None:
+        if pedido.id in self.seen:
+            return
+        self.seen.add(pedido.id)
+        linha = self.linhas.setdefault((pedido.ementa_id, pedido.tipo_id), [0, 0, 0.0])
+        linha[0] += 1
+        linha[1] += pedido.quantidade
+        linha[2] += pedido.valor
+
+    def is_stale(self) -> bool:
+        return time.monotonic() - self.built > RECONCILE_INTERVAL.total_seconds()
+
+    def to_table(self, lookups: Lookups) -> pa.Table:
+        # Names are resolved on output so renamed ementas and tipos show up at once.
+        chaves = list(self.linhas)
+        return pa.table(
+            {
+                "Ementa": [lookups.ementas.get(ementa, ementa) for ementa, _ in chaves],
+                "Tipo": [lookups.tipos.get(tipo, tipo) for _, tipo in chaves],
+                "Pedidos": [int(self.linhas[chave][0]) for chave in chaves],
+                "Quantidade": [int(self.linhas[chave][1]) for chave in chaves],
+                "Valor": [float(self.linhas[chave][2]) for chave in chaves],
+            },
+            schema=AGGREGATE_SCHEMA,
+        )
+
+
+_live: Dict[str, _Totals] = {}
+_live_lock = threading.Lock()
+
+
+def _cursor_at(moment: datetime) -> str:
+    return moment.strftime("%Y-%m-%dT%H:%M:%S.000Z")
+
+
+def _scan(event_ids: Set[str], sources: Iterable[str]) -> Dict[str, _Totals]:
+    """Aggregate the orders of every event in ``event_ids`` in a single pass over ``sources``."""
+
+    cursor = _cursor_at(datetime.now(timezone.utc) - SCAN_MARGIN)
+    totals = {event_id: _Totals(cursor) for event_id in event_ids}
+    for source in sources:
+        for pedido in iter_records(source, fields=AGGREGATE_FIELDS, model=Pedido):
+            for event_id in pedido.eventos:
+                if event_id in totals:
+                    totals[event_id].add(pedido)
+    return totals
+
+
+def _frozen_source(event_id: str, arquivados: Set[str]) -> Optional[str]:
+    """Origin of a final aggregate, or None for an event that can still change."""
+
+    version = snapshot_version(event_id)
+    if version is not None:
+        return f"snapshot:{version}"
+    return "arquivo" if event_id in arquivados else None
+
+
+def _live_aggregates(event_ids: List[str], lookups: Lookups) -> Dict[str, pa.Table]:
+    with _live_lock:
+        stale = {event_id for event_id in event_ids if event_id not in _live or _live[event_id].is_stale()}
+        if stale:
+            _live.update(_scan(stale, ["Pedidos"]))
+        for event_id in event_ids:
+            totals = _live[event_id]
+            if event_id in stale:
+                continue
+            novos, totals.cursor = fetch_new_orders(event_id, totals.cursor, totals.seen, fields=AGGREGATE_FIELDS)
+            for pedido in novos:
+                totals.add(pedido)
+        return {event_id: _live[event_id].to_table(lookups) for event_id in event_ids}
+
+
+def load_event_aggregates(event_ids: Iterable[str]) -> Dict[str, pa.Table]:
+    """Return the ementa × tipo aggregate of each event in ``event_ids``.
+
+    Archived or snapshotted events are read from (or built once into) the
+    on-disk file matching their current source, using the snapshot when there
+    is one. Every other event is served from the in-process running totals.
+    """
+
+    arquivados = archived_event_ids()
+    aggregates: Dict[str, pa.Table] = {}
+    live: List[str] = []
+    pending: Dict[str, str] = {}
+    for event_id in event_ids:
+        source = _frozen_source(event_id, arquivados)
+        if source is None:
+            live.append(event_id)
+            continue
+        path = _aggregate_path(event_id)
+        table = _read_aggregate(path, source)
+        if table is None and source.startswith("snapshot:"):
+            table = _from_snapshot(event_id)
+            if table is not None:
+                _write_aggregate(path, table, source)
+        if table is None:
+            pending[event_id] = source
+        else:
+            aggregates[event_id] = table
+        with _live_lock:
+            _live.pop(event_id, None)
+
+    lookups = load_lookups() if pending or live else None
+    if pending:
+        for event_id, totals in _scan(set(pending), [ARCHIVE_TABLES["Pedidos"]]).items():
+            table = totals.to_table(lookups)
+            _write_aggregate(_aggregate_path(event_id), table, pending[event_id])
+            aggregates[event_id] = table
+    if live:
+        aggregates.update(_live_aggregates(live, lookups))
+    return aggregates
+
+
+def season_of(data: Optional[str], start_month: int = 9) -> str:
+    """Scout season label (e.g. ``2023/24``) of an ISO date; seasons start in September."""
+
+    if not data:
+        return "Sem data"
+    try:
+        ano, mes = int(str(data)[:4]), int(str(data)[5:7])
+    except ValueError:
+        return "Sem data"
+    inicio = ano if mes >= start_month else ano - 1
+    return f"{inicio}/{(inicio + 1) % 100:02d}"
+
+
+def combine_aggregates(eventos: Iterable, aggregates: Dict[str, pa.Table]) -> pd.DataFrame:
+    """Stack per-event aggregates into one frame tagged with event name, date and season."""
+
+    frames = []
+    for evento in eventos:
+        table = aggregates.get(evento.id)
+        if table is None or table.num_rows == 0:
+            continue
+        frame = table.to_pandas()
+        frame["Evento ID"] = evento.id
+        frame["Evento"] = evento.nome or evento.id
+        frame["Data"] = evento.data
+        frame["Época"] = season_of(evento.data)
+        frames.append(frame)
+    if not frames:
+        return pd.DataFrame(columns=["Evento ID", "Evento", "Data", "Época", *AGGREGATE_SCHEMA.names])
+    return pd.concat(frames, ignore_index=True)
@@ -0,0 +1,168 @@
+"""Move the rows of closed events out of the hot tables.
+
+Pedidos, Recebimentos and Sangria de Caixa of inactive events are copied in
+batches to ``<tabela> Arquivo`` tables in the same base, verified against the
+source and only deleted from the hot tables once all three are copied. Each
+archive row keeps the original record id in ``Origem ID``, so an interrupted
+run can be repeated without duplicating rows. The event's ``Resumo de Evento`` record is
+reconciled beforehand and flagged ``Arquivado``; it stays behind as the
+event's totals.
+
+Usage from the command line::
+
+    python -m data.archive <evento_id> [<evento_id> ...]
+    python -m data.archive --inativos
+"""
+from __future__ import annotations
+
+import argparse
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Set
+
+from .airtable_client import batch_create, batch_delete, iter_records, links_to, read_all, update_record
+from .cache_utils import get_cached_data, invalidate_cache
+from .event_summary import SUMMARY_TABLE, reconcile
+from .models import MODELS, Record
+from .schema import get_schema_registry
+
+ARCHIVE_TABLES: Dict[str, str] = {
+    "Pedidos": "Pedidos Arquivo",
+    "Recebimentos": "Recebimentos Arquivo",
+    "Sangria de Caixa": "Sangria de Caixa Arquivo",
+}
+BATCH_SIZE = 50
+_ORIGIN_FIELD = "Origem ID"
+
+
+@dataclass
+class ArchiveReport:
+    event_id: str
+    movidos: Dict[str, int] = field(default_factory=dict)
+    retomados: Dict[str, int] = field(default_factory=dict)
+
+
+def archived_event_ids() -> Set[str]:
+    """IDs of archived events, read from the (cached) summary table."""
+    return {resumo.get("Evento ID") for resumo in get_cached_data(SUMMARY_TABLE) if resumo.get("Arquivado")}
+
+
+def is_archived(event_id: str) -> bool:
+    return event_id in archived_event_ids()
+
+
+def iter_event_records(table: str, event_id: str, **kwargs: Any) -> Iterator[Record]:
+    """Yield the ``table`` records of ``event_id`` from the hot or the archive table.
+
+    ``kwargs`` are forwarded to :func:`~data.airtable_client.iter_records`.
+    """
+
+    source = ARCHIVE_TABLES[table] if is_archived(event_id) else table
+    yield from iter_records(source, where=links_to("Evento", event_id), model=MODELS[table], **kwargs)
+
+
+def _archived_origins(archive_table: str, event_id: str) -> Dict[str, str]:
+    origins: Dict[str, str] = {}
+    records = iter_records(archive_table, fields=("Evento", _ORIGIN_FIELD), where=links_to("Evento", event_id))
+    for record in records:
+        if record.get(_ORIGIN_FIELD):
+            origins[record[_ORIGIN_FIELD]] = record["id"]
+    return origins
+
+
+def _same_fields(expected: Dict[str, Any], stored: Dict[str, Any]) -> bool:
+    return all(stored.get(name) == value for name, value in expected.items())
+
+
+def _copy_table(table: str, event_id: str, id_map: Dict[str, str], report: ArchiveReport) -> List[str]:
+    """Copy the ``table`` rows of ``event_id`` into the archive and return their source ids."""
+
+    archive_table = ARCHIVE_TABLES[table]
+    registry = get_schema_registry()
+    origins = _archived_origins(archive_table, event_id)
+    records = list(iter_records(table, where=links_to("Evento", event_id), model=MODELS[table]))
+
+    pending = [record for record in records if record.id not in origins]
+    for start in range(0, len(pending), BATCH_SIZE):
+        payloads = []
+        for record in pending[start : start + BATCH_SIZE]:
+            # Unmodelled cells (e.g. "Chave Idempotência") are copied as well.
+            fields = registry.writable(archive_table, record.to_fields(extra=True))
+            if table == "Recebimentos" and fields.get("Pedido"):
+                # Archived receipts point at the archived copy of their order.
+                fields["Pedido"] = [id_map.get(pedido, pedido) for pedido in fields["Pedido"]]
+            fields[_ORIGIN_FIELD] = record.id
+            payloads.append(fields)
+
+        created = batch_create(archive_table, payloads)
+        if len(created) != len(payloads):
+            raise RuntimeError(f"{archive_table}: esperados {len(payloads)} registos, criados {len(created)}.")
+        for payload, stored in zip(payloads, created):
+            if not _same_fields(payload, stored.get("fields", {})):
+                raise RuntimeError(f"{archive_table}: cópia de {payload[_ORIGIN_FIELD]} não confere com a origem.")
+            origins[payload[_ORIGIN_FIELD]] = stored["id"]
+
+    id_map.update(origins)
+    report.movidos[table] = len(pending)
+    report.retomados[table] = len(records) - len(pending)
+    return [record.id for record in records]
+
+
+def archive_event(event_id: str) -> ArchiveReport:
+    """Archive all rows of the inactive event ``event_id``.
+
+    Every table is copied before anything is deleted: Airtable empties link
+    cells that point at deleted records, so deleting the orders first would
+    leave the receipts without the ``Pedido`` needed to relink them.
+    """
+
+    evento = next((e for e in read_all("Eventos") if e.id == event_id), None)
+    if evento is None:
+        raise ValueError(f"Evento {event_id} não encontrado.")
+    if evento.ativo:
+        raise ValueError(f"O evento {evento.nome or event_id} está ativo e não pode ser arquivado.")
+
+    summary = reconcile(event_id)
+    report = ArchiveReport(event_id=event_id)
+    id_map: Dict[str, str] = {}
+    # Pedidos first so receipts can be relinked.
+    copied = {table: _copy_table(table, event_id, id_map, report) for table in ARCHIVE_TABLES}
+    for table, record_ids in copied.items():
+        for start in range(0, len(record_ids), BATCH_SIZE):
+            batch_delete(table, record_ids[start : start + BATCH_SIZE])
+
+    remaining = {
+        table: sum(1 for _ in iter_records(table, fields=("Evento",), where=links_to("Evento", event_id)))
+        for table in ARCHIVE_TABLES
+    }
+    if any(remaining.values()):
+        raise RuntimeError(f"Arquivo incompleto do evento {event_id}: {remaining}")
+
+    if summary.record_id and not summary.arquivado:
+        update_record(SUMMARY_TABLE, summary.record_id, {"Arquivado": True})
+    invalidate_cache()
+    return report
+
+
+def archive_inactive_events() -> List[ArchiveReport]:
+    eventos = read_all("Eventos")
+    return [archive_event(evento.id) for evento in eventos if not evento.ativo and not is_archived(evento.id)]
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Arquiva os pedidos, recebimentos e sangrias de eventos encerrados."
+    )
+    parser.add_argument("eventos", nargs="*", help="IDs Airtable dos eventos a arquivar")
+    parser.add_argument("--inativos", action="store_true", help="Arquivar todos os eventos inativos")
+    args = parser.parse_args(argv)
+    if not args.eventos and not args.inativos:
+        parser.error("indique eventos ou --inativos")
+
+    reports = archive_inactive_events() if args.inativos else [archive_event(eid) for eid in args.eventos]
+    for report in reports:
+        movidos = ", ".join(f"{tabela}: {n}" for tabela, n in report.movidos.items())
+        print(f"{report.event_id}: {movidos}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,129 @@
-"""Cache helpers for data retrieval from Airtable."""
+"""Cache helpers for data retrieval from Airtable.
+
+Each table read is cached per *version*: :func:`invalidate_table` bumps the
+version so the next read misses the cache, while :func:`patch_records`
+overlays individual created, changed or deleted records on top of the cached
+list without refetching the table. Both are process-wide, so a change pushed
+by an Airtable webhook is visible to every session at once.
+"""
 from __future__ import annotations
 
+import itertools
+import os
+import threading
+from typing import Any, Dict, Iterable, List, Optional
+
 import streamlit as st
 
 from .airtable_client import read_all
 
+CACHE_TTL = int(os.getenv("CACHE_TTL", "300"))
+MAX_PATCHED_RECORDS = 200
 
-@st.cache_data(ttl=300)
-def get_cached_data(table: str):
+_versions: Dict[str, int] = {}
+# Shared across tables so a version number is never reused for a different read.
+_version_counter = itertools.count(1)
+_patches: Dict[str, Dict[str, Optional[Any]]] = {}
+_lock = threading.Lock()
+
+
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def _read_table(table: str, version: int):
     return read_all(table)
 
 
+def get_cached_data(table: str):
+    with _lock:
+        version = _versions.get(table, 0)
+        patch = dict(_patches.get(table, {}))
+    records = _read_table(table, version)
+    if not patch:
+        return records
+
+    merged: List[Any] = []
+    for record in records:
+        record_id = record.get("id")
+        if record_id in patch:
+            replacement = patch.pop(record_id)
+            if replacement is not None:
+                merged.append(replacement)
+        else:
+            merged.append(record)
+    merged.extend(record for record in patch.values() if record is not None)
+    return merged
+
+
+def invalidate_table(table: str) -> None:
+    """Drop the cached copy of ``table`` only; other tables stay cached."""
+
+    with _lock:
+        _versions[table] = next(_version_counter)
+        _patches.pop(table, None)
+
+
+def refresh_table(table: str) -> None:
+    """Read ``table`` into a new cache version, then switch readers over to it.
+
+    Unlike :func:`invalidate_table`, readers keep getting the current copy
+    while the new one is fetched. Patches that arrive during the fetch are
+    kept on top of the new version.
+    """
+
+    with _lock:
+        current = _versions.get(table, 0)
+        version = next(_version_counter)
+        before = dict(_patches.get(table, {}))
+    _read_table(table, version)
+    with _lock:
+        if _versions.get(table, 0) != current:
+            return  # invalidated or refreshed meanwhile; that version wins
+        _versions[table] = version
+        patch = {
+            record_id: record
+            for record_id, record in _patches.get(table, {}).items()
+            if record_id not in before or before[record_id] is not record
+        }
+        if patch:
+            _patches[table] = patch
+        else:
+            _patches.pop(table, None)
+
+
+def patched_tables() -> List[str]:
+    """Tables currently served with a patch overlay."""
+
+    with _lock:
+        return [table for table, patch in _patches.items() if patch]
+
+
+def patch_overlay(table: str) -> Dict[str, Any]:
+    """Copy of the overlay of ``table``: record id → patched record, or None if deleted."""
+
+    with _lock:
+        return dict(_patches.get(table, {}))
+
+
+def patch_records(table: str, upserts: Iterable[Any] = (), deleted_ids: Iterable[str] = ()) -> None:
+    """Overlay created/changed records and deletions on the cached ``table``.
+
+    Falls back to :func:`invalidate_table` once the overlay grows past
+    :data:`MAX_PATCHED_RECORDS`, at which point a refetch is cheaper.
+    """
+
+    with _lock:
+        patch = _patches.setdefault(table, {})
+        for record in upserts:
+            patch[record.get("id")] = record
+        for record_id in deleted_ids:
+            patch[record_id] = None
+        overflow = len(patch) > MAX_PATCHED_RECORDS
+    if overflow:
+        invalidate_table(table)
+
+
 def invalidate_cache() -> None:
     """Clear all cached Airtable reads to reflect recent mutations."""
 
+    with _lock:
+        _patches.clear()
     st.cache_data.clear()
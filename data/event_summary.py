@@ -0,0 +1,261 @@
+"""Materialised per-event totals kept in the ``Resumo de Evento`` table.
+
+Each event has one summary record holding the totals the dashboard needs.
+Pages apply small deltas after every write; because those updates are a
+read-modify-write on Airtable, concurrent operators can occasionally lose an
+increment, so :func:`reconcile` rebuilds the record from the source tables
+whenever it is older than :data:`RECONCILE_INTERVAL`.
+"""
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, Optional
+
+from .airtable_client import create_record, find_first, iter_records, links_to, update_record
+from .models import Pedido, Recebimento, Sangria, as_float
+
+SUMMARY_TABLE = "Resumo de Evento"
+RECONCILE_INTERVAL = timedelta(minutes=10)
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _parse_timestamp(value: Any) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def _load_breakdown(value: Any) -> Dict[str, float]:
+    if not value:
+        return {}
+    try:
+        data = json.loads(value)
+    except (TypeError, ValueError):
+        return {}
+    return {str(key): as_float(amount) for key, amount in data.items()} if isinstance(data, dict) else {}
+
+
+def _add_breakdown(target: Dict[str, float], source: Dict[str, float]) -> None:
+    for key, amount in source.items():
+        total = target.get(key, 0.0) + amount
+        if abs(total) < 1e-9:
+            target.pop(key, None)
+        else:
+            target[key] = round(total, 2)
+
+
+@dataclass
+class EventSummary:
+    event_id: str
+    total_pedidos: int = 0
+    total_valor: float = 0.0
+    valor_pago: float = 0.0
+    valor_pendente: float = 0.0
+    total_recebimentos: float = 0.0
+    total_sangria: float = 0.0
+    por_ementa: Dict[str, float] = field(default_factory=dict)
+    por_tipo: Dict[str, float] = field(default_factory=dict)
+    record_id: Optional[str] = None
+    reconciliado_em: Optional[datetime] = None
+    arquivado: bool = False
+
+    @classmethod
+    def from_record(cls, record: Dict[str, Any]) -> "EventSummary":
+        return cls(
+            event_id=record.get("Evento ID") or "",
+            total_pedidos=int(as_float(record.get("Total Pedidos"))),
+            total_valor=as_float(record.get("Total Valor")),
+            valor_pago=as_float(record.get("Valor Pago")),
+            valor_pendente=as_float(record.get("Valor Pendente")),
+            total_recebimentos=as_float(record.get("Total Recebimentos")),
+            total_sangria=as_float(record.get("Total Sangria")),
+            por_ementa=_load_breakdown(record.get("Por Ementa")),
+            por_tipo=_load_breakdown(record.get("Por Tipo")),
+            record_id=record.get("id"),
+            reconciliado_em=_parse_timestamp(record.get("Reconciliado em")),
+            arquivado=bool(record.get("Arquivado")),
+        )
+
+    def to_fields(self) -> Dict[str, Any]:
+        return {
+            "Evento": [self.event_id],
+            "Evento ID": self.event_id,
+            "Total Pedidos": self.total_pedidos,
+            "Total Valor": round(self.total_valor, 2),
+            "Valor Pago": round(self.valor_pago, 2),
+            "Valor Pendente": round(self.valor_pendente, 2),
+            "Total Recebimentos": round(self.total_recebimentos, 2),
+            "Total Sangria": round(self.total_sangria, 2),
+            "Por Ementa": json.dumps(self.por_ementa, sort_keys=True),
+            "Por Tipo": json.dumps(self.por_tipo, sort_keys=True),
+        }
+
+    def add(self, delta: "EventSummary") -> None:
+        self.total_pedidos += delta.total_pedidos
+        self.total_valor += delta.total_valor
+        self.valor_pago += delta.valor_pago
+        self.valor_pendente += delta.valor_pendente
+        self.total_recebimentos += delta.total_recebimentos
+        self.total_sangria += delta.total_sangria
+        _add_breakdown(self.por_ementa, delta.por_ementa)
+        _add_breakdown(self.por_tipo, delta.por_tipo)
+
+    def is_stale(self, now: Optional[datetime] = None) -> bool:
+        if self.arquivado:
+            return False  # the source rows left the hot tables; these totals are final
+        if self.reconciliado_em is None:
+            return True
+        return (now or _now()) - self.reconciliado_em > RECONCILE_INTERVAL
+
+
+def pedido_delta(event_id: str, pedido: Pedido) -> EventSummary:
+    """Contribution of a newly created order to the event totals."""
+
+    valor = pedido.valor
+    delta = EventSummary(
+        event_id=event_id,
+        total_pedidos=pedido.quantidade,
+        total_valor=valor,
+        valor_pago=valor if pedido.pago else 0.0,
+        valor_pendente=0.0 if pedido.pago else valor,
+    )
+    if pedido.ementa_id:
+        delta.por_ementa[pedido.ementa_id] = valor
+    if pedido.tipo_id:
+        delta.por_tipo[pedido.tipo_id] = valor
+    return delta
+
+
+def pedidos_delta(event_id: str, pedidos: Iterable[Pedido]) -> EventSummary:
+    """Combined contribution of several orders, applied with a single summary write."""
+
+    delta = EventSummary(event_id=event_id)
+    for pedido in pedidos:
+        delta.add(pedido_delta(event_id, pedido))
+    return delta
+
+
+def recebimento_delta(event_id: str, valor: Any) -> EventSummary:
+    """Contribution of a payment that settles a pending order."""
+
+    amount = as_float(valor)
+    return EventSummary(
+        event_id=event_id,
+        valor_pago=amount,
+        valor_pendente=-amount,
+        total_recebimentos=amount,
+    )
+
+
+def sangria_delta(event_id: str, valor: Any) -> EventSummary:
+    """Contribution of a cash withdrawal."""
+
+    return EventSummary(event_id=event_id, total_sangria=as_float(valor))
+
+
+def compute_summary(
+    event_id: str,
+    pedidos: Iterable[Pedido],
+    recebimentos: Iterable[Recebimento],
+    sangrias: Iterable[Sangria],
+) -> EventSummary:
+    """Build the totals of ``event_id`` from the full source tables."""
+
+    summary = EventSummary(event_id=event_id)
+    for pedido in pedidos:
+        if pedido.in_event(event_id):
+            summary.add(pedido_delta(event_id, pedido))
+    for recebimento in recebimentos:
+        if recebimento.in_event(event_id):
+            summary.total_recebimentos += recebimento.valor
+    for sangria in sangrias:
+        if sangria.in_event(event_id):
+            summary.total_sangria += sangria.valor
+    return summary
+
+
+def _summary_formula(event_id: str) -> str:
+    return f"{{Evento ID}}='{event_id}'"
+
+
+def get_summary(event_id: str) -> Optional[EventSummary]:
+    """Return the stored summary of ``event_id`` (one record read)."""
+
+    record = find_first(SUMMARY_TABLE, _summary_formula(event_id))
+    return EventSummary.from_record(record) if record else None
+
+
+def _save(summary: EventSummary, *, reconciled: bool) -> None:
+    fields = summary.to_fields()
+    if reconciled:
+        summary.reconciliado_em = _now()
+        fields["Reconciliado em"] = summary.reconciliado_em.isoformat()
+    if summary.record_id:
+        update_record(SUMMARY_TABLE, summary.record_id, fields)
+    else:
+        created = create_record(SUMMARY_TABLE, fields)
+        summary.record_id = created.get("id")
+
+
+def apply_delta(delta: EventSummary) -> bool:
+    """Add ``delta`` to the stored summary of its event.
+
+    Failures are swallowed: the source write already happened and the next
+    reconciliation rebuilds the totals. Returns whether the update succeeded.
+    """
+
+    try:
+        summary = get_summary(delta.event_id)
+        if summary is None:
+            # No baseline yet: let the reconciler build it from the source tables.
+            reconcile(delta.event_id)
+            return True
+        summary.add(delta)
+        _save(summary, reconciled=False)
+    except Exception:  # pragma: no cover - reconciled later
+        return False
+    return True
+
+
+def reconcile(event_id: str) -> EventSummary:
+    """Recompute the summary of ``event_id`` from the source tables and store it.
+
+    Archived events are returned unchanged: their rows no longer live in the
+    hot tables and the stored totals were reconciled before archiving.
+    """
+
+    stored = get_summary(event_id)
+    if stored and stored.arquivado:
+        return stored
+    in_event = links_to("Evento", event_id)
+    summary = compute_summary(
+        event_id,
+        iter_records(
+            "Pedidos",
+            fields=("Evento", "Ementa", "TipoCliente", "Quantidade", "Valor", "Pago"),
+            where=in_event,
+        ),
+        iter_records("Recebimentos", fields=("Evento", "Valor"), where=in_event),
+        iter_records("Sangria de Caixa", fields=("Evento", "Valor"), where=in_event),
+    )
+    summary.record_id = stored.record_id if stored else None
+    _save(summary, reconciled=True)
+    return summary
+
+
+def load_summary(event_id: str) -> EventSummary:
+    """Return the summary of ``event_id``, reconciling it first when stale."""
+
+    summary = get_summary(event_id)
+    if summary is None or summary.is_stale():
+        summary = reconcile(event_id)
+    return summary
@@ -0,0 +1,269 @@
+"""Streaming export of an event's Pedidos, Recebimentos and Sangria de Caixa.
+
+Records are read from Airtable in parallel partitions, a few pages at a time,
+and written straight to disk, so memory stays bounded by those pages (plus one
+Parquet row group) no matter how many records an event has. The result is a ZIP archive with one CSV or
+Parquet file per table. In the app the archive is written under
+``static/exportacoes/`` and downloaded through Streamlit's static file
+serving, so it is never loaded into the server's memory either.
+
+Usage from the command line::
+
+    python -m data.export <evento_id> --format parquet --output evento.zip
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import os
+import secrets
+import tempfile
+import time
+import zipfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from .airtable_client import read_all
+from .archive import iter_event_records
+from .models import Pedido, Recebimento, Sangria
+
+BATCH_ROWS = 5000
+FORMATS = ("csv", "parquet")
+# Served by Streamlit at app/static/exportacoes/ (server.enableStaticServing).
+EXPORT_DIR = Path(__file__).resolve().parent.parent / "static" / "exportacoes"
+EXPORT_URL = "app/static/exportacoes"
+EXPORT_MAX_AGE = 3600
+
+Row = Dict[str, Any]
+
+
+@dataclass(frozen=True)
+class _TableSpec:
+    table: str
+    filename: str
+    source_fields: Tuple[str, ...]
+    columns: Tuple[Tuple[str, str], ...]
+    build_row: Callable[[Any, "Lookups"], Row]
+
+
+@dataclass
+class ExportStats:
+    table: str
+    rows: int
+    seconds: float
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds > 0 else float(self.rows)
+
+
+@dataclass
+class Lookups:
+    ementas: Dict[str, str]
+    tipos: Dict[str, str]
+
+
+def _pedido_row(pedido: Pedido, lookups: Lookups) -> Row:
+    ementa = pedido.ementa_id
+    tipo = pedido.tipo_id
+    return {
+        "id": pedido.id,
+        "Criado em": pedido.created_time,
+        "Data": pedido.data,
+        "Ementa": lookups.ementas.get(ementa, ementa),
+        "Tipo": lookups.tipos.get(tipo, tipo),
+        "Quantidade": pedido.quantidade,
+        "Valor": pedido.valor,
+        "Pago": pedido.pago,
+    }
+
+
+def _recebimento_row(recebimento: Recebimento, lookups: Lookups) -> Row:
+    return {
+        "id": recebimento.id,
+        "Criado em": recebimento.created_time,
+        "Pedido": recebimento.pedidos[0] if recebimento.pedidos else None,
+        "Valor": recebimento.valor,
+    }
+
+
+def _sangria_row(sangria: Sangria, lookups: Lookups) -> Row:
+    return {
+        "id": sangria.id,
+        "Criado em": sangria.created_time,
+        "Valor": sangria.valor,
+        "Responsável": sangria.responsavel,
+        "Observações": sangria.observacoes,
+    }
+
+
+TABLES: Tuple[_TableSpec, ...] = (
+    _TableSpec(
+        table="Pedidos",
+        filename="pedidos",
+        source_fields=("Evento", "Data", "Ementa", "TipoCliente", "Quantidade", "Valor", "Pago"),
+        columns=(
+            ("id", "str"),
+            ("Criado em", "str"),
+            ("Data", "str"),
+            ("Ementa", "str"),
+            ("Tipo", "str"),
+            ("Quantidade", "int"),
+            ("Valor", "float"),
+            ("Pago", "bool"),
+        ),
+        build_row=_pedido_row,
+    ),
+    _TableSpec(
+        table="Recebimentos",
+        filename="recebimentos",
+        source_fields=("Evento", "Pedido", "Valor"),
+        columns=(("id", "str"), ("Criado em", "str"), ("Pedido", "str"), ("Valor", "float")),
+        build_row=_recebimento_row,
+    ),
+    _TableSpec(
+        table="Sangria de Caixa",
+        filename="sangrias",
+        source_fields=("Evento", "Valor", "Responsável", "Observações"),
+        columns=(
+            ("id", "str"),
+            ("Criado em", "str"),
+            ("Valor", "float"),
+            ("Responsável", "str"),
+            ("Observações", "str"),
+        ),
+        build_row=_sangria_row,
+    ),
+)
+
+
+def load_lookups() -> Lookups:
+    return Lookups(
+        ementas={ementa.id: ementa.nome for ementa in read_all("Ementas")},
+        tipos={tipo.id: tipo.nome for tipo in read_all("Tipos de Cliente")},
+    )
+
+
+def iter_event_rows(spec: _TableSpec, event_id: str, lookups: Lookups) -> Iterator[Row]:
+    """Yield export rows of ``spec.table`` for ``event_id``, a few pages at a time.
+
+    On Airtable the table is read in parallel id partitions, streamed with
+    bounded memory (see :mod:`data.partitioned`).
+    """
+
+    records = iter_event_records(
+        spec.table, event_id, fields=spec.source_fields, include_created_time=True, partition_by="id"
+    )
+    for record in records:
+        yield spec.build_row(record, lookups)
+
+
+_ARROW_TYPES = {"str": pa.string(), "int": pa.int64(), "float": pa.float64(), "bool": pa.bool_()}
+
+
+def arrow_schema(spec: _TableSpec) -> pa.Schema:
+    return pa.schema([(name, _ARROW_TYPES[kind]) for name, kind in spec.columns])
+
+
+def iter_batches(rows: Iterable[Row], schema: pa.Schema) -> Iterator[pa.Table]:
+    """Group ``rows`` into Arrow tables of at most :data:`BATCH_ROWS` rows.
+
+    At least one (possibly empty) table is always yielded so writers emit a schema.
+    """
+    batch: List[Row] = []
+    emitted = False
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= BATCH_ROWS:
+            yield pa.Table.from_pylist(batch, schema=schema)
+            emitted = True
+            batch = []
+    if batch or not emitted:
+        yield pa.Table.from_pylist(batch, schema=schema)
+
+
+def _write_csv(rows: Iterable[Row], spec: _TableSpec, path: str) -> int:
+    count = 0
+    with open(path, "w", newline="", encoding="utf-8") as handle:
+        writer = csv.DictWriter(handle, fieldnames=[name for name, _ in spec.columns])
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(row)
+            count += 1
+    return count
+
+
+def _write_parquet(rows: Iterable[Row], spec: _TableSpec, path: str) -> int:
+    schema = arrow_schema(spec)
+    count = 0
+    with pq.ParquetWriter(path, schema) as writer:
+        for batch in iter_batches(rows, schema):
+            writer.write_table(batch)
+            count += batch.num_rows
+    return count
+
+
+_WRITERS = {"csv": _write_csv, "parquet": _write_parquet}
+
+
+def export_event(event_id: str, output, fmt: str = "csv") -> List[ExportStats]:
+    """Write a ZIP archive with the event tables to ``output`` (path or binary file).
+
+    Returns per-table statistics including throughput in rows per second.
+    """
+
+    if fmt not in _WRITERS:
+        raise ValueError(f"Formato de exportação desconhecido: {fmt}")
+
+    lookups = load_lookups()
+    stats: List[ExportStats] = []
+    with tempfile.TemporaryDirectory() as workdir, zipfile.ZipFile(
+        output, "w", compression=zipfile.ZIP_DEFLATED
+    ) as archive:
+        for spec in TABLES:
+            path = os.path.join(workdir, f"{spec.filename}.{fmt}")
+            started = time.perf_counter()
+            rows = _WRITERS[fmt](iter_event_rows(spec, event_id, lookups), spec, path)
+            stats.append(ExportStats(spec.table, rows, time.perf_counter() - started))
+            archive.write(path, arcname=os.path.basename(path))
+            os.remove(path)
+    return stats
+
+
+def export_event_file(event_id: str, fmt: str = "csv", directory: Path = EXPORT_DIR) -> Tuple[Path, List[ExportStats]]:
+    """Export ``event_id`` to a ZIP under ``directory`` and return its path and statistics.
+
+    The file name is unguessable, as static files need no login, and exports
+    older than :data:`EXPORT_MAX_AGE` seconds are removed on the way.
+    """
+
+    directory.mkdir(parents=True, exist_ok=True)
+    limite = time.time() - EXPORT_MAX_AGE
+    for antigo in directory.glob("*.zip"):
+        if antigo.stat().st_mtime < limite:
+            antigo.unlink(missing_ok=True)
+    path = directory / f"evento_{event_id}_{fmt}_{secrets.token_urlsafe(16)}.zip"
+    with open(path, "wb") as output:
+        stats = export_event(event_id, output, fmt)
+    return path, stats
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Exporta os dados de um evento para CSV ou Parquet.")
+    parser.add_argument("evento_id", help="ID Airtable do evento")
+    parser.add_argument("--format", choices=FORMATS, default="csv")
+    parser.add_argument("--output", help="Ficheiro ZIP de destino (por omissão evento_<id>.zip)")
+    args = parser.parse_args(argv)
+
+    output = args.output or f"evento_{args.evento_id}.zip"
+    for stat in export_event(args.evento_id, output, args.format):
+        print(f"{stat.table}: {stat.rows} linhas em {stat.seconds:.2f}s ({stat.rows_per_second:,.0f} linhas/s)")
+    print(f"Exportação guardada em {output}")
+
+
+if __name__ == "__main__":
+    main()
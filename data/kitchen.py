@@ -0,0 +1,54 @@
+"""Incremental reads of newly registered orders for the kitchen queue."""
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+from typing import AbstractSet, List, Optional, Sequence, Tuple
+
+from .airtable_client import iter_records, links_to
+from .models import Pedido
+
+INITIAL_WINDOW = timedelta(minutes=30)
+QUEUE_FIELDS = ("Evento", "Data", "Ementa", "TipoCliente", "Quantidade", "Pago")
+
+
+def _since_formula(since: str) -> str:
+    # Inclusive bound: several orders may share the last seen creation time.
+    return f"NOT(IS_BEFORE(CREATED_TIME(), DATETIME_PARSE('{since}')))"
+
+
+def initial_cursor(now: Optional[datetime] = None) -> str:
+    now = now or datetime.now(timezone.utc)
+    return (now - INITIAL_WINDOW).strftime("%Y-%m-%dT%H:%M:%S.000Z")
+
+
+def fetch_new_orders(
+    event_id: str,
+    since: str,
+    seen: AbstractSet[str] = frozenset(),
+    fields: Sequence[str] = QUEUE_FIELDS,
+) -> Tuple[List[Pedido], str]:
+    """Return the orders of ``event_id`` created at or after ``since`` and not in ``seen``.
+
+    Airtable filters on creation time, so a poll with nothing new costs one
+    request with an empty page regardless of the size of Pedidos. Returns the
+    new orders, oldest first, and the cursor to use on the next poll.
+    ``fields`` must include ``Evento``.
+    """
+
+    novos: List[Pedido] = []
+    cursor = since
+    records = iter_records(
+        "Pedidos",
+        fields=fields,
+        formula=_since_formula(since),
+        include_created_time=True,
+        where=links_to("Evento", event_id),
+    )
+    for pedido in records:
+        if pedido.id in seen:
+            continue
+        novos.append(pedido)
+        if pedido.created_time and pedido.created_time > cursor:
+            cursor = pedido.created_time
+    novos.sort(key=lambda pedido: pedido.created_time or "")
+    return novos, cursor
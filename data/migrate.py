@@ -0,0 +1,127 @@
+"""Bulk copy of every table between storage backends.
+
+Usage from the command line::
+
+    python -m data.migrate --origem airtable --destino sqlite --sqlite dados.db
+    python -m data.migrate --origem sqlite --destino airtable --sqlite dados.db Pedidos Recebimentos
+
+Backends that keep record ids (SQLite) receive the records as they are. For
+backends that assign new ids (Airtable) records are created without their
+links first and the links, plus text fields holding a migrated record id
+(e.g. ``Evento ID``), are rewritten in a second pass.
+"""
+from __future__ import annotations
+
+import argparse
+import time
+from dataclasses import dataclass
+from typing import Any, Collection, Dict, List, Optional, Sequence
+
+from .archive import ARCHIVE_TABLES
+from .event_summary import SUMMARY_TABLE
+from .models import MODELS
+from .partitioned import fetch_partitioned, id_partitions
+from .storage import RawRecord, StorageBackend, create_backend
+
+BATCH_SIZE = 500
+TABLES: Sequence[str] = (*MODELS, SUMMARY_TABLE, *ARCHIVE_TABLES.values())
+
+
+@dataclass
+class MigrationStats:
+    table: str
+    records: int
+    seconds: float
+
+
+def _references(value: Any, ids: Collection[str]) -> bool:
+    if isinstance(value, list):
+        return bool(value) and all(isinstance(item, str) and item in ids for item in value)
+    return isinstance(value, str) and value in ids
+
+
+def _remap(value: Any, id_map: Dict[str, str]) -> Any:
+    if isinstance(value, list):
+        return [id_map[item] for item in value]
+    return id_map[value]
+
+
+def _read_table(source: StorageBackend, table: str) -> List[RawRecord]:
+    if source.name == "airtable":
+        return list(fetch_partitioned(source, table, id_partitions()))
+    return [record for page in source.iterate(table) for record in page]
+
+
+def migrate(
+    source: StorageBackend,
+    destination: StorageBackend,
+    tables: Sequence[str] = TABLES,
+) -> List[MigrationStats]:
+    """Copy ``tables`` from ``source`` to ``destination`` in batches."""
+
+    stats: List[MigrationStats] = []
+    records_by_table = {table: _read_table(source, table) for table in tables}
+
+    if destination.preserves_ids:
+        for table, records in records_by_table.items():
+            start = time.perf_counter()
+            for offset in range(0, len(records), BATCH_SIZE):
+                destination.import_records(table, records[offset : offset + BATCH_SIZE])
+            stats.append(MigrationStats(table, len(records), time.perf_counter() - start))
+        return stats
+
+    source_ids = {record["id"] for records in records_by_table.values() for record in records}
+    id_map: Dict[str, str] = {}
+    timings: Dict[str, float] = {}
+    for table, records in records_by_table.items():
+        start = time.perf_counter()
+        stripped = [
+            {
+                "id": record["id"],
+                "fields": {
+                    name: value
+                    for name, value in record.get("fields", {}).items()
+                    if not _references(value, source_ids)
+                },
+            }
+            for record in records
+        ]
+        for offset in range(0, len(stripped), BATCH_SIZE):
+            id_map.update(destination.import_records(table, stripped[offset : offset + BATCH_SIZE]))
+        timings[table] = time.perf_counter() - start
+
+    for table, records in records_by_table.items():
+        start = time.perf_counter()
+        updates = []
+        for record in records:
+            links = {
+                name: _remap(value, id_map)
+                for name, value in record.get("fields", {}).items()
+                if _references(value, id_map)
+            }
+            if links:
+                updates.append((id_map[record["id"]], links))
+        for offset in range(0, len(updates), BATCH_SIZE):
+            destination.batch_update(table, updates[offset : offset + BATCH_SIZE])
+        stats.append(MigrationStats(table, len(records), timings[table] + time.perf_counter() - start))
+    return stats
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Copia as tabelas entre backends de armazenamento.")
+    parser.add_argument("tabelas", nargs="*", help="Tabelas a copiar (por omissão, todas)")
+    parser.add_argument("--origem", choices=("airtable", "sqlite"), required=True)
+    parser.add_argument("--destino", choices=("airtable", "sqlite"), required=True)
+    parser.add_argument("--sqlite", default="dados.db", help="Ficheiro da base de dados SQLite")
+    args = parser.parse_args(argv)
+    if args.origem == args.destino:
+        parser.error("origem e destino têm de ser diferentes")
+
+    source = create_backend(args.origem, path=args.sqlite)
+    destination = create_backend(args.destino, path=args.sqlite)
+    for stat in migrate(source, destination, args.tabelas or TABLES):
+        print(f"{stat.table}: {stat.records} registos em {stat.seconds:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
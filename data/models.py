@@ -0,0 +1,335 @@
+"""Typed, compact record classes for the Airtable tables used by the app.
+
+Records are built once by :func:`data.airtable_client._normalize_record`:
+links become tuples of record ids, numbers and flags are coerced and the
+alternative spellings of a field collapse into one attribute. Once the base
+schema is known (:mod:`data.schema`), each model reads only the spelling the
+base actually uses, with a converter chosen for its field type. Hot loops read
+the attributes directly (``pedido.valor``, ``preco.ementas``) while the
+:class:`~collections.abc.Mapping` interface keeps ``record.get("Nome")`` and
+``record["id"]`` working with the original Airtable field names.
+"""
+from __future__ import annotations
+
+from collections.abc import Mapping
+from functools import lru_cache
+from typing import Any, Callable, ClassVar, Dict, Iterator, List, Optional, Tuple, Type
+
+Converter = Callable[[Any], Any]
+
+
+@lru_cache(maxsize=4096)
+def _single_link(record_id: str) -> Tuple[str, ...]:
+    # Most links point at a handful of events, menus and client types: share the tuples.
+    return (record_id,)
+
+
+def as_links(value: Any) -> Tuple[str, ...]:
+    if value is None or value == "":
+        return ()
+    if isinstance(value, (list, tuple)):
+        return _single_link(value[0]) if len(value) == 1 else tuple(value)
+    return _single_link(value)
+
+
+def as_link_list(value: List[str]) -> Tuple[str, ...]:
+    """Converter for cells of a link field, which are always non-empty lists of ids."""
+    return _single_link(value[0]) if len(value) == 1 else tuple(value)
+
+
+def as_float(value: Any) -> float:
+    try:
+        return float(value or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def as_int(value: Any) -> int:
+    return int(as_float(value))
+
+
+def as_bool(value: Any) -> bool:
+    return bool(value)
+
+
+def as_text(value: Any) -> Optional[str]:
+    return None if value is None else str(value)
+
+
+def _absent(value: Any) -> bool:
+    # Mirrors Airtable, which omits empty cells and unchecked boxes from ``fields``.
+    return value is None or value is False or value == ()
+
+
+class Record(Mapping):
+    """Base class: a record id plus the typed attributes declared in ``FIELDS``."""
+
+    __slots__ = ("id", "created_time", "_extra")
+
+    TABLE: ClassVar[str] = ""
+    # (Airtable field name, attribute, converter); earlier aliases win unless the schema resolves one.
+    FIELDS: ClassVar[Tuple[Tuple[str, str, Converter], ...]] = ()
+    DEFAULTS: ClassVar[Dict[str, Any]] = {}
+    _BY_NAME: ClassVar[Dict[str, str]] = {}
+    # (field name → (attribute, converter, rank), whether any attribute still has aliases)
+    _COMPILED: ClassVar[Tuple[Dict[str, Tuple[str, Converter, int]], bool]] = ({}, False)
+    _FIELD_NAMES: ClassVar[Dict[str, str]] = {}
+
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        super().__init_subclass__(**kwargs)
+        cls._BY_NAME = {}
+        cls.DEFAULTS = {}
+        for name, attribute, converter in cls.FIELDS:
+            cls._BY_NAME.setdefault(name, attribute)
+            cls.DEFAULTS.setdefault(attribute, converter(None))
+        cls.compile({})
+
+    @classmethod
+    def compile(cls, resolved: Dict[str, Tuple[str, Converter]]) -> None:
+        """Install the field mapping of the actual base.
+
+        ``resolved`` maps attributes to the ``(field name, converter)`` found in
+        the base schema (see :mod:`data.schema`). Only that name is read for
+        those attributes; the others keep every declared alias and converter.
+        """
+        converters: Dict[str, Tuple[str, Converter, int]] = {}
+        field_names: Dict[str, str] = {}
+        aliases: Dict[str, int] = {}
+        for rank, (name, attribute, converter) in enumerate(cls.FIELDS):
+            if attribute in resolved:
+                name, converter = resolved[attribute]
+            converters.setdefault(name, (attribute, converter, rank))
+            field_names.setdefault(attribute, name)
+            aliases[attribute] = aliases.get(attribute, 0) + 1
+        aliased = any(count > 1 for attribute, count in aliases.items() if attribute not in resolved)
+        # Built aside and published with single assignments: readers on other threads
+        # see the old or the new mapping, never a partially filled one.
+        cls._COMPILED = (converters, aliased)
+        cls._FIELD_NAMES = field_names
+
+    @classmethod
+    def field_name(cls, attribute: str) -> str:
+        """Airtable field name that stores ``attribute`` in this base."""
+        return cls._FIELD_NAMES[attribute]
+
+    def __init__(self, record_id: Optional[str] = None, **values: Any) -> None:
+        self.id = record_id
+        self.created_time = None
+        self._extra = None
+        for attribute, default in self.DEFAULTS.items():
+            setattr(self, attribute, values.get(attribute, default))
+
+    @classmethod
+    def from_fields(
+        cls,
+        fields: Dict[str, Any],
+        record_id: Optional[str] = None,
+        created_time: Optional[str] = None,
+    ):
+        """Build a record from an Airtable ``fields`` dict, converting each value once."""
+        record = cls.__new__(cls)
+        record.id = record_id
+        record.created_time = created_time
+        extra = None
+        values = dict(cls.DEFAULTS)
+        ranks: Dict[str, int] = {}
+        converters, aliased = cls._COMPILED
+        for name, value in fields.items():
+            spec = converters.get(name)
+            if spec is None:
+                if extra is None:
+                    extra = {}
+                extra[name] = value
+                continue
+            attribute, converter, rank = spec
+            if aliased:
+                if ranks.get(attribute, rank) < rank:
+                    continue  # a preferred alias of this field was already read
+                ranks[attribute] = rank
+            values[attribute] = converter(value)
+        for attribute, value in values.items():
+            setattr(record, attribute, value)
+        record._extra = extra
+        return record
+
+    def _lookup(self, key: str) -> Any:
+        if key == "id":
+            return self.id
+        if key == "createdTime":
+            return self.created_time
+        attribute = self._BY_NAME.get(key)
+        if attribute is not None:
+            return getattr(self, attribute)
+        return self._extra.get(key) if self._extra else None
+
+    def __getitem__(self, key: str) -> Any:
+        value = self._lookup(key)
+        if _absent(value):
+            raise KeyError(key)
+        return value
+
+    def get(self, key: str, default: Any = None) -> Any:
+        value = self._lookup(key)
+        return default if _absent(value) else value
+
+    def __contains__(self, key: object) -> bool:
+        return isinstance(key, str) and not _absent(self._lookup(key))
+
+    def _names(self) -> Iterator[str]:
+        if self.id is not None:
+            yield "id"
+        if self.created_time:
+            yield "createdTime"
+        for attribute, name in self._FIELD_NAMES.items():
+            if not _absent(getattr(self, attribute)):
+                yield name
+        if self._extra:
+            yield from self._extra
+
+    def __iter__(self) -> Iterator[str]:
+        return self._names()
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self._names())
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {name: self[name] for name in self}
+
+    def to_fields(self, extra: bool = False) -> Dict[str, Any]:
+        """Writable Airtable fields of the modelled attributes, links as lists.
+
+        With ``extra`` the unmodelled cells read from Airtable are included as
+        they were received, e.g. to copy a record whole into another table.
+        """
+        fields: Dict[str, Any] = {}
+        for attribute, name in self._FIELD_NAMES.items():
+            value = getattr(self, attribute)
+            if not _absent(value):
+                fields[name] = list(value) if isinstance(value, tuple) else value
+        if extra and self._extra:
+            fields.update(self._extra)
+        return fields
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+
+class EventRecord(Record):
+    """Record linked to one or more events through its ``Evento`` field."""
+
+    __slots__ = ()
+
+    def in_event(self, event_id: str) -> bool:
+        return event_id in self.eventos  # type: ignore[attr-defined]
+
+    @property
+    def evento_id(self) -> Optional[str]:
+        eventos = self.eventos  # type: ignore[attr-defined]
+        return eventos[0] if eventos else None
+
+
+class Pedido(EventRecord):
+    __slots__ = ("eventos", "data", "ementas", "tipos", "quantidade", "valor", "pago")
+    TABLE = "Pedidos"
+    FIELDS = (
+        ("Evento", "eventos", as_links),
+        ("Data", "data", as_text),
+        ("Ementa", "ementas", as_links),
+        ("TipoCliente", "tipos", as_links),
+        ("Quantidade", "quantidade", as_int),
+        ("Valor", "valor", as_float),
+        ("Pago", "pago", as_bool),
+    )
+
+    @property
+    def ementa_id(self) -> Optional[str]:
+        return self.ementas[0] if self.ementas else None
+
+    @property
+    def tipo_id(self) -> Optional[str]:
+        return self.tipos[0] if self.tipos else None
+
+
+class Ementa(EventRecord):
+    __slots__ = ("nome", "descricao", "ativo", "eventos")
+    TABLE = "Ementas"
+    FIELDS = (
+        ("Nome", "nome", as_text),
+        ("Descrição", "descricao", as_text),
+        ("Ativo", "ativo", as_bool),
+        ("Evento", "eventos", as_links),
+    )
+
+
+class Preco(EventRecord):
+    __slots__ = ("ementas", "tipos", "eventos", "valor")
+    TABLE = "Preços"
+    FIELDS = (
+        ("Ementa", "ementas", as_links),
+        ("TipoCliente", "tipos", as_links),
+        ("Evento", "eventos", as_links),
+        ("Preço (€)", "valor", as_float),
+        ("Preco", "valor", as_float),
+        ("Preço", "valor", as_float),
+    )
+
+
+class TipoCliente(Record):
+    __slots__ = ("nome", "desconto", "cor")
+    TABLE = "Tipos de Cliente"
+    FIELDS = (
+        ("Nome", "nome", as_text),
+        ("Desconto %", "desconto", as_float),
+        ("Cor", "cor", as_text),
+    )
+
+
+class Evento(Record):
+    __slots__ = ("nome", "data", "local", "ativo")
+    TABLE = "Eventos"
+    FIELDS = (
+        ("Nome", "nome", as_text),
+        ("Data", "data", as_text),
+        ("Local", "local", as_text),
+        ("Ativo", "ativo", as_bool),
+    )
+
+
+class Recebimento(EventRecord):
+    __slots__ = ("pedidos", "eventos", "valor")
+    TABLE = "Recebimentos"
+    FIELDS = (
+        ("Pedido", "pedidos", as_links),
+        ("Evento", "eventos", as_links),
+        ("Valor", "valor", as_float),
+    )
+
+
+class Sangria(EventRecord):
+    __slots__ = ("eventos", "valor", "responsavel", "observacoes")
+    TABLE = "Sangria de Caixa"
+    FIELDS = (
+        ("Evento", "eventos", as_links),
+        ("Valor", "valor", as_float),
+        ("Responsável", "responsavel", as_text),
+        ("Observações", "observacoes", as_text),
+    )
+
+
+class Utilizador(Record):
+    __slots__ = ("nome", "email", "password", "perfil", "ativo", "eventos")
+    TABLE = "Utilizadores"
+    FIELDS = (
+        ("Nome", "nome", as_text),
+        ("Email", "email", as_text),
+        ("Password", "password", as_text),
+        ("Perfil", "perfil", as_text),
+        ("Ativo", "ativo", as_bool),
+        ("Eventos", "eventos", as_links),
+    )
+
+
+MODELS: Dict[str, Type[Record]] = {
+    model.TABLE: model
+    for model in (Pedido, Ementa, Preco, TipoCliente, Evento, Recebimento, Sangria, Utilizador)
+}
@@ -0,0 +1,237 @@
+"""Partitioned, parallel full-table reads.
+
+Airtable pages hold 100 records and each page needs the offset of the
+previous one, so a large table is a long chain of serial requests. Here the
+table is split into disjoint ``filterByFormula`` partitions, read
+concurrently (within Airtable's 5 requests/second per base) and merged:
+
+* ``by="id"``: by the first character of the record id after ``rec``;
+* ``by="created"``: by creation-time windows between the given boundaries,
+  with open-ended first and last windows.
+
+Partitions cover the whole table by construction (the id groups are checked
+against the full, case-sensitive id alphabet). Records are streamed: each
+partition buffers at most :data:`QUEUE_PAGES` pages, so memory does not grow
+with the table. Without ``sort`` records come in arrival order; with it the
+sorted partitions are merge-sorted. While streaming, every record must
+satisfy its own partition and appear only once, and every partition must
+finish.
+"""
+from __future__ import annotations
+
+import heapq
+import queue
+import string
+import threading
+import time
+from typing import Any, Callable, Iterator, List, Optional, Sequence, Set, Tuple
+
+from .storage import RawRecord, StorageBackend
+
+PARTITIONS = 8
+QUEUE_PAGES = 2
+REQUESTS_PER_SECOND = 5
+# Airtable record ids are "rec" followed by 14 base-62 characters.
+ID_ALPHABET = string.digits + string.ascii_uppercase + string.ascii_lowercase
+
+Partition = Tuple[str, Callable[[RawRecord], bool]]
+
+
+class IncompleteReadError(RuntimeError):
+    pass
+
+
+class _RateLimiter:
+    """Spaces requests so that at most ``rate`` start per second across threads."""
+
+    def __init__(self, rate: float) -> None:
+        self._interval = 1.0 / rate
+        self._next = time.monotonic()
+        self._lock = threading.Lock()
+
+    def wait(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + self._interval
+        if start > now:
+            time.sleep(start - now)
+
+
+def _check_id_groups(groups: Sequence[str]) -> None:
+    """Each id character must fall in exactly one group, or records would be missed or doubled."""
+
+    chars = "".join(groups)
+    if sorted(chars) != sorted(ID_ALPHABET) or len(set(chars)) != len(chars):
+        raise ValueError(f"As partições por ID não cobrem o alfabeto exatamente uma vez: {groups}")
+    if any(not char.isalnum() for char in chars):
+        raise ValueError("Caracteres especiais numa classe REGEX_MATCH")
+
+
+def id_partitions(count: int = PARTITIONS) -> List[Partition]:
+    size = -(-len(ID_ALPHABET) // count)
+    groups = [ID_ALPHABET[start : start + size] for start in range(0, len(ID_ALPHABET), size)]
+    _check_id_groups(groups)
+    return [
+        (
+            # REGEX_MATCH is case-sensitive, like the ids themselves.
+            f"REGEX_MATCH(RECORD_ID(), '^rec[{chars}]')",
+            lambda record, chars=chars: record["id"][3:4] in chars,
+        )
+        for chars in groups
+    ]
+
+
+def created_partitions(boundaries: Sequence[str]) -> List[Partition]:
+    """Creation-time windows split at the ISO timestamps in ``boundaries``."""
+
+    edges: List[Optional[str]] = [None, *sorted(boundaries), None]
+    partitions: List[Partition] = []
+    for lower, upper in zip(edges, edges[1:]):
+        conditions = []
+        if lower:
+            conditions.append(f"NOT(IS_BEFORE(CREATED_TIME(), DATETIME_PARSE('{lower}')))")
+        if upper:
+            conditions.append(f"IS_BEFORE(CREATED_TIME(), DATETIME_PARSE('{upper}'))")
+        formula = "AND(" + ", ".join(conditions) + ")" if len(conditions) > 1 else (conditions or ["TRUE()"])[0]
+
+        def inside(record: RawRecord, lower: Optional[str] = lower, upper: Optional[str] = upper) -> bool:
+            created = record.get("createdTime") or ""
+            return (lower is None or created >= lower) and (upper is None or created < upper)
+
+        partitions.append((formula, inside))
+    return partitions
+
+
+class _Descending:
+    __slots__ = ("value",)
+
+    def __init__(self, value: Any) -> None:
+        self.value = value
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, _Descending) and self.value == other.value
+
+    def __lt__(self, other: "_Descending") -> bool:
+        return other.value < self.value
+
+
+def sort_key(sort: Sequence[str]) -> Callable[[RawRecord], Tuple[Any, ...]]:
+    """Key ordering raw records like ``sort`` (field names, ``-`` for descending), blanks first."""
+
+    columns = [(key.lstrip("-"), key.startswith("-")) for key in sort]
+
+    def key(record: RawRecord) -> Tuple[Any, ...]:
+        cells = record.get("fields", {})
+        parts = []
+        for name, descending in columns:
+            value = cells.get(name)
+            part = (value is not None, value)
+            parts.append(_Descending(part) if descending else part)
+        return tuple(parts)
+
+    return key
+
+
+_DONE = object()
+
+
+def _read_partition(
+    backend: StorageBackend,
+    table: str,
+    index: int,
+    formula: str,
+    limiter: _RateLimiter,
+    out: "queue.Queue[Tuple[int, Any]]",
+    stop: threading.Event,
+    kwargs: dict,
+) -> None:
+    def put(item: Any) -> bool:
+        while not stop.is_set():
+            try:
+                out.put((index, item), timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    try:
+        pages = backend.iterate(table, formula=formula, **kwargs)
+        while True:
+            limiter.wait()
+            page = next(pages, None)
+            if page is None:
+                put(_DONE)
+                return
+            if not put(page):
+                return  # the reader went away
+    except BaseException as error:  # handed to the reader, which re-raises it
+        put(error)
+
+
+def _drain(out: "queue.Queue[Tuple[int, Any]]", streams: int) -> Iterator[Tuple[int, RawRecord]]:
+    """Yield ``(partition index, record)`` from ``out`` until ``streams`` partitions are done."""
+
+    while streams:
+        index, page = out.get()
+        if page is _DONE:
+            streams -= 1
+        elif isinstance(page, BaseException):
+            raise page
+        else:
+            for record in page:
+                yield index, record
+
+
+def fetch_partitioned(
+    backend: StorageBackend,
+    table: str,
+    partitions: Sequence[Partition],
+    *,
+    formula: Optional[str] = None,
+    sort: Optional[Sequence[str]] = None,
+    **kwargs: Any,
+) -> Iterator[RawRecord]:
+    """Yield ``table`` as the union of ``partitions``, fetched concurrently.
+
+    ``formula`` further restricts every partition and ``sort`` is applied to
+    each partition and kept by the merge; other ``kwargs`` go to
+    :meth:`StorageBackend.iterate`. Raises :class:`IncompleteReadError` as
+    soon as a record breaks the completeness checks.
+    """
+
+    limiter = _RateLimiter(REQUESTS_PER_SECOND)
+    stop = threading.Event()
+    if sort:
+        kwargs["sort"] = list(sort)
+        queues = [queue.Queue(QUEUE_PAGES) for _ in partitions]
+    else:
+        # Unsorted reads share one queue so that no partition waits for another.
+        queues = [queue.Queue(QUEUE_PAGES * len(partitions))] * len(partitions)
+    for index, ((partition_formula, _), out) in enumerate(zip(partitions, queues)):
+        combined = partition_formula if not formula else f"AND({formula}, {partition_formula})"
+        threading.Thread(
+            target=_read_partition,
+            args=(backend, table, index, combined, limiter, out, stop, kwargs),
+            name=f"partition-{index}",
+            daemon=True,
+        ).start()
+
+    if sort:
+        key = sort_key(sort)
+        records = heapq.merge(*(_drain(out, 1) for out in queues), key=lambda item: key(item[1]))
+    else:
+        records = _drain(queues[0], len(partitions))
+
+    seen: Set[str] = set()  # ids only: a small fraction of the records' size
+    try:
+        for index, record in records:
+            partition_formula, inside = partitions[index]
+            if not inside(record):
+                raise IncompleteReadError(f"{table}: {record['id']} fora da partição {partition_formula}")
+            if record["id"] in seen:
+                raise IncompleteReadError(f"{table}: {record['id']} devolvido por mais de uma partição")
+            seen.add(record["id"])
+            yield record
+    finally:
+        stop.set()
@@ -0,0 +1,57 @@
+"""Retry-safe settlement of pending orders.
+
+Every order has at most one Recebimento: its idempotency key is derived from
+the order id, so retries and concurrent operators all write under the same
+key. Airtable has no conditional writes, so the order is re-read before
+settling and, should two Recebimentos still be created at the same moment,
+the oldest one wins and the other writer deletes its own copy.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Optional
+
+from .airtable_client import create_idempotent, delete_record, find_by_key, get_record, update_record
+from .models import Pedido, as_float
+
+
+@dataclass
+class Settlement:
+    registado: bool
+    recebimento_id: Optional[str] = None
+    motivo: str = ""
+    #: Value stored on the Recebimento; the event totals must use it, not the page's copy.
+    valor: float = 0.0
+
+
+def recebimento_key(pedido_id: str) -> str:
+    return f"recebimento:{pedido_id}"
+
+
+def settle_if_unpaid(pedido: Pedido, evento_id: str) -> Settlement:
+    """Register the payment of ``pedido`` unless it is already paid.
+
+    ``registado`` is True only for the call that actually flipped ``Pago``,
+    which is the one that should update the event totals with ``valor``.
+    """
+
+    atual = get_record("Pedidos", pedido.id)
+    if atual.pago:
+        return Settlement(False, motivo="O pedido já se encontra pago.")
+
+    key = recebimento_key(pedido.id)
+    recebimento, criado = create_idempotent(
+        "Recebimentos",
+        {"Pedido": [pedido.id], "Evento": [evento_id], "Valor": atual.valor},
+        key,
+    )
+    vencedor = next(iter(find_by_key("Recebimentos", key)), recebimento)
+    if vencedor["id"] != recebimento["id"]:
+        if criado:
+            delete_record("Recebimentos", recebimento["id"])
+        return Settlement(False, vencedor["id"], "O pagamento foi registado por outro operador.")
+
+    if update_record("Pedidos", pedido.id, {"Pago": True}, current=atual) is None:
+        return Settlement(False, recebimento["id"], "O pedido já se encontra pago.")
+    valor = as_float(recebimento.get("fields", {}).get("Valor", atual.valor))
+    return Settlement(True, recebimento["id"], valor=valor)
@@ -0,0 +1,124 @@
+"""Ementa × tipo de cliente price matrix of an event.
+
+The matrix has one row per ementa and one column per tipo de cliente, with
+``NaN`` where no Preços record exists (orders for that combination are
+blocked). :func:`plan_price_changes` compares an edited matrix with the
+original one and :func:`save_price_changes` writes only the changed cells,
+using batched creates, updates and deletes (10 records per request).
+"""
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Tuple
+
+import pandas as pd
+
+from .airtable_client import batch_create, batch_delete, batch_update
+from .models import Ementa, Preco, TipoCliente
+
+PRICE_TABLE = Preco.TABLE
+NAME_COLUMN = "Ementa"
+
+Cell = Tuple[str, str]
+
+
+@dataclass
+class PriceChanges:
+    creates: List[Dict[str, Any]] = field(default_factory=list)
+    updates: List[Tuple[str, Dict[str, Any]]] = field(default_factory=list)
+    deletes: List[str] = field(default_factory=list)
+    shared: List[Cell] = field(default_factory=list)
+
+    def __bool__(self) -> bool:
+        return bool(self.creates or self.updates or self.deletes)
+
+    @property
+    def requests(self) -> int:
+        return sum(math.ceil(len(batch) / 10) for batch in (self.creates, self.updates, self.deletes))
+
+
+def price_cells(precos: Iterable[Preco], evento_id: str) -> Dict[Cell, Preco]:
+    """Index the event's Preços records by (ementa id, tipo id); the first match wins, as in orders."""
+
+    cells: Dict[Cell, Preco] = {}
+    for preco in precos:
+        if not preco.in_event(evento_id):
+            continue
+        for ementa_id in preco.ementas:
+            for tipo_id in preco.tipos:
+                cells.setdefault((ementa_id, tipo_id), preco)
+    return cells
+
+
+def price_matrix(ementas: Iterable[Ementa], tipos: Iterable[TipoCliente], cells: Dict[Cell, Preco]) -> pd.DataFrame:
+    """Rows indexed by ementa id, a ``Ementa`` name column and one column per tipo id."""
+
+    ementas = list(ementas)
+    tipos = list(tipos)
+    data: Dict[str, List[Any]] = {NAME_COLUMN: [ementa.nome or ementa.id for ementa in ementas]}
+    for tipo in tipos:
+        data[tipo.id] = [
+            cells[(ementa.id, tipo.id)].valor if (ementa.id, tipo.id) in cells else math.nan for ementa in ementas
+        ]
+    return pd.DataFrame(data, index=[ementa.id for ementa in ementas])
+
+
+def missing_cells(matrix: pd.DataFrame) -> List[Cell]:
+    prices = matrix.drop(columns=[NAME_COLUMN])
+    return [
+        (ementa_id, tipo_id)
+        for ementa_id, row in prices.iterrows()
+        for tipo_id, value in row.items()
+        if pd.isna(value)
+    ]
+
+
+def plan_price_changes(
+    original: pd.DataFrame,
+    edited: pd.DataFrame,
+    cells: Dict[Cell, Preco],
+    evento_id: str,
+) -> PriceChanges:
+    """Turn the cells that differ between ``original`` and ``edited`` into Airtable writes.
+
+    A new value on an empty cell creates a Preços record, a changed value
+    updates the record and a cleared cell deletes it. Cells backed by a record
+    linking several ementas, tipos or eventos are left alone and listed in ``shared``,
+    since writing them would also reprice the other combinations.
+    """
+
+    changes = PriceChanges()
+    price_field = Preco.field_name("valor")  # the spelling used by this base, see data.schema
+    for ementa_id in original.index:
+        for tipo_id in original.columns.drop(NAME_COLUMN):
+            before = original.at[ementa_id, tipo_id]
+            after = edited.at[ementa_id, tipo_id]
+            if (pd.isna(before) and pd.isna(after)) or before == after:
+                continue
+            preco = cells.get((ementa_id, tipo_id))
+            if preco is not None and max(len(preco.ementas), len(preco.tipos), len(preco.eventos)) > 1:
+                changes.shared.append((ementa_id, tipo_id))
+            elif pd.isna(after):
+                changes.deletes.append(preco.id)
+            elif preco is None:
+                changes.creates.append(
+                    {
+                        "Ementa": [ementa_id],
+                        "TipoCliente": [tipo_id],
+                        "Evento": [evento_id],
+                        price_field: float(after),
+                    }
+                )
+            else:
+                changes.updates.append((preco.id, {price_field: float(after)}))
+    return changes
+
+
+def save_price_changes(changes: PriceChanges) -> None:
+    if changes.creates:
+        batch_create(PRICE_TABLE, changes.creates)
+    if changes.updates:
+        batch_update(PRICE_TABLE, changes.updates)
+    if changes.deletes:
+        batch_delete(PRICE_TABLE, changes.deletes)
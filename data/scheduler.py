@@ -0,0 +1,339 @@
+"""In-process scheduler for background sync and maintenance jobs.
+
+Refreshing reference tables, pulling webhook payloads, reconciling event
+summaries and pruning caches run here on worker threads instead of inside a
+user's rerun. Each job runs every ``interval`` seconds with a random jitter so
+jobs do not line up, never overlaps with its own previous run and is flagged
+once it exceeds its ``timeout`` (Python threads cannot be killed, so the run
+keeps going and the next one is skipped until it finishes).
+
+The scheduler starts once per process from :func:`start_scheduler` (called by
+every page through :mod:`utils.bootstrap`) and is
+configured in ``st.secrets["scheduler"]`` (or ``SCHEDULER_ENABLED=0``)::
+
+    [scheduler]
+    enabled = true
+
+    [scheduler.intervals]      # optional, seconds per job
+    resumos = 300
+"""
+from __future__ import annotations
+
+import logging
+import os
+import random
+import threading
+import time
+from collections.abc import Mapping
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import pandas as pd
+import streamlit as st
+
+from .airtable_client import prune_recent_writes
+from .cache_utils import CACHE_TTL, get_cached_data, patched_tables, refresh_table
+from .event_summary import RECONCILE_INTERVAL, get_summary, reconcile
+from .webhooks import REFRESH_INTERVAL, start_webhook_listener, webhook_poll_seconds
+
+REFERENCE_TABLES = ("Eventos", "Ementas", "Tipos de Cliente", "Preços")
+TICK_SECONDS = 1.0
+JITTER = 0.1
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Job:
+    name: str
+    func: Callable[[], Optional[str]]
+    interval: float
+    timeout: float
+    description: str = ""
+
+
+@dataclass
+class JobStatus:
+    runs: int = 0
+    failures: int = 0
+    timeouts: int = 0
+    skipped: int = 0
+    total_ms: float = 0.0
+    last_ms: float = 0.0
+    max_ms: float = 0.0
+    last_started: Optional[datetime] = None
+    last_result: Optional[str] = None
+    last_error: Optional[str] = None
+    next_run: Optional[datetime] = None
+    running_since: Optional[float] = field(default=None, repr=False)
+    overdue: bool = False
+
+    @property
+    def running(self) -> bool:
+        return self.running_since is not None
+
+    @property
+    def mean_ms(self) -> float:
+        return self.total_ms / self.runs if self.runs else 0.0
+
+
+class Scheduler:
+    """Runs :class:`Job` objects periodically on daemon threads."""
+
+    def __init__(self, jobs: Iterable[Job], jitter: float = JITTER) -> None:
+        self._jobs: Dict[str, Job] = {job.name: job for job in jobs}
+        self._jitter = jitter
+        self._status: Dict[str, JobStatus] = {name: JobStatus() for name in self._jobs}
+        self._due: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def jobs(self) -> List[Job]:
+        return list(self._jobs.values())
+
+    def _delay(self, job: Job) -> float:
+        return job.interval * (1 + random.uniform(-self._jitter, self._jitter))
+
+    def _set_due(self, name: str, due: float, now: float) -> None:
+        self._due[name] = due
+        self._status[name].next_run = datetime.now(timezone.utc) + timedelta(seconds=max(0.0, due - now))
+
+    def start(self) -> None:
+        now = time.monotonic()
+        with self._lock:
+            for job in self._jobs.values():
+                # Spread the first runs over the jitter window instead of starting all at once.
+                self._set_due(job.name, now + random.uniform(0, job.interval * self._jitter), now)
+        self._thread = threading.Thread(target=self._loop, name="scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wakeup.set()
+
+    def run_now(self, name: str) -> None:
+        with self._lock:
+            self._set_due(name, 0.0, time.monotonic())
+        self._wakeup.set()
+
+    def statuses(self) -> Dict[str, JobStatus]:
+        with self._lock:
+            return {name: JobStatus(**vars(status)) for name, status in self._status.items()}
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            now = time.monotonic()
+            with self._lock:
+                for job in self._jobs.values():
+                    self._check_timeout(job, now)
+                    if self._due[job.name] <= now:
+                        self._set_due(job.name, now + self._delay(job), now)
+                        self._dispatch(job, now)
+                wait = min(self._due.values(), default=now + TICK_SECONDS) - now
+            self._wakeup.wait(min(max(wait, 0.0), TICK_SECONDS))
+            self._wakeup.clear()
+
+    def _check_timeout(self, job: Job, now: float) -> None:
+        status = self._status[job.name]
+        if status.running_since is not None and not status.overdue and now - status.running_since > job.timeout:
+            status.overdue = True
+            status.timeouts += 1
+            status.last_error = f"Excedeu {job.timeout:.0f} s"
+            logger.warning("Tarefa %s excedeu %.0f s", job.name, job.timeout)
+
+    def _dispatch(self, job: Job, now: float) -> None:
+        status = self._status[job.name]
+        if status.running_since is not None:
+            status.skipped += 1
+            return
+        status.running_since = now
+        status.overdue = False
+        status.last_started = datetime.now(timezone.utc)
+        threading.Thread(target=self._run, args=(job,), name=f"tarefa-{job.name}", daemon=True).start()
+
+    def _run(self, job: Job) -> None:
+        start = time.perf_counter()
+        result: Optional[str] = None
+        error: Optional[str] = None
+        try:
+            result = job.func()
+        except Exception as exc:  # pragma: no cover - keep the scheduler alive
+            logger.exception("Falha na tarefa %s", job.name)
+            error = f"{type(exc).__name__}: {exc}"
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        with self._lock:
+            status = self._status[job.name]
+            status.runs += 1
+            status.total_ms += elapsed_ms
+            status.last_ms = elapsed_ms
+            status.max_ms = max(status.max_ms, elapsed_ms)
+            status.last_result = result
+            if error is not None:
+                status.failures += 1
+                status.last_error = error
+            elif not status.overdue:
+                status.last_error = None
+            status.running_since = None
+
+
+def status_frame(scheduler: Scheduler) -> pd.DataFrame:
+    statuses = scheduler.statuses()
+    linhas: List[Dict[str, Any]] = []
+    for job in scheduler.jobs:
+        status = statuses[job.name]
+        linhas.append(
+            {
+                "Tarefa": job.name,
+                "Estado": "a correr" if status.running else ("erro" if status.last_error else "ok"),
+                "Intervalo (s)": round(job.interval),
+                "Execuções": status.runs,
+                "Falhas": status.failures,
+                "Excedidas": status.timeouts,
+                "Saltadas": status.skipped,
+                "Média (ms)": round(status.mean_ms, 1),
+                "Última (ms)": round(status.last_ms, 1),
+                "Máximo (ms)": round(status.max_ms, 1),
+                "Última execução": status.last_started,
+                "Próxima execução": status.next_run,
+                "Resultado": status.last_error or status.last_result,
+            }
+        )
+    return pd.DataFrame(linhas)
+
+
+def refresh_reference_tables() -> str:
+    for table in REFERENCE_TABLES:
+        refresh_table(table)
+    return f"{len(REFERENCE_TABLES)} tabelas recarregadas"
+
+
+def reconcile_active_summaries(horizon: timedelta = timedelta(0)) -> str:
+    """Reconcile summaries of active events that are stale, or will be within ``horizon``."""
+
+    limite = datetime.now(timezone.utc) + horizon
+    reconciliados = 0
+    for evento in get_cached_data("Eventos"):
+        if not evento.ativo:
+            continue
+        summary = get_summary(evento.id)
+        if summary is None or summary.is_stale(limite):
+            reconcile(evento.id)
+            reconciliados += 1
+    return f"{reconciliados} resumo(s) recalculado(s)"
+
+
+def prune_caches() -> str:
+    removidas = prune_recent_writes()
+    tabelas = patched_tables()
+    # Folding the overlay into a fresh read keeps get_cached_data from merging it on every call.
+    for table in tabelas:
+        refresh_table(table)
+    return f"{removidas} escrita(s) recentes expiradas, {len(tabelas)} tabela(s) compactada(s)"
+
+
+def default_jobs() -> List[Job]:
+    summary_interval = RECONCILE_INTERVAL.total_seconds() / 2
+    jobs = [
+        Job(
+            "tabelas_referencia",
+            refresh_reference_tables,
+            interval=CACHE_TTL * 0.8,
+            timeout=120,
+            description="Recarrega eventos, ementas, tipos de cliente e preços antes de expirarem da cache",
+        ),
+        Job(
+            "resumos",
+            # Runs ahead of staleness so dashboards never reconcile inline.
+            lambda: reconcile_active_summaries(timedelta(seconds=summary_interval * (1 + JITTER))),
+            interval=summary_interval,
+            timeout=240,
+            description="Recalcula os resumos dos eventos ativos",
+        ),
+        Job(
+            "limpeza_caches",
+            prune_caches,
+            interval=600,
+            timeout=120,
+            description="Remove chaves de escrita expiradas e compacta tabelas com alterações sobrepostas",
+        ),
+    ]
+    sync = start_webhook_listener()
+    if sync is not None:
+
+        def refresh_webhook() -> str:
+            expiracao = sync.refresh()
+            return f"expira em {expiracao}" if expiracao else "renovado"
+
+        jobs.append(
+            Job(
+                "renovacao_webhook",
+                refresh_webhook,
+                interval=REFRESH_INTERVAL,
+                timeout=60,
+                description="Renova o webhook do Airtable, que expira ao fim de 7 dias sem renovação",
+            )
+        )
+    poll_seconds = webhook_poll_seconds()
+    if sync is not None and poll_seconds:
+
+        def sync_webhook() -> str:
+            actions = sync.sync()
+            return "; ".join(f"{table}: {action}" for table, action in actions.items()) or "sem alterações"
+
+        jobs.append(
+            Job(
+                "sincronizacao",
+                sync_webhook,
+                interval=poll_seconds,
+                timeout=max(poll_seconds, 60),
+                description="Aplica as alterações do Airtable (pedidos e restantes tabelas) à cache",
+            )
+        )
+    return jobs
+
+
+def _scheduler_config() -> Mapping[str, Any]:
+    try:
+        config = st.secrets["scheduler"]
+    except Exception:  # pragma: no cover - runtime configuration guard
+        config = None
+    return config if isinstance(config, Mapping) else {}
+
+
+_scheduler: Optional[Scheduler] = None
+_scheduler_started = False
+_scheduler_lock = threading.Lock()
+
+
+def start_scheduler() -> Optional[Scheduler]:
+    """Start the background jobs once per process unless disabled.
+
+    Guarded by a module flag rather than ``st.cache_resource``, which the
+    "Clear caches" menu empties and would let a second scheduler start.
+    """
+
+    global _scheduler, _scheduler_started
+    with _scheduler_lock:
+        if not _scheduler_started:
+            _scheduler = _create_scheduler()
+            _scheduler_started = True
+        return _scheduler
+
+
+def _create_scheduler() -> Optional[Scheduler]:
+    config = _scheduler_config()
+    enabled = os.getenv("SCHEDULER_ENABLED")
+    if (enabled is not None and enabled.lower() in ("0", "false", "no")) or config.get("enabled") is False:
+        return None
+    intervals = config.get("intervals") or {}
+    jobs = default_jobs()
+    for job in jobs:
+        if job.name in intervals:
+            job.interval = float(intervals[job.name])
+    scheduler = Scheduler(jobs)
+    scheduler.start()
+    return scheduler
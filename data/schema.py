@@ -0,0 +1,183 @@
+"""Schema registry: the base's real field names and types, compiled into the models.
+
+The models in :mod:`data.models` declare the spellings a field may have
+(``Preço (€)``, ``Preco``, ``Preço``) and tolerant converters. The registry
+reads the base schema once, from the Airtable metadata API or, offline and
+for other backends, from the checked-in snapshot ``schema.json``, and
+compiles every model to the one field name the base uses per attribute, with
+a converter for its actual type (e.g. link fields always hold lists, number
+fields always hold numbers). Records are then normalised without probing
+alternative names or value shapes.
+
+Refresh the snapshot after changing the base::
+
+    python -m data.schema
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple, Type
+
+import requests
+
+from .models import MODELS, Converter, Record, as_float, as_int, as_link_list, as_links, as_text
+from .storage import StorageBackend, create_backend, get_backend
+
+SNAPSHOT_PATH = Path(
+    os.getenv("AIRTABLE_SCHEMA_SNAPSHOT", Path(__file__).resolve().parent.parent / "schema.json")
+)
+NUMBER_TYPES = frozenset({"number", "currency", "percent", "rating", "duration", "count", "autoNumber"})
+TEXT_TYPES = frozenset(
+    {
+        "singleLineText",
+        "multilineText",
+        "email",
+        "url",
+        "phoneNumber",
+        "singleSelect",
+        "date",
+        "dateTime",
+        "createdTime",
+        "lastModifiedTime",
+    }
+)
+# Computed by Airtable: writing them fails with 422, so copies leave them out.
+COMPUTED_TYPES = frozenset(
+    {
+        "formula",
+        "rollup",
+        "count",
+        "multipleLookupValues",
+        "autoNumber",
+        "createdTime",
+        "lastModifiedTime",
+        "createdBy",
+        "lastModifiedBy",
+        "button",
+    }
+)
+
+logger = logging.getLogger(__name__)
+
+
+def _same(value: Any) -> Any:
+    return value
+
+
+# Declared converter → (field types whose cells already have the right shape, converter for them).
+# Formula, rollup and lookup fields can hold errors or arrays and keep the tolerant converter.
+_TYPED_CONVERTERS: Dict[Converter, Tuple[frozenset, Converter]] = {
+    as_links: (frozenset({"multipleRecordLinks"}), as_link_list),
+    as_float: (NUMBER_TYPES, float),
+    as_int: (NUMBER_TYPES, int),
+    as_text: (TEXT_TYPES, _same),
+}
+
+
+def compile_converter(declared: Converter, field_type: str) -> Converter:
+    types, converter = _TYPED_CONVERTERS.get(declared, (frozenset(), declared))
+    return converter if field_type in types else declared
+
+
+class SchemaRegistry:
+    """Field types per table, as ``{table: {field: type}}``."""
+
+    def __init__(self, tables: Iterable[Mapping[str, Any]], source: str) -> None:
+        self.source = source
+        self.tables: Dict[str, Dict[str, str]] = {
+            table["name"]: {field["name"]: field.get("type", "") for field in table.get("fields", [])}
+            for table in tables
+        }
+
+    def field_type(self, table: str, field: str) -> Optional[str]:
+        return self.tables.get(table, {}).get(field)
+
+    def writable(self, table: str, fields: Mapping[str, Any]) -> Dict[str, Any]:
+        """``fields`` without the cells ``table`` computes itself."""
+        return {name: value for name, value in fields.items() if self.field_type(table, name) not in COMPUTED_TYPES}
+
+    def resolve(self, model: Type[Record]) -> Dict[str, Tuple[str, Converter]]:
+        """Map each attribute of ``model`` to its field in the base, preferring earlier aliases."""
+
+        fields = self.tables.get(model.TABLE, {})
+        resolved: Dict[str, Tuple[str, Converter]] = {}
+        for name, attribute, converter in model.FIELDS:
+            if attribute not in resolved and name in fields:
+                resolved[attribute] = (name, compile_converter(converter, fields[name]))
+        return resolved
+
+    def missing(self, model: Type[Record]) -> List[str]:
+        """Attributes of ``model`` for which the base has none of the declared fields."""
+
+        resolved = self.resolve(model)
+        return [attribute for attribute in model.DEFAULTS if attribute not in resolved]
+
+    def compile(self, models: Iterable[Type[Record]] = MODELS.values()) -> None:
+        for model in models:
+            resolved = self.resolve(model)
+            model.compile(resolved)
+            missing = [attribute for attribute in model.DEFAULTS if attribute not in resolved]
+            if model.TABLE in self.tables and missing:
+                logger.warning("Campos em falta em %s: %s", model.TABLE, ", ".join(missing))
+
+
+def load_schema(backend: Optional[StorageBackend] = None) -> SchemaRegistry:
+    """Read the schema from ``backend``'s metadata API, else from the snapshot, else empty."""
+
+    backend = backend or get_backend()
+    try:
+        tables = backend.base_schema()
+    except requests.RequestException:
+        logger.warning("Esquema do Airtable indisponível; a usar %s", SNAPSHOT_PATH, exc_info=True)
+        tables = None
+    if tables is not None:
+        return SchemaRegistry(tables, "api")
+    if SNAPSHOT_PATH.exists():
+        snapshot = json.loads(SNAPSHOT_PATH.read_text(encoding="utf-8"))
+        return SchemaRegistry(snapshot.get("tables", []), "snapshot")
+    return SchemaRegistry([], "none")
+
+
+_registry: Optional[SchemaRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_schema_registry() -> SchemaRegistry:
+    """Load the schema once per process and compile every model against it."""
+
+    global _registry
+    if _registry is not None:
+        return _registry
+    with _registry_lock:
+        if _registry is None:
+            registry = load_schema()
+            registry.compile()
+            _registry = registry
+        return _registry
+
+
+def write_snapshot(tables: List[Dict[str, Any]], path: Path = SNAPSHOT_PATH) -> None:
+    # Only names and types are kept: ids and options change without affecting the app.
+    slim = [
+        {"name": table["name"], "fields": [{"name": f["name"], "type": f.get("type", "")} for f in table.get("fields", [])]}
+        for table in tables
+    ]
+    path.write_text(json.dumps({"tables": slim}, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+
+
+def main() -> None:
+    tables = create_backend("airtable").base_schema() or []
+    write_snapshot(tables)
+    registry = SchemaRegistry(tables, "api")
+    for model in MODELS.values():
+        missing = registry.missing(model)
+        print(f"{model.TABLE}: {', '.join(missing) if missing else 'ok'}")
+    print(f"Esquema guardado em {SNAPSHOT_PATH}")
+
+
+if __name__ == "__main__":
+    main()
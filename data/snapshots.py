@@ -0,0 +1,139 @@
+"""Columnar on-disk snapshots of closed events.
+
+A snapshot freezes an event's Pedidos, Recebimentos and Sangria de Caixa,
+with ementa and tipo names already resolved, into uncompressed Arrow IPC
+files under ``snapshots/<evento_id>/``. Loading memory-maps those files, so
+historical events open in milliseconds without touching Airtable.
+
+Usage from the command line::
+
+    python -m data.snapshots <evento_id> [<evento_id> ...]
+"""
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import sys
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import pyarrow as pa
+
+from .export import TABLES, arrow_schema, iter_batches, iter_event_rows, load_lookups
+
+SNAPSHOT_DIR = Path(os.getenv("EVENT_SNAPSHOT_DIR", Path(__file__).resolve().parent.parent / "snapshots"))
+_METADATA_FILE = "snapshot.json"
+
+
+@dataclass
+class EventSnapshot:
+    event_id: str
+    pedidos: pa.Table
+    recebimentos: pa.Table
+    sangrias: pa.Table
+    criado_em: Optional[str] = None
+
+
+def _event_dir(event_id: str) -> Path:
+    if not event_id or not event_id.isalnum():
+        raise ValueError(f"ID de evento inválido: {event_id!r}")
+    return SNAPSHOT_DIR / event_id
+
+
+def has_snapshot(event_id: str) -> bool:
+    try:
+        return (_event_dir(event_id) / _METADATA_FILE).exists()
+    except ValueError:
+        return False
+
+
+def snapshot_version(event_id: str) -> Optional[str]:
+    """Creation time of the snapshot of ``event_id``, which changes when it is re-created."""
+
+    if not has_snapshot(event_id):
+        return None
+    metadata = json.loads((_event_dir(event_id) / _METADATA_FILE).read_text())
+    return metadata.get("criado_em")
+
+
+def create_snapshot(event_id: str) -> Dict[str, int]:
+    """Stream the event tables from Airtable into Arrow files; return rows per table.
+
+    Files are written to a temporary directory and swapped in at the end, so
+    readers never see a partial snapshot.
+    """
+
+    target = _event_dir(event_id)
+    staging = target.with_name(f".{event_id}.tmp")
+    shutil.rmtree(staging, ignore_errors=True)
+    staging.mkdir(parents=True)
+
+    lookups = load_lookups()
+    rows: Dict[str, int] = {}
+    for spec in TABLES:
+        schema = arrow_schema(spec)
+        count = 0
+        with pa.OSFile(str(staging / f"{spec.filename}.arrow"), "wb") as sink:
+            with pa.ipc.new_file(sink, schema) as writer:
+                for batch in iter_batches(iter_event_rows(spec, event_id, lookups), schema):
+                    writer.write_table(batch)
+                    count += batch.num_rows
+        rows[spec.table] = count
+
+    metadata = {
+        "evento_id": event_id,
+        "criado_em": datetime.now(timezone.utc).isoformat(),
+        "linhas": rows,
+    }
+    (staging / _METADATA_FILE).write_text(json.dumps(metadata, ensure_ascii=False, indent=2))
+
+    shutil.rmtree(target, ignore_errors=True)
+    staging.rename(target)
+    _open_table.cache_clear()
+    return rows
+
+
+@lru_cache(maxsize=64)
+def _open_table(path: str, mtime: float) -> pa.Table:
+    # Zero-copy: the table's buffers point straight into the memory map.
+    return pa.ipc.open_file(pa.memory_map(path, "r")).read_all()
+
+
+def _load_table(directory: Path, filename: str) -> pa.Table:
+    path = directory / f"{filename}.arrow"
+    return _open_table(str(path), path.stat().st_mtime)
+
+
+def load_snapshot(event_id: str) -> Optional[EventSnapshot]:
+    """Return the memory-mapped snapshot of ``event_id`` or ``None`` when absent."""
+
+    if not has_snapshot(event_id):
+        return None
+    directory = _event_dir(event_id)
+    metadata = json.loads((directory / _METADATA_FILE).read_text())
+    tables = {spec.filename: _load_table(directory, spec.filename) for spec in TABLES}
+    return EventSnapshot(
+        event_id=event_id,
+        pedidos=tables["pedidos"],
+        recebimentos=tables["recebimentos"],
+        sangrias=tables["sangrias"],
+        criado_em=metadata.get("criado_em"),
+    )
+
+
+def main(argv: List[str]) -> None:
+    if not argv:
+        print("Uso: python -m data.snapshots <evento_id> [<evento_id> ...]")
+        raise SystemExit(2)
+    for event_id in argv:
+        rows = create_snapshot(event_id)
+        resumo = ", ".join(f"{tabela}: {linhas}" for tabela, linhas in rows.items())
+        print(f"{event_id}: {resumo}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
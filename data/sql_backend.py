@@ -0,0 +1,391 @@
+"""SQLite storage backend.
+
+Records of every table live in one ``records`` table: the record id, table
+name, creation time and the fields as JSON. Linked-record ids are also
+written to ``record_links`` so event filters use an index instead of a scan,
+and expression indexes cover the ``Pago`` and ``Data`` fields. The Airtable
+formulas used by the app (comparisons, ``AND``/``OR``/``NOT``,
+``RECORD_ID()``, ``CREATED_TIME()``, ``IS_BEFORE``/``IS_AFTER``,
+``DATETIME_PARSE``, ``TRUE()``/``FALSE()``/``BLANK()``) are compiled to SQL.
+
+The SQL sticks to what PostgreSQL also offers except for ``json_extract``,
+which would become ``fields->>'name'`` on a JSONB column.
+"""
+from __future__ import annotations
+
+import json
+import re
+import secrets
+import sqlite3
+import string
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import requests
+
+from .storage import LinkFilter, RawRecord, StorageBackend
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS records (
+    id TEXT PRIMARY KEY,
+    table_name TEXT NOT NULL,
+    created_time TEXT NOT NULL,
+    fields TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS records_table_created ON records (table_name, created_time);
+CREATE INDEX IF NOT EXISTS records_table_pago ON records (table_name, json_extract(fields, '$."Pago"'));
+CREATE INDEX IF NOT EXISTS records_table_data ON records (table_name, json_extract(fields, '$."Data"'));
+CREATE TABLE IF NOT EXISTS record_links (
+    table_name TEXT NOT NULL,
+    field TEXT NOT NULL,
+    target_id TEXT NOT NULL,
+    record_id TEXT NOT NULL,
+    PRIMARY KEY (table_name, field, target_id, record_id)
+);
+CREATE INDEX IF NOT EXISTS record_links_record ON record_links (record_id);
+"""
+
+_ID_ALPHABET = string.ascii_letters + string.digits
+
+
+def new_record_id() -> str:
+    return "rec" + "".join(secrets.choice(_ID_ALPHABET) for _ in range(14))
+
+
+def _now() -> str:
+    now = datetime.now(timezone.utc)
+    return now.strftime("%Y-%m-%dT%H:%M:%S.") + f"{now.microsecond // 1000:03d}Z"
+
+
+def _is_blank(value: Any) -> bool:
+    # Mirror Airtable, which leaves empty cells out of ``fields``.
+    return value is None or value is False or value == "" or value == []
+
+
+def _not_found(table: str, record_id: str) -> requests.HTTPError:
+    # Same exception type and status as the Airtable backend, so callers handle both alike.
+    response = requests.Response()
+    response.status_code = 404
+    response.reason = "Not Found"
+    return requests.HTTPError(f"404 Client Error: {table}: registo {record_id} não encontrado", response=response)
+
+
+def _link_targets(value: Any) -> List[str]:
+    if isinstance(value, list) and value and all(isinstance(item, str) and item.startswith("rec") for item in value):
+        return value
+    return []
+
+
+# --------------------------------------------------------------------------
+# Formula compilation
+
+
+class FormulaError(ValueError):
+    pass
+
+
+_TOKEN = re.compile(
+    r"""\s*(?:
+        (?P<string>'(?:\\.|[^'\\])*'|"(?:\\.|[^"\\])*")
+      | (?P<field>\{[^}]*\})
+      | (?P<number>\d+(?:\.\d+)?)
+      | (?P<name>[A-Za-z_][A-Za-z0-9_]*)
+      | (?P<op><=|>=|!=|=|<|>|\(|\)|,)
+    )""",
+    re.VERBOSE,
+)
+
+
+def _tokenize(formula: str) -> List[Tuple[str, str]]:
+    tokens: List[Tuple[str, str]] = []
+    position = 0
+    formula = formula.strip()
+    while position < len(formula):
+        match = _TOKEN.match(formula, position)
+        if not match or match.end() == position:
+            raise FormulaError(f"Fórmula não suportada: {formula!r}")
+        kind = match.lastgroup
+        tokens.append((kind, match.group(kind)))
+        position = match.end()
+    return tokens
+
+
+def _json_path(field: str) -> str:
+    # Inlined (not a parameter) so the expression indexes can be used.
+    return "json_extract(fields, '$.\"" + field.replace("'", "''").replace('"', '\\"') + "\"')"
+
+
+# Only TRUE() and FALSE() compile to bare literals; numbers in formulas become parameters.
+_TRUE, _FALSE = "1", "0"
+_BOOLEANS = (_TRUE, _FALSE)
+
+
+def _truthy(sql: str) -> str:
+    return f"(COALESCE({sql}, 0) NOT IN (0, ''))"
+
+
+class _FormulaCompiler:
+    """Recursive-descent translation of an Airtable formula into a SQL condition."""
+
+    def __init__(self, formula: str) -> None:
+        self._formula = formula
+        self._tokens = _tokenize(formula)
+        self._position = 0
+        self.params: List[Any] = []
+
+    def compile(self) -> str:
+        sql = self._comparison()
+        if self._position != len(self._tokens):
+            raise FormulaError(f"Fórmula não suportada: {self._formula!r}")
+        return _truthy(sql)
+
+    def _peek(self) -> Optional[Tuple[str, str]]:
+        return self._tokens[self._position] if self._position < len(self._tokens) else None
+
+    def _take(self, value: Optional[str] = None) -> Tuple[str, str]:
+        token = self._peek()
+        if token is None or (value is not None and token[1] != value):
+            raise FormulaError(f"Fórmula não suportada: {self._formula!r}")
+        self._position += 1
+        return token
+
+    def _comparison(self) -> str:
+        left = self._primary()
+        token = self._peek()
+        if token and token[0] == "op" and token[1] in ("=", "!=", "<", ">", "<=", ">="):
+            self._take()
+            right = self._primary()
+            operator = "<>" if token[1] == "!=" else token[1]
+            # Airtable treats a blank or absent checkbox as FALSE() in comparisons.
+            if left in _BOOLEANS:
+                right = f"COALESCE({right}, 0)"
+            elif right in _BOOLEANS:
+                left = f"COALESCE({left}, 0)"
+            return f"({left} {operator} {right})"
+        return left
+
+    def _primary(self) -> str:
+        kind, value = self._take()
+        if kind == "string":
+            self.params.append(re.sub(r"\\(.)", r"\1", value[1:-1]))
+            return "?"
+        if kind == "number":
+            self.params.append(float(value) if "." in value else int(value))
+            return "?"
+        if kind == "field":
+            return _json_path(value[1:-1])
+        if kind == "op" and value == "(":
+            sql = self._comparison()
+            self._take(")")
+            return sql
+        if kind == "name":
+            return self._call(value.upper())
+        raise FormulaError(f"Fórmula não suportada: {self._formula!r}")
+
+    def _arguments(self) -> List[str]:
+        self._take("(")
+        args: List[str] = []
+        if self._peek() != ("op", ")"):
+            args.append(self._comparison())
+            while self._peek() == ("op", ","):
+                self._take()
+                args.append(self._comparison())
+        self._take(")")
+        return args
+
+    def _call(self, name: str) -> str:
+        args = self._arguments()
+        if name in ("AND", "OR") and args:
+            return "(" + f" {name} ".join(_truthy(arg) for arg in args) + ")"
+        if name == "NOT" and len(args) == 1:
+            return f"(NOT {_truthy(args[0])})"
+        if name == "TRUE" and not args:
+            return _TRUE
+        if name == "FALSE" and not args:
+            return _FALSE
+        if name == "BLANK" and not args:
+            return "NULL"
+        if name == "RECORD_ID" and not args:
+            return "id"
+        if name == "CREATED_TIME" and not args:
+            return "created_time"
+        if name == "DATETIME_PARSE" and len(args) == 1:
+            return args[0]
+        if name == "IS_BEFORE" and len(args) == 2:
+            return f"({args[0]} < {args[1]})"
+        if name == "IS_AFTER" and len(args) == 2:
+            return f"({args[0]} > {args[1]})"
+        raise FormulaError(f"Função {name} não suportada pelo backend SQLite.")
+
+
+def compile_formula(formula: str) -> Tuple[str, List[Any]]:
+    """Return ``(sql_condition, params)`` for an Airtable ``formula``."""
+
+    compiler = _FormulaCompiler(formula)
+    return compiler.compile(), compiler.params
+
+
+# --------------------------------------------------------------------------
+# Backend
+
+
+class SQLiteBackend(StorageBackend):
+    name = "sqlite"
+    preserves_ids = True
+
+    def __init__(self, path: str) -> None:
+        self._path = path
+        self._local = threading.local()
+        with self._connection() as connection:
+            connection.executescript(SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self._path)
+            connection.execute("PRAGMA journal_mode=WAL")
+            self._local.connection = connection
+        return connection
+
+    @staticmethod
+    def _row(row: Tuple[str, str, str], fields: Optional[Sequence[str]] = None) -> RawRecord:
+        record_id, created_time, data = row
+        values = json.loads(data)
+        if fields:
+            values = {name: values[name] for name in fields if name in values}
+        return {"id": record_id, "createdTime": created_time, "fields": values}
+
+    def iterate(
+        self,
+        table: str,
+        *,
+        page_size: int = 100,
+        fields: Optional[Sequence[str]] = None,
+        formula: Optional[str] = None,
+        sort: Optional[Sequence[str]] = None,
+        max_records: Optional[int] = None,
+        links: Optional[LinkFilter] = None,
+        **kwargs: Any,
+    ) -> Iterator[List[RawRecord]]:
+        if links:
+            # Start from the link index; the planner would otherwise scan the table.
+            sql = (
+                "SELECT id, created_time, fields FROM record_links"
+                " JOIN records ON records.id = record_links.record_id"
+                " WHERE record_links.table_name = ? AND record_links.field = ? AND record_links.target_id = ?"
+            )
+            params: List[Any] = [table, *links]
+        else:
+            sql = "SELECT id, created_time, fields FROM records WHERE table_name = ?"
+            params = [table]
+        if formula:
+            condition, formula_params = compile_formula(formula)
+            sql += f" AND {condition}"
+            params.extend(formula_params)
+        order = []
+        for key in sort or ():
+            descending = key.startswith("-")
+            order.append(f"{_json_path(key.lstrip('-'))} {'DESC' if descending else 'ASC'}")
+        sql += " ORDER BY " + ", ".join([*order, "created_time", "id"])
+        if max_records:
+            sql += " LIMIT ?"
+            params.append(int(max_records))
+
+        cursor = self._connection().execute(sql, params)
+        while True:
+            rows = cursor.fetchmany(page_size)
+            if not rows:
+                return
+            yield [self._row(row, fields) for row in rows]
+
+    def get(self, table: str, record_id: str) -> RawRecord:
+        row = self._connection().execute(
+            "SELECT id, created_time, fields FROM records WHERE table_name = ? AND id = ?", (table, record_id)
+        ).fetchone()
+        if row is None:
+            raise _not_found(table, record_id)
+        return self._row(row)
+
+    def _write_links(self, connection: sqlite3.Connection, table: str, record_id: str, fields: Dict[str, Any]) -> None:
+        connection.execute("DELETE FROM record_links WHERE record_id = ?", (record_id,))
+        connection.executemany(
+            "INSERT OR IGNORE INTO record_links (table_name, field, target_id, record_id) VALUES (?, ?, ?, ?)",
+            [(table, name, target, record_id) for name, value in fields.items() for target in _link_targets(value)],
+        )
+
+    def _insert(self, connection: sqlite3.Connection, table: str, records: List[RawRecord]) -> None:
+        connection.executemany(
+            "INSERT OR REPLACE INTO records (id, table_name, created_time, fields) VALUES (?, ?, ?, ?)",
+            [
+                (record["id"], table, record["createdTime"], json.dumps(record["fields"], ensure_ascii=False))
+                for record in records
+            ],
+        )
+        for record in records:
+            self._write_links(connection, table, record["id"], record["fields"])
+
+    def batch_create(self, table: str, records: List[Dict[str, Any]]) -> List[RawRecord]:
+        created = [
+            {
+                "id": new_record_id(),
+                "createdTime": _now(),
+                "fields": {name: value for name, value in fields.items() if not _is_blank(value)},
+            }
+            for fields in records
+        ]
+        connection = self._connection()
+        with connection:
+            self._insert(connection, table, created)
+        return created
+
+    def create(self, table: str, fields: Dict[str, Any]) -> RawRecord:
+        return self.batch_create(table, [fields])[0]
+
+    def batch_update(self, table: str, updates: List[Tuple[str, Dict[str, Any]]]) -> List[RawRecord]:
+        connection = self._connection()
+        updated: List[RawRecord] = []
+        with connection:
+            for record_id, changes in updates:
+                record = self.get(table, record_id)
+                fields = record["fields"]
+                for name, value in changes.items():
+                    if _is_blank(value):
+                        fields.pop(name, None)
+                    else:
+                        fields[name] = value
+                connection.execute(
+                    "UPDATE records SET fields = ? WHERE id = ?", (json.dumps(fields, ensure_ascii=False), record_id)
+                )
+                self._write_links(connection, table, record_id, fields)
+                updated.append(record)
+        return updated
+
+    def update(self, table: str, record_id: str, fields: Dict[str, Any]) -> RawRecord:
+        return self.batch_update(table, [(record_id, fields)])[0]
+
+    def batch_delete(self, table: str, record_ids: List[str]) -> List[Dict[str, Any]]:
+        connection = self._connection()
+        with connection:
+            connection.executemany(
+                "DELETE FROM records WHERE table_name = ? AND id = ?", [(table, record_id) for record_id in record_ids]
+            )
+            connection.executemany("DELETE FROM record_links WHERE record_id = ?", [(rid,) for rid in record_ids])
+        return [{"id": record_id, "deleted": True} for record_id in record_ids]
+
+    def delete(self, table: str, record_id: str) -> Dict[str, Any]:
+        return self.batch_delete(table, [record_id])[0]
+
+    def import_records(self, table: str, records: List[RawRecord]) -> Dict[str, str]:
+        rows = [
+            {
+                "id": record["id"],
+                "createdTime": record.get("createdTime") or _now(),
+                "fields": {name: value for name, value in record.get("fields", {}).items() if not _is_blank(value)},
+            }
+            for record in records
+        ]
+        connection = self._connection()
+        with connection:
+            self._insert(connection, table, rows)
+        return {record["id"]: record["id"] for record in rows}
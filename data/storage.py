@@ -0,0 +1,177 @@
+"""Storage backends behind :mod:`data.airtable_client`.
+
+A backend stores records in Airtable's shape (``{"id", "createdTime",
+"fields"}``) and understands the subset of Airtable formulas the app uses,
+so normalisation, caching and every page stay the same whichever backend is
+configured. The backend is chosen in ``st.secrets["storage"]`` (or the
+``STORAGE_BACKEND`` / ``STORAGE_SQLITE_PATH`` environment variables)::
+
+    [storage]
+    backend = "sqlite"      # "airtable" (default) or "sqlite"
+    path = "dados.db"
+"""
+from __future__ import annotations
+
+import os
+from collections.abc import Mapping
+from functools import lru_cache
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import requests
+import streamlit as st
+from pyairtable import Table
+
+META_API_URL = "https://api.airtable.com/v0/meta"
+
+RawRecord = Dict[str, Any]
+LinkFilter = Tuple[str, str]
+
+
+class StorageBackend:
+    """Operations every backend provides; records are raw Airtable-shaped dicts."""
+
+    name = "base"
+    #: Whether :meth:`import_records` keeps the source record ids.
+    preserves_ids = False
+
+    def iterate(
+        self,
+        table: str,
+        *,
+        page_size: int = 100,
+        fields: Optional[Sequence[str]] = None,
+        formula: Optional[str] = None,
+        sort: Optional[Sequence[str]] = None,
+        max_records: Optional[int] = None,
+        links: Optional[LinkFilter] = None,
+        **kwargs: Any,
+    ) -> Iterator[List[RawRecord]]:
+        """Yield pages of records. ``links`` is a ``(field, record_id)`` hint a backend may index on."""
+        raise NotImplementedError
+
+    def all(self, table: str, **kwargs: Any) -> List[RawRecord]:
+        return [record for page in self.iterate(table, **kwargs) for record in page]
+
+    def first(self, table: str, formula: Optional[str] = None) -> Optional[RawRecord]:
+        records = self.all(table, formula=formula, max_records=1)
+        return records[0] if records else None
+
+    def get(self, table: str, record_id: str) -> RawRecord:
+        raise NotImplementedError
+
+    def create(self, table: str, fields: Dict[str, Any]) -> RawRecord:
+        raise NotImplementedError
+
+    def batch_create(self, table: str, records: List[Dict[str, Any]]) -> List[RawRecord]:
+        return [self.create(table, fields) for fields in records]
+
+    def update(self, table: str, record_id: str, fields: Dict[str, Any]) -> RawRecord:
+        raise NotImplementedError
+
+    def batch_update(self, table: str, updates: List[Tuple[str, Dict[str, Any]]]) -> List[RawRecord]:
+        return [self.update(table, record_id, fields) for record_id, fields in updates]
+
+    def delete(self, table: str, record_id: str) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    def batch_delete(self, table: str, record_ids: List[str]) -> List[Dict[str, Any]]:
+        return [self.delete(table, record_id) for record_id in record_ids]
+
+    def import_records(self, table: str, records: List[RawRecord]) -> Dict[str, str]:
+        """Bulk-load raw records; return the mapping of source to stored ids."""
+        created = self.batch_create(table, [record.get("fields", {}) for record in records])
+        return {record["id"]: stored["id"] for record, stored in zip(records, created)}
+
+    def base_schema(self) -> Optional[List[Dict[str, Any]]]:
+        """Tables and fields in the metadata API's shape, or ``None`` if the backend has no schema API."""
+        return None
+
+
+class AirtableBackend(StorageBackend):
+    name = "airtable"
+
+    def __init__(self, api_key: str, base_id: str) -> None:
+        self._api_key = api_key
+        self._base_id = base_id
+
+    def table(self, name: str) -> Table:
+        return Table(self._api_key, self._base_id, name)
+
+    def iterate(self, table, *, page_size=100, fields=None, formula=None, sort=None, max_records=None, links=None, **kwargs):
+        options = dict(kwargs)
+        if fields:
+            options["fields"] = list(fields)
+        if formula:
+            options["formula"] = formula
+        if sort:
+            options["sort"] = list(sort)
+        if max_records:
+            options["max_records"] = max_records
+        # Airtable cannot index on links; callers still filter the records themselves.
+        yield from self.table(table).iterate(page_size=page_size, **options)
+
+    def get(self, table, record_id):
+        return self.table(table).get(record_id)
+
+    def create(self, table, fields):
+        return self.table(table).create(fields)
+
+    def batch_create(self, table, records):
+        return self.table(table).batch_create(records)
+
+    def update(self, table, record_id, fields):
+        return self.table(table).update(record_id, fields)
+
+    def batch_update(self, table, updates):
+        return self.table(table).batch_update([{"id": record_id, "fields": fields} for record_id, fields in updates])
+
+    def delete(self, table, record_id):
+        return self.table(table).delete(record_id)
+
+    def batch_delete(self, table, record_ids):
+        return self.table(table).batch_delete(record_ids)
+
+    def base_schema(self):
+        response = requests.get(
+            f"{META_API_URL}/bases/{self._base_id}/tables",
+            headers={"Authorization": f"Bearer {self._api_key}"},
+            timeout=30,
+        )
+        response.raise_for_status()
+        return response.json().get("tables", [])
+
+
+def _storage_config() -> Mapping[str, Any]:
+    try:
+        config = st.secrets["storage"]
+    except Exception:  # pragma: no cover - runtime configuration guard
+        config = None
+    return config if isinstance(config, Mapping) else {}
+
+
+def create_backend(kind: str, **options: Any) -> StorageBackend:
+    """Build a backend by name; used by :func:`get_backend` and the migration tool."""
+
+    if kind == "airtable":
+        # Imported here: data.airtable_client depends on this module.
+        from .airtable_client import _get_airtable_credentials
+
+        api_key, base_id = options.get("api_key"), options.get("base_id")
+        if not api_key or not base_id:
+            api_key, base_id = _get_airtable_credentials()
+        return AirtableBackend(api_key, base_id)
+    if kind == "sqlite":
+        from .sql_backend import SQLiteBackend
+
+        return SQLiteBackend(options.get("path") or "dados.db")
+    raise ValueError(f"Backend de armazenamento desconhecido: {kind!r}")
+
+
+@lru_cache(maxsize=1)
+def get_backend() -> StorageBackend:
+    """Return the configured backend (Airtable unless configured otherwise)."""
+
+    config = _storage_config()
+    kind = os.getenv("STORAGE_BACKEND") or config.get("backend") or "airtable"
+    path = os.getenv("STORAGE_SQLITE_PATH") or config.get("path")
+    return create_backend(kind, path=path)
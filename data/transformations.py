@@ -2,9 +2,17 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Dict, Iterable, List, Optional
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional
 
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from .event_summary import EventSummary
+from .models import Ementa, Pedido, Record, TipoCliente
+
+if TYPE_CHECKING:  # pragma: no cover - typing only
+    from .snapshots import EventSnapshot
 
 
 @dataclass
@@ -15,75 +23,59 @@ class DashboardData:
     pedidos_por_tipo: pd.DataFrame
 
 
-def _to_dataframe(records: Iterable[Dict]) -> pd.DataFrame:
-    if not records:
-        return pd.DataFrame()
-    return pd.DataFrame(records)
-
-
-def _filter_by_event(df: pd.DataFrame, event_id: Optional[str]) -> pd.DataFrame:
-    if df.empty or not event_id:
-        return df
-    if "Evento" in df.columns:
-        mask = df["Evento"].apply(lambda value: event_id in value if isinstance(value, list) else value == event_id)
-        return df.loc[mask].copy()
-    return df
-
-
-def _ensure_numeric(series: pd.Series) -> pd.Series:
-    return pd.to_numeric(series, errors="coerce").fillna(0.0)
+def _pedidos_frame(pedidos: Iterable[Pedido], event_id: Optional[str]) -> pd.DataFrame:
+    """Build the order columns straight from typed records, keeping only ``event_id``."""
+    ementas: List[Optional[str]] = []
+    tipos: List[Optional[str]] = []
+    quantidades: List[int] = []
+    valores: List[float] = []
+    for pedido in pedidos:
+        if event_id and not pedido.in_event(event_id):
+            continue
+        ementas.append(pedido.ementa_id)
+        tipos.append(pedido.tipo_id)
+        quantidades.append(pedido.quantidade)
+        valores.append(pedido.valor)
+    return pd.DataFrame(
+        {"Ementa": ementas, "TipoCliente": tipos, "Quantidade": quantidades, "Valor": valores}
+    )
 
 
-def _first_value(value):
-    if isinstance(value, list):
-        return value[0] if value else None
-    return value
+def _names_frame(records: Iterable[Record]) -> pd.DataFrame:
+    records = list(records)
+    return pd.DataFrame(
+        {"id": [record.id for record in records], "Nome": [record.get("Nome") for record in records]},
+        dtype=object,
+    )
 
 
 def build_dashboard_data(
-    pedidos: Iterable[Dict],
-    ementas: Iterable[Dict],
-    tipos_cliente: Iterable[Dict],
+    pedidos: Iterable[Pedido],
+    ementas: Iterable[Ementa],
+    tipos_cliente: Iterable[TipoCliente],
     event_id: Optional[str],
 ) -> DashboardData:
-    pedidos_df = _to_dataframe(pedidos)
-    pedidos_df = _filter_by_event(pedidos_df, event_id)
-
-    if "Ementa" in pedidos_df.columns:
-        pedidos_df["Ementa"] = pedidos_df["Ementa"].apply(_first_value)
-    if "TipoCliente" in pedidos_df.columns:
-        pedidos_df["TipoCliente"] = pedidos_df["TipoCliente"].apply(_first_value)
+    pedidos_df = _pedidos_frame(pedidos, event_id)
 
-    if "Valor" in pedidos_df.columns:
-        pedidos_df["Valor"] = _ensure_numeric(pedidos_df["Valor"])
-    if "Quantidade" in pedidos_df.columns:
-        pedidos_df["Quantidade"] = _ensure_numeric(pedidos_df["Quantidade"])
+    total_pedidos = int(pedidos_df["Quantidade"].sum())
+    total_valor = float(pedidos_df["Valor"].sum())
 
-    total_pedidos = int(pedidos_df["Quantidade"].sum()) if "Quantidade" in pedidos_df else len(pedidos_df)
-    total_valor = float(pedidos_df["Valor"].sum()) if "Valor" in pedidos_df.columns else 0.0
-
-    ementas_df = _to_dataframe(ementas)
-    tipos_df = _to_dataframe(tipos_cliente)
+    ementas_df = _names_frame(ementas)
+    tipos_df = _names_frame(tipos_cliente)
 
     pedidos_por_ementa = pedidos_df.copy()
-    if not pedidos_por_ementa.empty and "Ementa" in pedidos_por_ementa.columns:
+    if not pedidos_por_ementa.empty:
         pedidos_por_ementa = pedidos_por_ementa.groupby("Ementa")["Valor"].sum().reset_index()
-        if "Nome" in ementas_df.columns:
-            pedidos_por_ementa = pedidos_por_ementa.merge(
-                ementas_df[["id", "Nome"]], left_on="Ementa", right_on="id", how="left"
-            )
-            pedidos_por_ementa.drop(columns=["id"], inplace=True)
-            pedidos_por_ementa.rename(columns={"Nome": "Ementa"}, inplace=True)
+        pedidos_por_ementa = pedidos_por_ementa.merge(ementas_df, left_on="Ementa", right_on="id", how="left")
+        pedidos_por_ementa.drop(columns=["Ementa", "id"], inplace=True)
+        pedidos_por_ementa.rename(columns={"Nome": "Ementa"}, inplace=True)
 
     pedidos_por_tipo = pedidos_df.copy()
-    if not pedidos_por_tipo.empty and "TipoCliente" in pedidos_por_tipo.columns:
+    if not pedidos_por_tipo.empty:
         pedidos_por_tipo = pedidos_por_tipo.groupby("TipoCliente")["Valor"].sum().reset_index()
-        if "Nome" in tipos_df.columns:
-            pedidos_por_tipo = pedidos_por_tipo.merge(
-                tipos_df[["id", "Nome"]], left_on="TipoCliente", right_on="id", how="left"
-            )
-            pedidos_por_tipo.drop(columns=["id"], inplace=True)
-            pedidos_por_tipo.rename(columns={"Nome": "Tipo"}, inplace=True)
+        pedidos_por_tipo = pedidos_por_tipo.merge(tipos_df, left_on="TipoCliente", right_on="id", how="left")
+        pedidos_por_tipo.drop(columns=["id"], inplace=True)
+        pedidos_por_tipo.rename(columns={"Nome": "Tipo"}, inplace=True)
 
     return DashboardData(
         total_pedidos=total_pedidos,
@@ -91,3 +83,103 @@ def build_dashboard_data(
         pedidos_por_ementa=pedidos_por_ementa,
         pedidos_por_tipo=pedidos_por_tipo,
     )
+
+
+def _breakdown_frame(totals: Dict[str, float], lookup: Iterable[Record], label_column: str) -> pd.DataFrame:
+    if not totals:
+        return pd.DataFrame()
+    nomes = {record.id: record.get("Nome") for record in lookup}
+    linhas = [
+        {label_column: nomes.get(record_id) or record_id, "Valor": valor}
+        for record_id, valor in totals.items()
+    ]
+    return pd.DataFrame(linhas)
+
+
+def build_dashboard_from_summary(
+    summary: EventSummary,
+    ementas: Iterable[Ementa],
+    tipos_cliente: Iterable[TipoCliente],
+) -> DashboardData:
+    """Build :class:`DashboardData` from a materialised event summary."""
+
+    return DashboardData(
+        total_pedidos=summary.total_pedidos,
+        total_valor=summary.total_valor,
+        pedidos_por_ementa=_breakdown_frame(summary.por_ementa, ementas, "Ementa"),
+        pedidos_por_tipo=_breakdown_frame(summary.por_tipo, tipos_cliente, "Tipo"),
+    )
+
+
+def _arrow_sum(table: pa.Table, column: str) -> float:
+    if table.num_rows == 0:
+        return 0.0
+    return float(pc.sum(table[column]).as_py() or 0.0)
+
+
+def _arrow_group_sum(table: pa.Table, key: str) -> Dict[str, float]:
+    if table.num_rows == 0:
+        return {}
+    grouped = table.group_by(key).aggregate([("Valor", "sum")])
+    return {
+        nome if nome is not None else "—": float(valor or 0.0)
+        for nome, valor in zip(grouped[key].to_pylist(), grouped["Valor_sum"].to_pylist())
+    }
+
+
+def summary_from_snapshot(snapshot: "EventSnapshot") -> EventSummary:
+    """Aggregate a memory-mapped event snapshot; breakdowns are keyed by name."""
+
+    pedidos = snapshot.pedidos
+    valor_pago = _arrow_sum(pedidos.filter(pedidos["Pago"]), "Valor") if pedidos.num_rows else 0.0
+    total_valor = _arrow_sum(pedidos, "Valor")
+    return EventSummary(
+        event_id=snapshot.event_id,
+        total_pedidos=int(_arrow_sum(pedidos, "Quantidade")),
+        total_valor=total_valor,
+        valor_pago=valor_pago,
+        valor_pendente=total_valor - valor_pago,
+        total_recebimentos=_arrow_sum(snapshot.recebimentos, "Valor"),
+        total_sangria=_arrow_sum(snapshot.sangrias, "Valor"),
+        por_ementa=_arrow_group_sum(pedidos, "Ementa"),
+        por_tipo=_arrow_group_sum(pedidos, "Tipo"),
+    )
+
+
+def compare_events(agregados: pd.DataFrame) -> pd.DataFrame:
+    """Revenue, orders, quantity and average ticket per event, oldest first."""
+
+    chaves = ["Evento ID", "Evento", "Data", "Época"]
+    if agregados.empty:
+        return pd.DataFrame(columns=[*chaves, "Pedidos", "Quantidade", "Valor", "Ticket médio"])
+    por_evento = (
+        agregados.groupby(chaves, dropna=False)[["Pedidos", "Quantidade", "Valor"]].sum().reset_index()
+    )
+    por_evento["Ticket médio"] = por_evento["Valor"] / por_evento["Pedidos"].where(por_evento["Pedidos"] > 0)
+    return por_evento.sort_values("Data", na_position="first", ignore_index=True)
+
+
+def compare_seasons(agregados: pd.DataFrame) -> pd.DataFrame:
+    """Totals per scout season, including how many events each one had."""
+
+    if agregados.empty:
+        return pd.DataFrame(columns=["Época", "Eventos", "Pedidos", "Quantidade", "Valor", "Ticket médio"])
+    por_epoca = agregados.groupby("Época").agg(
+        Eventos=("Evento ID", "nunique"),
+        Pedidos=("Pedidos", "sum"),
+        Quantidade=("Quantidade", "sum"),
+        Valor=("Valor", "sum"),
+    )
+    por_epoca["Ticket médio"] = por_epoca["Valor"] / por_epoca["Pedidos"].where(por_epoca["Pedidos"] > 0)
+    return por_epoca.reset_index().sort_values("Época", ignore_index=True)
+
+
+def mix_by(agregados: pd.DataFrame, coluna: str) -> pd.DataFrame:
+    """Share (in % of each event's value) of every ``coluna`` value, per event."""
+
+    if agregados.empty:
+        return pd.DataFrame(columns=["Evento", "Data", coluna, "Valor", "Percentagem"])
+    mix = agregados.groupby(["Evento", "Data", coluna], dropna=False)["Valor"].sum().reset_index()
+    total = mix.groupby("Evento")["Valor"].transform("sum")
+    mix["Percentagem"] = (mix["Valor"] / total.where(total > 0) * 100).fillna(0.0)
+    return mix.sort_values(["Data", "Evento"], na_position="first", ignore_index=True)
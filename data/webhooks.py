@@ -0,0 +1,416 @@
+"""Push-based cache invalidation from Airtable base webhooks.
+
+Airtable notifies ``notificationUrl`` with a small ping; the actual changes
+are read from the webhook's payload list starting at the last seen cursor.
+Every payload is reduced to per-table changes: created and changed records
+are refetched in one request per table and patched into the cache, deleted
+records are dropped from it and schema changes invalidate the whole table.
+
+Configuration lives in ``st.secrets["airtable"]["webhook"]``::
+
+    [airtable.webhook]
+    id = "achXXXXXXXXXXXXXX"
+    mac_secret = "..."      # macSecretBase64 returned when creating the webhook
+    port = 8765             # optional: start the in-process receiver (needs mac_secret)
+    host = "127.0.0.1"      # optional: address the receiver binds to
+    poll_seconds = 60       # optional: also poll the payload list
+
+Airtable webhooks expire after 7 days unless refreshed; the scheduler
+refreshes them once a day. Recorded payload pages can be replayed locally,
+applying them to the cache and checking the result::
+
+    python -m data.webhooks replay gravacao.json
+"""
+from __future__ import annotations
+
+import argparse
+import base64
+import hashlib
+import hmac
+import json
+import logging
+import os
+import threading
+from collections.abc import Mapping
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Protocol, Set, Tuple
+
+import requests
+import streamlit as st
+
+from .airtable_client import _get_airtable_credentials, _normalize_record, read_all
+from .cache_utils import invalidate_table, patch_overlay, patch_records
+from .storage import get_backend
+
+API_URL = "https://api.airtable.com/v0"
+FORMULA_CHUNK = 50
+REFRESH_INTERVAL = 24 * 3600
+CURSOR_FILE = Path(os.getenv("WEBHOOK_CURSOR_FILE", Path(__file__).resolve().parent.parent / ".webhook_cursor"))
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class TableChanges:
+    upserted: Set[str] = field(default_factory=set)
+    destroyed: Set[str] = field(default_factory=set)
+    schema_changed: bool = False
+
+
+class PayloadSource(Protocol):
+    def fetch(self, cursor: int) -> Tuple[List[Dict[str, Any]], int, bool]:
+        """Return ``(payloads, next_cursor, might_have_more)`` starting at ``cursor``."""
+
+    def table_names(self) -> Dict[str, str]:
+        """Map Airtable table ids (``tbl…``) to table names."""
+
+    def refresh(self) -> Optional[str]:
+        """Extend the webhook's life; return its new expiration time, if any."""
+
+
+class AirtablePayloadSource:
+    """Reads payloads of a real base webhook through the Airtable REST API."""
+
+    def __init__(self, api_key: str, base_id: str, webhook_id: str) -> None:
+        self._base_id = base_id
+        self._webhook_id = webhook_id
+        self._session = requests.Session()
+        self._session.headers["Authorization"] = f"Bearer {api_key}"
+
+    def fetch(self, cursor: int) -> Tuple[List[Dict[str, Any]], int, bool]:
+        response = self._session.get(
+            f"{API_URL}/bases/{self._base_id}/webhooks/{self._webhook_id}/payloads",
+            params={"cursor": cursor},
+            timeout=30,
+        )
+        response.raise_for_status()
+        body = response.json()
+        return body.get("payloads", []), int(body.get("cursor", cursor)), bool(body.get("mightHaveMore"))
+
+    def table_names(self) -> Dict[str, str]:
+        response = self._session.get(f"{API_URL}/meta/bases/{self._base_id}/tables", timeout=30)
+        response.raise_for_status()
+        return {table["id"]: table["name"] for table in response.json().get("tables", [])}
+
+    def refresh(self) -> Optional[str]:
+        response = self._session.post(
+            f"{API_URL}/bases/{self._base_id}/webhooks/{self._webhook_id}/refresh", timeout=30
+        )
+        response.raise_for_status()
+        return response.json().get("expirationTime")
+
+
+class ReplayPayloadSource:
+    """Local stand-in that serves recorded payload pages.
+
+    The recording is a JSON object with ``tables`` (table id → name),
+    ``pages`` (the bodies returned by the list-payloads endpoint, in order),
+    an optional ``startCursor`` and optional ``records`` (table name → raw
+    records) that stand in for the refetch of created and changed records.
+    """
+
+    def __init__(self, recording: Dict[str, Any]) -> None:
+        self._tables = dict(recording.get("tables", {}))
+        self.records: Optional[Dict[str, List[Dict[str, Any]]]] = recording.get("records")
+        self._pages: Dict[int, Dict[str, Any]] = {}
+        self.start_cursor = cursor = int(recording.get("startCursor", 1))
+        for page in recording.get("pages", []):
+            self._pages[cursor] = page
+            cursor = int(page.get("cursor", cursor))
+
+    @classmethod
+    def from_file(cls, path: str) -> "ReplayPayloadSource":
+        return cls(json.loads(Path(path).read_text(encoding="utf-8")))
+
+    def fetch(self, cursor: int) -> Tuple[List[Dict[str, Any]], int, bool]:
+        page = self._pages.get(cursor)
+        if page is None:
+            return [], cursor, False
+        return page.get("payloads", []), int(page.get("cursor", cursor)), bool(page.get("mightHaveMore"))
+
+    def table_names(self) -> Dict[str, str]:
+        return dict(self._tables)
+
+    def refresh(self) -> Optional[str]:
+        return None
+
+    def fetch_records(self, table: str, record_ids: List[str]) -> List[Any]:
+        wanted = set(record_ids)
+        return [
+            _normalize_record(table, {**record, "fields": dict(record.get("fields", {}))})
+            for record in (self.records or {}).get(table, [])
+            if record.get("id") in wanted
+        ]
+
+
+def collect_changes(payloads: List[Dict[str, Any]]) -> Dict[str, TableChanges]:
+    """Fold webhook payloads into the record ids touched per table id."""
+
+    changes: Dict[str, TableChanges] = {}
+    for payload in payloads:
+        for table_id, table in payload.get("changedTablesById", {}).items():
+            entry = changes.setdefault(table_id, TableChanges())
+            created = set(table.get("createdRecordsById", {}))
+            changed = set(table.get("changedRecordsById", {}))
+            destroyed = set(table.get("destroyedRecordIds", []))
+            entry.upserted |= created | changed
+            entry.upserted -= destroyed
+            entry.destroyed |= destroyed
+            entry.destroyed -= created
+            if any(
+                table.get(key)
+                for key in ("changedMetadata", "createdFieldsById", "changedFieldsById", "destroyedFieldIds")
+            ):
+                entry.schema_changed = True
+        for table_id in [*payload.get("createdTablesById", {}), *payload.get("destroyedTableIds", [])]:
+            changes.setdefault(table_id, TableChanges()).schema_changed = True
+    return changes
+
+
+def _fetch_records(table: str, record_ids: List[str]) -> List[Any]:
+    records: List[Any] = []
+    for start in range(0, len(record_ids), FORMULA_CHUNK):
+        chunk = record_ids[start : start + FORMULA_CHUNK]
+        formula = "OR(" + ",".join(f"RECORD_ID()='{record_id}'" for record_id in chunk) + ")"
+        records.extend(read_all(table, formula=formula))
+    return records
+
+
+def apply_changes(changes: Dict[str, TableChanges], table_names: Mapping[str, str], fetch=_fetch_records) -> Dict[str, str]:
+    """Patch or invalidate the cached tables; return the action taken per table name."""
+
+    actions: Dict[str, str] = {}
+    for table_id, entry in changes.items():
+        name = table_names.get(table_id)
+        if name is None:
+            continue
+        if entry.schema_changed:
+            invalidate_table(name)
+            actions[name] = "invalidada"
+            continue
+        upserts = fetch(name, sorted(entry.upserted)) if entry.upserted else []
+        patch_records(name, upserts, entry.destroyed)
+        actions[name] = f"{len(upserts)} atualizados, {len(entry.destroyed)} removidos"
+    return actions
+
+
+class WebhookSync:
+    """Consumes the payload list of one webhook from a persisted cursor."""
+
+    def __init__(
+        self,
+        source: PayloadSource,
+        cursor_file: Optional[Path] = CURSOR_FILE,
+        fetch=_fetch_records,
+        cursor: Optional[int] = None,
+    ) -> None:
+        self._source = source
+        self._cursor_file = cursor_file
+        self._fetch = fetch
+        self._lock = threading.Lock()
+        self._table_names: Dict[str, str] = {}
+        self.cursor = self._load_cursor() if cursor is None else cursor
+
+    def _load_cursor(self) -> int:
+        if self._cursor_file and self._cursor_file.exists():
+            try:
+                return int(self._cursor_file.read_text().strip())
+            except ValueError:
+                pass
+        return 1
+
+    def _save_cursor(self) -> None:
+        if self._cursor_file:
+            self._cursor_file.write_text(str(self.cursor))
+
+    def _iter_payloads(self) -> Iterator[List[Dict[str, Any]]]:
+        while True:
+            payloads, next_cursor, more = self._source.fetch(self.cursor)
+            if payloads:
+                yield payloads
+            self.cursor = next_cursor
+            if not more:
+                return
+
+    def sync(self) -> Dict[str, str]:
+        """Apply every payload after the stored cursor; safe to call concurrently."""
+
+        with self._lock:
+            actions: Dict[str, str] = {}
+            for payloads in self._iter_payloads():
+                changes = collect_changes(payloads)
+                if any(table_id not in self._table_names for table_id in changes):
+                    self._table_names = self._source.table_names()
+                actions.update(apply_changes(changes, self._table_names, self._fetch))
+                self._save_cursor()
+            return actions
+
+    def refresh(self) -> Optional[str]:
+        """Extend the webhook's expiry (Airtable disables it after 7 days without this)."""
+        return self._source.refresh()
+
+
+def verify_signature(body: bytes, header: Optional[str], mac_secret_base64: str) -> bool:
+    """Check the ``X-Airtable-Content-MAC`` header of a notification."""
+
+    if not header or not mac_secret_base64:
+        return False
+    digest = hmac.new(base64.b64decode(mac_secret_base64), body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(header, f"hmac-sha256={digest}")
+
+
+def make_handler(sync: WebhookSync, mac_secret: str):
+    """Request handler that only acknowledges notifications signed with ``mac_secret``."""
+
+    if not mac_secret:
+        raise ValueError("O recetor de webhooks precisa de 'mac_secret'.")
+
+    class _NotificationHandler(BaseHTTPRequestHandler):
+        def do_POST(self) -> None:  # noqa: N802 - http.server naming
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0) or 0))
+            if not verify_signature(body, self.headers.get("X-Airtable-Content-MAC"), mac_secret):
+                self.send_response(401)
+                self.end_headers()
+                return
+            # Answer straight away; Airtable only expects an acknowledgement.
+            self.send_response(200)
+            self.end_headers()
+            threading.Thread(target=_safe_sync, args=(sync,), daemon=True).start()
+
+        def log_message(self, format: str, *args: Any) -> None:  # noqa: A002 - stdlib signature
+            logger.debug(format, *args)
+
+    return _NotificationHandler
+
+
+def _safe_sync(sync: WebhookSync) -> None:
+    try:
+        actions = sync.sync()
+    except Exception:  # pragma: no cover - keep the receiver alive
+        logger.exception("Falha ao processar notificação do Airtable")
+    else:
+        if actions:
+            logger.info("Webhook Airtable: %s", actions)
+
+
+def _get_webhook_config() -> Mapping[str, Any]:
+    try:
+        config = st.secrets["airtable"].get("webhook")
+    except Exception:  # pragma: no cover - runtime configuration guard
+        config = None
+    return config if isinstance(config, Mapping) else {}
+
+
+_listener: Optional[WebhookSync] = None
+_listener_started = False
+_listener_lock = threading.Lock()
+
+
+def start_webhook_listener() -> Optional[WebhookSync]:
+    """Start the receiver once per process when a webhook is configured.
+
+    Guarded by a module flag rather than ``st.cache_resource``, which the
+    "Clear caches" menu empties: a second start would bind the port again.
+    """
+
+    global _listener, _listener_started
+    with _listener_lock:
+        if not _listener_started:
+            _listener = _start_listener()
+            _listener_started = True
+        return _listener
+
+
+def _start_listener() -> Optional[WebhookSync]:
+    config = _get_webhook_config()
+    webhook_id = config.get("id") or os.getenv("AIRTABLE_WEBHOOK_ID")
+    if not webhook_id or get_backend().name != "airtable":
+        return None
+    api_key, base_id = _get_airtable_credentials()
+    sync = WebhookSync(AirtablePayloadSource(api_key, base_id, webhook_id))
+
+    port = config.get("port") or os.getenv("AIRTABLE_WEBHOOK_PORT")
+    mac_secret = config.get("mac_secret") or os.getenv("AIRTABLE_WEBHOOK_MAC_SECRET")
+    if port and not mac_secret:
+        # Unsigned notifications would let anyone trigger refetches; refuse to listen.
+        logger.error("Recetor de webhooks não iniciado: falta 'mac_secret' em [airtable.webhook].")
+    elif port:
+        host = config.get("host") or os.getenv("AIRTABLE_WEBHOOK_HOST", "127.0.0.1")
+        server = ThreadingHTTPServer((host, int(port)), make_handler(sync, mac_secret))
+        threading.Thread(target=server.serve_forever, name="airtable-webhook", daemon=True).start()
+    # Periodic polling (``poll_seconds``) and the daily refresh run as jobs of data.scheduler.
+    return sync
+
+
+def webhook_poll_seconds() -> Optional[float]:
+    poll_seconds = _get_webhook_config().get("poll_seconds")
+    return float(poll_seconds) if poll_seconds else None
+
+
+def _merge_changes(source: ReplayPayloadSource) -> Dict[str, TableChanges]:
+    changes: Dict[str, TableChanges] = {}
+    cursor = source.start_cursor
+    while True:
+        payloads, cursor, more = source.fetch(cursor)
+        for table_id, entry in collect_changes(payloads).items():
+            merged = changes.setdefault(table_id, TableChanges())
+            merged.upserted = (merged.upserted - entry.destroyed) | entry.upserted
+            merged.destroyed = (merged.destroyed - entry.upserted) | entry.destroyed
+            merged.schema_changed |= entry.schema_changed
+        if not more:
+            return changes
+
+
+def replay(source: ReplayPayloadSource) -> List[str]:
+    """Apply a recording to the cache like a live sync and return the mismatches found.
+
+    Created and changed records are taken from the recording's ``records``
+    when present, otherwise read from the configured backend.
+    """
+
+    expected = _merge_changes(source)
+    fetch = source.fetch_records if source.records is not None else _fetch_records
+    sync = WebhookSync(source, cursor_file=None, fetch=fetch, cursor=source.start_cursor)
+    actions = sync.sync()
+    names = source.table_names()
+    erros: List[str] = []
+    for table_id, entry in expected.items():
+        name = names.get(table_id)
+        if name is None:
+            erros.append(f"{table_id}: tabela desconhecida")
+            continue
+        print(f"{name}: {actions.get(name, 'sem ação')}")
+        if entry.schema_changed:
+            continue
+        overlay = patch_overlay(name)
+        erros.extend(
+            f"{name}: {record_id} não atualizado" for record_id in sorted(entry.upserted) if overlay.get(record_id) is None
+        )
+        erros.extend(
+            f"{name}: {record_id} não removido"
+            for record_id in sorted(entry.destroyed)
+            if record_id not in overlay or overlay[record_id] is not None
+        )
+    print(f"cursor final: {sync.cursor}")
+    return erros
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Ferramentas de webhooks Airtable.")
+    sub = parser.add_subparsers(dest="comando", required=True)
+    replay_parser = sub.add_parser("replay", help="Aplica payloads gravados à cache e verifica o resultado")
+    replay_parser.add_argument("gravacao", help="Ficheiro JSON com 'tables', 'pages' e, opcionalmente, 'records'")
+    args = parser.parse_args(argv)
+
+    if args.comando == "replay":
+        erros = replay(ReplayPayloadSource.from_file(args.gravacao))
+        for erro in erros:
+            print(f"ERRO {erro}")
+        if erros:
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
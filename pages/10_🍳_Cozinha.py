@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+import streamlit as st
+
+from data.cache_utils import get_cached_data
+from data.kitchen import fetch_new_orders, initial_cursor
+from utils.bootstrap import start_background_services
+from utils.fragments import timed_fragment
+from utils.layout import render_footer, render_header
+
+REFRESH_SECONDS = 5
+
+
+def _require_login() -> None:
+    if not st.session_state.get("autenticado"):
+        st.warning("É necessário iniciar sessão para aceder a esta página.")
+        st.stop()
+
+
+def _require_evento() -> str:
+    evento_id = st.session_state.get("evento_ativo_id")
+    if not evento_id:
+        st.warning("Selecione um evento ativo no ecrã inicial.")
+        st.stop()
+    return evento_id
+
+
+def _queue_state(evento_id: str) -> dict:
+    state = st.session_state.get("cozinha")
+    if not state or state["evento"] != evento_id:
+        state = {"evento": evento_id, "desde": initial_cursor(), "fila": {}, "vistos": set()}
+        st.session_state["cozinha"] = state
+    return state
+
+
+def _hora(created_time) -> str:
+    if not created_time:
+        return ""
+    try:
+        return datetime.fromisoformat(created_time.replace("Z", "+00:00")).astimezone().strftime("%H:%M")
+    except ValueError:
+        return created_time
+
+
+@timed_fragment("cozinha.fila", run_every=REFRESH_SECONDS)
+def _render_queue(evento_id: str, ementas_map: dict, tipos_map: dict) -> None:
+    state = _queue_state(evento_id)
+    try:
+        novos, state["desde"] = fetch_new_orders(evento_id, state["desde"], frozenset(state["vistos"]))
+    except Exception as error:  # pragma: no cover - Streamlit runtime feedback
+        st.warning("Não foi possível atualizar a fila; nova tentativa em breve.")
+        st.caption(str(error))
+        novos = []
+    for pedido in novos:
+        state["vistos"].add(pedido.id)
+        state["fila"][pedido.id] = pedido
+
+    fila = list(state["fila"].values())
+    st.caption(f"{len(fila)} pedido(s) em espera · atualizado às {datetime.now().strftime('%H:%M:%S')}")
+    if not fila:
+        st.info("Sem pedidos em espera.")
+        return
+
+    for pedido in fila:
+        col_hora, col_pedido, col_acao = st.columns([1, 5, 1])
+        col_hora.markdown(f"**{_hora(pedido.created_time)}**")
+        col_pedido.markdown(
+            f"{pedido.quantidade} × **{ementas_map.get(pedido.ementa_id, pedido.ementa_id or '')}**"
+            f" · {tipos_map.get(pedido.tipo_id, pedido.tipo_id or '')}"
+            + ("" if pedido.pago else " · _por pagar_")
+        )
+        if col_acao.button("Servido", key=f"servido_{pedido.id}"):
+            state["fila"].pop(pedido.id, None)
+            st.rerun(scope="fragment")
+
+
+def main() -> None:
+    start_background_services()
+    _require_login()
+    evento_id = _require_evento()
+
+    render_header("🍳 Cozinha", "Fila de pedidos em tempo real")
+
+    ementas_map = {ementa.id: ementa.nome for ementa in get_cached_data("Ementas")}
+    tipos_map = {tipo.id: tipo.nome for tipo in get_cached_data("Tipos de Cliente")}
+    _render_queue(evento_id, ementas_map, tipos_map)
+
+    render_footer()
+
+
+if __name__ == "__main__":
+    main()
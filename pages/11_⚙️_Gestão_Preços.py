@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import pandas as pd
+import streamlit as st
+
+from data.cache_utils import get_cached_data, invalidate_table
+from data.prices import (
+    NAME_COLUMN,
+    PRICE_TABLE,
+    missing_cells,
+    plan_price_changes,
+    price_cells,
+    price_matrix,
+    save_price_changes,
+)
+from utils.bootstrap import start_background_services
+from utils.layout import render_footer, render_header
+
+
+def _require_admin() -> None:
+    if not st.session_state.get("autenticado"):
+        st.warning("É necessário iniciar sessão para aceder a esta página.")
+        st.stop()
+    if st.session_state.get("perfil") != "Administrador":
+        st.warning("Acesso restrito aos administradores.")
+        st.stop()
+
+
+def _require_evento() -> str:
+    evento_id = st.session_state.get("evento_ativo_id")
+    if not evento_id:
+        st.warning("Selecione um evento ativo no ecrã inicial.")
+        st.stop()
+    return evento_id
+
+
+def _highlight_gaps(value) -> str:
+    return "background-color: #f8d7da" if pd.isna(value) else ""
+
+
+def main() -> None:
+    start_background_services()
+    _require_admin()
+    evento_id = _require_evento()
+
+    render_header("⚙️ Gestão de Preços", "Matriz de preços ementa × tipo de cliente do evento")
+
+    ementas = [ementa for ementa in get_cached_data("Ementas") if ementa.in_event(evento_id)]
+    tipos = list(get_cached_data("Tipos de Cliente"))
+    if not ementas or not tipos:
+        st.info("Configure as ementas do evento e os tipos de cliente antes de definir preços.")
+        render_footer()
+        return
+
+    cells = price_cells(get_cached_data(PRICE_TABLE), evento_id)
+    matrix = price_matrix(ementas, tipos, cells)
+    tipos_nomes = {tipo.id: tipo.nome or tipo.id for tipo in tipos}
+    ementas_nomes = dict(zip(matrix.index, matrix[NAME_COLUMN]))
+
+    gaps = missing_cells(matrix)
+    if gaps:
+        st.warning(f"{len(gaps)} combinação(ões) sem preço: os pedidos dessas combinações ficam bloqueados.")
+        st.dataframe(
+            matrix.rename(columns=tipos_nomes)
+            .set_index(NAME_COLUMN)
+            .style.map(_highlight_gaps)
+            .format("€ {:,.2f}", na_rep="sem preço"),
+            use_container_width=True,
+        )
+    else:
+        st.success("Todas as combinações têm preço definido.")
+
+    st.subheader("Editar preços")
+    editada = st.data_editor(
+        matrix,
+        hide_index=True,
+        disabled=[NAME_COLUMN],
+        column_config={
+            tipo_id: st.column_config.NumberColumn(nome, min_value=0.0, step=0.5, format="€ %.2f")
+            for tipo_id, nome in tipos_nomes.items()
+        },
+        use_container_width=True,
+        key=f"precos_{evento_id}",
+    )
+
+    changes = plan_price_changes(matrix, editada, cells, evento_id)
+    for ementa_id, tipo_id in changes.shared:
+        st.warning(
+            f"O preço de {ementas_nomes[ementa_id]} / {tipos_nomes[tipo_id]} é partilhado com outras"
+            " combinações ou eventos; altere-o diretamente no Airtable."
+        )
+    if changes:
+        st.caption(
+            f"{len(changes.creates)} novo(s), {len(changes.updates)} alterado(s), {len(changes.deletes)} removido(s)"
+            f" · {changes.requests} pedido(s) ao Airtable"
+        )
+    if st.button("Guardar preços", disabled=not changes):
+        save_price_changes(changes)
+        invalidate_table(PRICE_TABLE)
+        st.session_state.pop(f"precos_{evento_id}", None)
+        st.success("Preços atualizados.")
+        st.rerun()
+
+    render_footer()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import streamlit as st
+
+from data.scheduler import start_scheduler, status_frame
+from utils.bootstrap import start_background_services
+from utils.fragments import timed_fragment
+from utils.layout import render_footer, render_header
+
+
+def _require_admin() -> None:
+    if not st.session_state.get("autenticado"):
+        st.warning("É necessário iniciar sessão para aceder a esta página.")
+        st.stop()
+    if st.session_state.get("perfil") != "Administrador":
+        st.warning("Acesso restrito aos administradores.")
+        st.stop()
+
+
+@timed_fragment("tarefas.estado", run_every=5)
+def _render_status(scheduler) -> None:
+    st.dataframe(
+        status_frame(scheduler),
+        use_container_width=True,
+        hide_index=True,
+        column_config={
+            "Última execução": st.column_config.DatetimeColumn(format="HH:mm:ss"),
+            "Próxima execução": st.column_config.DatetimeColumn(format="HH:mm:ss"),
+        },
+    )
+
+
+def main() -> None:
+    start_background_services()
+    _require_admin()
+
+    render_header("🛠️ Tarefas em segundo plano", "Sincronização e manutenção fora dos pedidos dos utilizadores")
+
+    scheduler = start_scheduler()
+    if scheduler is None:
+        st.info("O agendador de tarefas está desativado nesta instalação.")
+        render_footer()
+        return
+
+    _render_status(scheduler)
+
+    with st.expander("O que faz cada tarefa"):
+        for job in scheduler.jobs:
+            st.markdown(f"**{job.name}** (a cada {job.interval:.0f} s, limite {job.timeout:.0f} s): {job.description}")
+
+    nomes = [job.name for job in scheduler.jobs]
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        tarefa = st.selectbox("Tarefa", nomes, label_visibility="collapsed")
+    with col2:
+        if st.button("Executar agora", use_container_width=True):
+            scheduler.run_now(tarefa)
+            st.toast(f"Tarefa {tarefa} agendada.")
+
+    render_footer()
+
+
+if __name__ == "__main__":
+    main()
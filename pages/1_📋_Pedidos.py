@@ -3,9 +3,14 @@ from __future__ import annotations
 import pandas as pd
 import streamlit as st
 
-from data.airtable_client import create_record, read_all
-from data.cache_utils import get_cached_data, invalidate_cache
-from utils.forms import pedido_form
+from data.airtable_client import batch_create_idempotent, create_idempotent
+from data.archive import iter_event_records
+from data.cache_utils import get_cached_data
+from data.event_summary import apply_delta, pedido_delta, pedidos_delta
+from data.models import Pedido
+from utils.bootstrap import start_background_services
+from utils.forms import carrinho_form, clear_cart, clear_submission_key, pedido_form, submission_key
+from utils.fragments import timed_fragment, timed_page
 from utils.layout import render_footer, render_header
 
 
@@ -24,71 +29,81 @@ def _require_evento() -> str:
 
 
 def _filter_event(records, evento_id: str):
-    filtrados = []
-    for record in records:
-        evento = record.get("Evento")
-        if isinstance(evento, list) and evento_id in evento:
-            filtrados.append(record)
-        elif evento == evento_id:
-            filtrados.append(record)
-    return filtrados
+    return [record for record in records if record.in_event(evento_id)]
+
+
+@timed_fragment("pedidos.formulario")
+def _render_form(evento_id: str) -> None:
+    dados = {
+        "eventos": get_cached_data("Eventos"),
+        "tipos": get_cached_data("Tipos de Cliente"),
+        "ementas": _filter_event(get_cached_data("Ementas"), evento_id),
+        "precos": _filter_event(get_cached_data("Preços"), evento_id),
+        "default_event_id": evento_id,
+    }
+    if st.toggle("Modo carrinho", key="pedidos_modo_carrinho", help="Várias linhas registadas de uma só vez"):
+        linhas = carrinho_form(**dados)
+        if linhas:
+            _, criados = batch_create_idempotent("Pedidos", linhas, submission_key("carrinho"))
+            clear_submission_key("carrinho")
+            clear_cart()
+            if criados:
+                apply_delta(pedidos_delta(evento_id, [Pedido.from_fields(novo["fields"]) for novo in criados]))
+            st.success(f"Pedido com {len(linhas)} linhas registado com sucesso!")
+            # New orders change the list below, so the whole page reruns.
+            st.rerun()
+        return
+
+    novo_pedido = pedido_form(**dados)
+    if novo_pedido:
+        _, criado = create_idempotent("Pedidos", novo_pedido, submission_key("pedido", novo_pedido))
+        clear_submission_key("pedido")
+        if criado:
+            apply_delta(pedido_delta(evento_id, Pedido.from_fields(novo_pedido)))
+        st.success("Pedido registado com sucesso!")
+        # A new order changes the list below, so the whole page reruns.
+        st.rerun()
 
 
-def _resolve_nome(value, mapping):
-    if isinstance(value, list):
-        if not value:
-            return ""
-        return mapping.get(value[0], value[0])
-    return mapping.get(value, value)
+def _pedidos_frame(evento_id: str) -> pd.DataFrame:
+    ementas_map = {ementa.id: ementa.nome for ementa in get_cached_data("Ementas")}
+    tipos_map = {tipo.id: tipo.nome for tipo in get_cached_data("Tipos de Cliente")}
+    linhas = []
+    for pedido in iter_event_records("Pedidos", evento_id):
+        linha = {
+            "Data": pedido.data,
+            "Ementa": ementas_map.get(pedido.ementa_id, pedido.ementa_id or ""),
+            "Tipo": tipos_map.get(pedido.tipo_id, pedido.tipo_id or ""),
+            "Quantidade": pedido.quantidade,
+            "Valor": pedido.valor,
+            "Pago": pedido.pago,
+        }
+        linhas.append(linha)
+    return pd.DataFrame(linhas, columns=["Data", "Ementa", "Tipo", "Quantidade", "Valor", "Pago"])
+
+
+@timed_fragment("pedidos.lista")
+def _render_pedidos(df: pd.DataFrame) -> None:
+    # Fragment reruns reuse the frame built by the last full run.
+    if df.empty:
+        st.info("Sem pedidos registados para este evento.")
+        return
+    st.subheader("Pedidos do evento")
+    if st.toggle("Mostrar apenas pedidos por pagar", key="pedidos_por_pagar"):
+        df = df[~df["Pago"]]
+    st.dataframe(df.sort_values(by=df.columns[0], ascending=False))
 
 
 def main() -> None:
+    start_background_services()
     _require_login()
     evento_id = _require_evento()
 
     render_header("📋 Pedidos", "Registo de pedidos de clientes")
 
-    eventos = get_cached_data("Eventos")
-    tipos = get_cached_data("Tipos de Cliente")
-    ementas = get_cached_data("Ementas")
-    precos = get_cached_data("Preços")
-
-    novo_pedido = pedido_form(
-        eventos=eventos,
-        tipos=tipos,
-        ementas=_filter_event(ementas, evento_id),
-        precos=_filter_event(precos, evento_id),
-        default_event_id=evento_id,
-    )
-    if novo_pedido:
-        create_record("Pedidos", novo_pedido)
-        invalidate_cache()
-        st.success("Pedido registado com sucesso!")
-        st.rerun()
-
-    pedidos = read_all("Pedidos")
-    pedidos = _filter_event(pedidos, evento_id)
-
-    if pedidos:
-        ementas_map = {ementa.get("id"): ementa.get("Nome") for ementa in ementas}
-        tipos_map = {tipo.get("id"): tipo.get("Nome") for tipo in tipos}
-        linhas = []
-        for pedido in pedidos:
-            linha = {
-                "Data": pedido.get("Data"),
-                "Ementa": _resolve_nome(pedido.get("Ementa"), ementas_map),
-                "Tipo": _resolve_nome(pedido.get("TipoCliente"), tipos_map),
-                "Quantidade": pedido.get("Quantidade"),
-                "Valor": pedido.get("Valor"),
-                "Pago": pedido.get("Pago"),
-            }
-            linhas.append(linha)
-        df = pd.DataFrame(linhas)
-        df = df[[col for col in ["Data", "Ementa", "Tipo", "Quantidade", "Valor", "Pago"] if col in df.columns]]
-        st.subheader("Pedidos do evento")
-        st.dataframe(df.sort_values(by=df.columns[0], ascending=False) if not df.empty else df)
-    else:
-        st.info("Sem pedidos registados para este evento.")
+    with timed_page("pedidos"):
+        _render_form(evento_id)
+        _render_pedidos(_pedidos_frame(evento_id))
 
     render_footer()
 
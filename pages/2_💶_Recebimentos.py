@@ -2,8 +2,13 @@ from __future__ import annotations
 
 import streamlit as st
 
-from data.airtable_client import create_record, read_all, update_record
-from data.cache_utils import invalidate_cache
+from data.airtable_client import read_all
+from data.archive import iter_event_records
+from data.event_summary import apply_delta, recebimento_delta
+from data.models import Pedido
+from data.payments import settle_if_unpaid
+from utils.bootstrap import start_background_services
+from utils.fragments import timed_fragment, timed_page
 from utils.layout import render_footer, render_header
 
 
@@ -21,57 +26,42 @@ def _require_evento() -> str:
     return evento_id
 
 
-def _match_event(value, evento_id: str) -> bool:
-    if isinstance(value, list):
-        return evento_id in value
-    return value == evento_id
+@timed_fragment("recebimentos.linha")
+def _render_pendente(pedido: Pedido, ementa_nome: str, evento_id: str) -> None:
+    liquidados = st.session_state.setdefault("recebimentos_liquidados", {})
+    with st.expander(f"Pedido {pedido.id} - {ementa_nome} ({pedido.quantidade} unidades)"):
+        if pedido.id in liquidados:
+            st.success(liquidados[pedido.id])
+            return
+        st.write(f"Valor devido: € {pedido.valor}")
+        if st.button("Registar recebimento", key=f"receber_{pedido.id}"):
+            resultado = settle_if_unpaid(pedido, evento_id)
+            if resultado.registado:
+                apply_delta(recebimento_delta(evento_id, resultado.valor))
+                liquidados[pedido.id] = "Recebimento registado!"
+            else:
+                liquidados[pedido.id] = resultado.motivo
+            # Only this row changes; the list drops the order on the next full run.
+            st.rerun(scope="fragment")
 
 
 def main() -> None:
+    start_background_services()
     _require_login()
     evento_id = _require_evento()
 
     render_header("💶 Recebimentos", "Gestão de pagamentos de pedidos")
 
-    pedidos = read_all("Pedidos")
-    ementas = read_all("Ementas")
-    ementas_map = {ementa.get("id"): ementa.get("Nome") for ementa in ementas}
-    pendentes = [
-        pedido
-        for pedido in pedidos
-        if _match_event(pedido.get("Evento"), evento_id) and not pedido.get("Pago")
-    ]
-
-    if not pendentes:
-        st.info("Não existem pedidos pendentes de pagamento para este evento.")
-        render_footer()
-        return
-
-    st.subheader("Pedidos pendentes")
-    for pedido in pendentes:
-        valor = pedido.get("Valor", 0)
-        ementa_nome = pedido.get("Ementa")
-        if isinstance(ementa_nome, list) and ementa_nome:
-            ementa_nome = ementas_map.get(ementa_nome[0], ementa_nome[0])
+    with timed_page("recebimentos"):
+        ementas_map = {ementa.id: ementa.nome for ementa in read_all("Ementas")}
+        pendentes = list(iter_event_records("Pedidos", evento_id, formula="NOT({Pago})"))
+
+        if not pendentes:
+            st.info("Não existem pedidos pendentes de pagamento para este evento.")
         else:
-            ementa_nome = ementas_map.get(ementa_nome, ementa_nome)
-        with st.expander(
-            f"Pedido {pedido.get('id')} - {ementa_nome} ({pedido.get('Quantidade')} unidades)"
-        ):
-            st.write(f"Valor devido: € {valor}")
-            if st.button("Registar recebimento", key=f"receber_{pedido['id']}"):
-                create_record(
-                    "Recebimentos",
-                    {
-                        "Pedido": [pedido["id"]],
-                        "Evento": [evento_id],
-                        "Valor": valor,
-                    },
-                )
-                update_record("Pedidos", pedido["id"], {"Pago": True})
-                invalidate_cache()
-                st.success("Recebimento registado!")
-                st.rerun()
+            st.subheader("Pedidos pendentes")
+            for pedido in pendentes:
+                _render_pendente(pedido, ementas_map.get(pedido.ementa_id, pedido.ementa_id), evento_id)
 
     render_footer()
 
@@ -2,8 +2,11 @@ from __future__ import annotations
 
 import streamlit as st
 
-from data.airtable_client import create_record
-from data.cache_utils import invalidate_cache
+from data.airtable_client import create_idempotent
+from data.cache_utils import invalidate_table
+from data.event_summary import apply_delta, sangria_delta
+from utils.bootstrap import start_background_services
+from utils.forms import clear_submission_key, submission_key
 from utils.layout import render_footer, render_header
 
 
@@ -22,6 +25,7 @@ def _require_evento() -> str:
 
 
 def main() -> None:
+    start_background_services()
     _require_login()
     evento_id = _require_evento()
 
@@ -37,16 +41,17 @@ def main() -> None:
         if valor <= 0 or not responsavel:
             st.error("Preencha o valor e o responsável pela sangria.")
         else:
-            create_record(
-                "Sangria de Caixa",
-                {
-                    "Evento": [evento_id],
-                    "Valor": valor,
-                    "Responsável": responsavel,
-                    "Observações": observacoes,
-                },
-            )
-            invalidate_cache()
+            sangria = {
+                "Evento": [evento_id],
+                "Valor": valor,
+                "Responsável": responsavel,
+                "Observações": observacoes,
+            }
+            _, criado = create_idempotent("Sangria de Caixa", sangria, submission_key("sangria", sangria))
+            clear_submission_key("sangria")
+            if criado:
+                apply_delta(sangria_delta(evento_id, valor))
+            invalidate_table("Sangria de Caixa")
             st.success("Sangria registada com sucesso.")
             st.rerun()
 
@@ -1,11 +1,17 @@
 from __future__ import annotations
 
-import plotly.express as px
 import streamlit as st
 
-from data.airtable_client import read_all
+from data.airtable_client import get_read_stats, get_write_stats
+from data.archive import archived_event_ids
 from data.cache_utils import get_cached_data
-from data.transformations import build_dashboard_data
+from data.event_summary import load_summary, reconcile
+from data.export import EXPORT_URL, FORMATS, export_event_file
+from data.snapshots import has_snapshot, load_snapshot
+from data.transformations import build_dashboard_from_summary, summary_from_snapshot
+from utils.bootstrap import start_background_services
+from utils.charts import chart_figure
+from utils.fragments import fragment_stats_frame, timed, timed_fragment, timed_page
 from utils.layout import render_footer, render_header
 
 
@@ -23,35 +29,139 @@ def _require_evento() -> str:
     return evento_id
 
 
+@timed_fragment("dashboard.exportacao")
+def _render_export(evento_id: str) -> None:
+    st.subheader("Exportar dados do evento")
+    formato = st.radio("Formato", FORMATS, horizontal=True, format_func=str.upper, key="export_formato")
+    if st.button("Preparar exportação"):
+        with st.spinner("A exportar pedidos, recebimentos e sangrias..."):
+            caminho, estatisticas = export_event_file(evento_id, formato)
+        st.session_state["exportacao"] = {
+            "evento": evento_id,
+            "formato": formato,
+            "caminho": caminho,
+            "estatisticas": estatisticas,
+        }
+
+    # Kept in the session so the link survives the reruns that follow the button.
+    exportacao = st.session_state.get("exportacao")
+    if not exportacao or exportacao["evento"] != evento_id or exportacao["formato"] != formato:
+        return
+    if not exportacao["caminho"].exists():
+        st.session_state.pop("exportacao")
+        return
+    for stat in exportacao["estatisticas"]:
+        st.caption(f"{stat.table}: {stat.rows} linhas ({stat.rows_per_second:,.0f} linhas/s)")
+    # A plain link: the browser downloads the file from disk and no rerun is triggered.
+    st.markdown(
+        f'<a href="{EXPORT_URL}/{exportacao["caminho"].name}" download="evento_{evento_id}_{formato}.zip">'
+        "Descarregar exportação</a>",
+        unsafe_allow_html=True,
+    )
+
+
+def _select_evento(evento_ativo_id: str) -> str:
+    """Let the user pick the active event or any archived or snapshotted past event."""
+
+    eventos = get_cached_data("Eventos")
+    arquivados = archived_event_ids()
+    opcoes = {
+        evento.id: evento.nome or evento.id
+        for evento in eventos
+        if evento.id == evento_ativo_id or evento.id in arquivados or has_snapshot(evento.id)
+    }
+    if len(opcoes) <= 1:
+        return evento_ativo_id
+    ids = list(opcoes.keys())
+    return st.selectbox(
+        "Evento",
+        ids,
+        index=ids.index(evento_ativo_id) if evento_ativo_id in ids else 0,
+        format_func=lambda eid: opcoes[eid],
+        key="dashboard_evento",
+    )
+
+
 def main() -> None:
+    start_background_services()
     _require_login()
-    evento_id = _require_evento()
+    evento_ativo_id = _require_evento()
 
     render_header("📊 Dashboard", "Indicadores do evento")
 
-    pedidos = read_all("Pedidos")
-    ementas = get_cached_data("Ementas")
-    tipos = get_cached_data("Tipos de Cliente")
-
-    dados = build_dashboard_data(pedidos, ementas, tipos, evento_id)
-
-    col1, col2 = st.columns(2)
-    with col1:
-        st.metric("Total de pedidos", dados.total_pedidos)
-    with col2:
-        st.metric("Valor total", f"€ {dados.total_valor:,.2f}")
-
-    if not dados.pedidos_por_ementa.empty:
-        fig = px.bar(dados.pedidos_por_ementa, x="Ementa", y="Valor", title="Total por ementa")
-        st.plotly_chart(fig, use_container_width=True)
-    else:
-        st.info("Sem dados de ementas para apresentar.")
-
-    if not dados.pedidos_por_tipo.empty:
-        fig = px.pie(dados.pedidos_por_tipo, names="Tipo", values="Valor", title="Distribuição por tipo de cliente")
-        st.plotly_chart(fig, use_container_width=True)
-    else:
-        st.info("Sem dados por tipo de cliente para apresentar.")
+    with timed_page("dashboard"):
+        evento_id = _select_evento(evento_ativo_id)
+        snapshot = load_snapshot(evento_id)
+        resumo = summary_from_snapshot(snapshot) if snapshot else load_summary(evento_id)
+        ementas = get_cached_data("Ementas")
+        tipos = get_cached_data("Tipos de Cliente")
+
+        dados = build_dashboard_from_summary(resumo, ementas, tipos)
+
+        col1, col2 = st.columns(2)
+        with col1:
+            st.metric("Total de pedidos", dados.total_pedidos)
+        with col2:
+            st.metric("Valor total", f"€ {dados.total_valor:,.2f}")
+
+        col3, col4, col5 = st.columns(3)
+        with col3:
+            st.metric("Valor por receber", f"€ {resumo.valor_pendente:,.2f}")
+        with col4:
+            st.metric("Recebimentos", f"€ {resumo.total_recebimentos:,.2f}")
+        with col5:
+            st.metric("Sangrias de caixa", f"€ {resumo.total_sangria:,.2f}")
+
+        if snapshot:
+            st.caption(f"Evento encerrado: dados do snapshot de {snapshot.criado_em}")
+        elif resumo.reconciliado_em:
+            st.caption(f"Totais reconciliados em {resumo.reconciliado_em:%Y-%m-%d %H:%M} UTC")
+        if not snapshot and st.session_state.get("perfil") == "Administrador" and st.button("Recalcular totais"):
+            reconcile(evento_id)
+            st.rerun()
+
+        if not dados.pedidos_por_ementa.empty:
+            with timed("dashboard.grafico_ementas"):
+                figure = chart_figure(
+                    "dashboard.grafico_ementas",
+                    "bar",
+                    evento_id,
+                    dados.pedidos_por_ementa,
+                    x="Ementa",
+                    y="Valor",
+                    title="Total por ementa",
+                )
+                st.plotly_chart(figure, use_container_width=True)
+        else:
+            st.info("Sem dados de ementas para apresentar.")
+
+        if not dados.pedidos_por_tipo.empty:
+            with timed("dashboard.grafico_tipos"):
+                figure = chart_figure(
+                    "dashboard.grafico_tipos",
+                    "pie",
+                    evento_id,
+                    dados.pedidos_por_tipo,
+                    names="Tipo",
+                    values="Valor",
+                    title="Distribuição por tipo de cliente",
+                )
+                st.plotly_chart(figure, use_container_width=True)
+        else:
+            st.info("Sem dados por tipo de cliente para apresentar.")
+
+    _render_export(evento_id)
+
+    if st.session_state.get("perfil") == "Administrador":
+        with st.expander("Execuções por fragmento"):
+            st.dataframe(fragment_stats_frame(), use_container_width=True, hide_index=True)
+        with st.expander("Pedidos ao armazenamento"):
+            leituras = get_read_stats()
+            escritas = get_write_stats()
+            col1, col2, col3 = st.columns(3)
+            col1.metric("Leituras completas enviadas", leituras["reads_started"])
+            col2.metric("Leituras partilhadas", leituras["reads_coalesced"])
+            col3.metric("Atualizações evitadas", escritas["updates_skipped"])
 
     render_footer()
 
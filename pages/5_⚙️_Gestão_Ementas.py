@@ -4,6 +4,7 @@ import streamlit as st
 
 from data.airtable_client import create_record, read_all, update_record
 from data.cache_utils import invalidate_cache
+from utils.bootstrap import start_background_services
 from utils.layout import render_footer, render_header
 
 
@@ -24,20 +25,15 @@ def _require_evento() -> str:
     return evento_id
 
 
-def _match_event(value, evento_id: str) -> bool:
-    if isinstance(value, list):
-        return evento_id in value
-    return value == evento_id
-
-
 def main() -> None:
+    start_background_services()
     _require_admin()
     evento_id = _require_evento()
 
     render_header("⚙️ Gestão de Ementas", "Configuração de ementas do evento")
 
     ementas = read_all("Ementas")
-    ementas_evento = [e for e in ementas if _match_event(e.get("Evento"), evento_id)]
+    ementas_evento = [e for e in ementas if e.in_event(evento_id)]
 
     if ementas_evento:
         st.subheader("Ementas existentes")
@@ -49,7 +45,7 @@ def main() -> None:
                 )
                 ativo = st.checkbox("Ativo", value=ementa.get("Ativo", False), key=f"ativo_{ementa['id']}")
                 if st.button("Guardar alterações", key=f"save_{ementa['id']}"):
-                    update_record(
+                    atualizado = update_record(
                         "Ementas",
                         ementa["id"],
                         {
@@ -57,10 +53,14 @@ def main() -> None:
                             "Descrição": descricao,
                             "Ativo": ativo,
                         },
+                        current=ementa,
                     )
-                    invalidate_cache()
-                    st.success("Ementa atualizada.")
-                    st.rerun()
+                    if atualizado is None:
+                        st.info("Sem alterações para guardar.")
+                    else:
+                        invalidate_cache()
+                        st.success("Ementa atualizada.")
+                        st.rerun()
     else:
         st.info("Não existem ementas configuradas para este evento.")
 
@@ -4,6 +4,8 @@ import streamlit as st
 
 from data.airtable_client import create_record, read_all, update_record
 from data.cache_utils import invalidate_cache
+from data.models import TipoCliente
+from utils.bootstrap import start_background_services
 from utils.layout import render_footer, render_header
 
 
@@ -16,39 +18,44 @@ def _require_admin() -> None:
         st.stop()
 
 
+def _tipo_fields(nome: str, desconto: float, cor: str) -> dict:
+    return TipoCliente(nome=nome, desconto=desconto, cor=cor).to_fields()
+
+
 def main() -> None:
+    start_background_services()
     _require_admin()
 
     render_header("⚙️ Gestão de Tipos de Cliente", "Configuração de categorias de clientes")
 
-    tipos = read_all("Tipos de Cliente")
+    tipos = read_all(TipoCliente.TABLE)
 
     if tipos:
         st.subheader("Tipos existentes")
         for tipo in tipos:
-            with st.expander(tipo.get("Nome", tipo.get("id"))):
-                nome = st.text_input("Nome", value=tipo.get("Nome", ""), key=f"nome_{tipo['id']}")
+            with st.expander(tipo.nome or tipo.id):
+                nome = st.text_input("Nome", value=tipo.nome or "", key=f"nome_{tipo.id}")
                 desconto = st.number_input(
                     "Desconto %",
                     min_value=0.0,
                     max_value=100.0,
-                    value=float(tipo.get("Desconto %", 0) or 0),
-                    key=f"desc_{tipo['id']}",
+                    value=tipo.desconto,
+                    key=f"desc_{tipo.id}",
                 )
-                cor = st.color_picker("Cor", value=tipo.get("Cor", "#000000"), key=f"cor_{tipo['id']}")
-                if st.button("Guardar", key=f"save_{tipo['id']}"):
-                    update_record(
-                        "Tipos de Cliente",
-                        tipo["id"],
-                        {
-                            "Nome": nome,
-                            "Desconto %": desconto,
-                            "Cor": cor,
-                        },
+                cor = st.color_picker("Cor", value=tipo.cor or "#000000", key=f"cor_{tipo.id}")
+                if st.button("Guardar", key=f"save_{tipo.id}"):
+                    atualizado = update_record(
+                        TipoCliente.TABLE,
+                        tipo.id,
+                        _tipo_fields(nome, desconto, cor),
+                        current=tipo,
                     )
-                    invalidate_cache()
-                    st.success("Tipo atualizado.")
-                    st.rerun()
+                    if atualizado is None:
+                        st.info("Sem alterações para guardar.")
+                    else:
+                        invalidate_cache()
+                        st.success("Tipo atualizado.")
+                        st.rerun()
     else:
         st.info("Nenhum tipo de cliente configurado.")
 
@@ -63,14 +70,7 @@ def main() -> None:
         if not nome:
             st.error("Indique o nome do tipo de cliente.")
         else:
-            create_record(
-                "Tipos de Cliente",
-                {
-                    "Nome": nome,
-                    "Desconto %": desconto,
-                    "Cor": cor,
-                },
-            )
+            create_record(TipoCliente.TABLE, _tipo_fields(nome, desconto, cor))
             invalidate_cache()
             st.success("Tipo de cliente criado.")
             st.rerun()
@@ -6,7 +6,10 @@ from typing import Optional
 import streamlit as st
 
 from data.airtable_client import create_record, read_all, update_record
+from data.archive import archive_event, is_archived
 from data.cache_utils import invalidate_cache
+from data.snapshots import create_snapshot, has_snapshot
+from utils.bootstrap import start_background_services
 from utils.layout import render_footer, render_header
 
 
@@ -31,6 +34,7 @@ def _parse_date(value: Optional[str]) -> Optional[date]:
 
 
 def main() -> None:
+    start_background_services()
     _require_admin()
 
     render_header("🗓️ Eventos", "Gestão de eventos disponíveis")
@@ -49,7 +53,7 @@ def main() -> None:
                 local = st.text_input("Local", value=evento.get("Local", ""), key=f"local_{evento['id']}")
                 ativo = st.checkbox("Ativo", value=evento.get("Ativo", False), key=f"ativo_{evento['id']}")
                 if st.button("Guardar", key=f"save_{evento['id']}"):
-                    update_record(
+                    atualizado = update_record(
                         "Eventos",
                         evento["id"],
                         {
@@ -58,15 +62,38 @@ def main() -> None:
                             "Local": local,
                             "Ativo": ativo,
                         },
+                        current=evento,
                     )
-                    invalidate_cache()
                     if ativo:
                         st.session_state["evento_ativo_id"] = evento["id"]
-                    st.success("Evento atualizado.")
-                    st.rerun()
+                    if atualizado is None:
+                        st.info("Sem alterações para guardar.")
+                    else:
+                        invalidate_cache()
+                        st.success("Evento atualizado.")
+                        st.rerun()
                 if st.button("Definir como evento ativo", key=f"set_{evento['id']}"):
                     st.session_state["evento_ativo_id"] = evento["id"]
                     st.success("Evento selecionado na sessão atual.")
+                if not evento.get("Ativo"):
+                    rotulo = "Atualizar snapshot" if has_snapshot(evento["id"]) else "Criar snapshot"
+                    if st.button(rotulo, key=f"snapshot_{evento['id']}"):
+                        with st.spinner("A congelar os dados do evento..."):
+                            linhas = create_snapshot(evento["id"])
+                        st.success(
+                            "Snapshot criado: " + ", ".join(f"{t}: {n}" for t, n in linhas.items())
+                        )
+                    if st.button("Arquivar pedidos", key=f"arquivar_{evento['id']}"):
+                        if is_archived(evento["id"]):
+                            st.info("Este evento já está arquivado.")
+                        else:
+                            with st.spinner("A mover pedidos, recebimentos e sangrias para o arquivo..."):
+                                relatorio = archive_event(evento["id"])
+                            invalidate_cache()
+                            st.success(
+                                "Evento arquivado: "
+                                + ", ".join(f"{t}: {n}" for t, n in relatorio.movidos.items())
+                            )
     else:
         st.info("Sem eventos configurados.")
 
@@ -4,6 +4,7 @@ import streamlit as st
 
 from data.airtable_client import create_record, read_all, update_record
 from data.cache_utils import invalidate_cache
+from utils.bootstrap import start_background_services
 from utils.layout import render_footer, render_header
 
 
@@ -17,6 +18,7 @@ def _require_admin() -> None:
 
 
 def main() -> None:
+    start_background_services()
     _require_admin()
 
     render_header("👤 Utilizadores", "Gestão de acessos à aplicação")
@@ -62,10 +64,13 @@ def main() -> None:
                     }
                     if novo_password:
                         dados["Password"] = novo_password
-                    update_record("Utilizadores", utilizador["id"], dados)
-                    invalidate_cache()
-                    st.success("Utilizador atualizado.")
-                    st.rerun()
+                    atualizado = update_record("Utilizadores", utilizador["id"], dados, current=utilizador)
+                    if atualizado is None:
+                        st.info("Sem alterações para guardar.")
+                    else:
+                        invalidate_cache()
+                        st.success("Utilizador atualizado.")
+                        st.rerun()
     else:
         st.info("Sem utilizadores configurados.")
 
@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import plotly.express as px
+import streamlit as st
+
+from data.analytics import combine_aggregates, load_event_aggregates, season_of
+from data.cache_utils import get_cached_data
+from data.transformations import compare_events, compare_seasons, mix_by
+from utils.bootstrap import start_background_services
+from utils.layout import render_footer, render_header
+
+
+def _require_login() -> None:
+    if not st.session_state.get("autenticado"):
+        st.warning("É necessário iniciar sessão para aceder a esta página.")
+        st.stop()
+
+
+def main() -> None:
+    start_background_services()
+    _require_login()
+
+    render_header("📈 Análise", "Comparação entre eventos e épocas")
+
+    eventos = [evento for evento in get_cached_data("Eventos") if evento.id]
+    if not eventos:
+        st.info("Sem eventos configurados.")
+        render_footer()
+        return
+
+    epocas = sorted({season_of(evento.data) for evento in eventos})
+    escolhidas = st.multiselect("Épocas", epocas, default=epocas)
+    candidatos = [evento for evento in eventos if season_of(evento.data) in escolhidas]
+    nomes = {evento.id: evento.nome or evento.id for evento in candidatos}
+    selecionados = st.multiselect(
+        "Eventos", list(nomes.keys()), default=list(nomes.keys()), format_func=lambda eid: nomes[eid]
+    )
+    eventos_sel = [evento for evento in candidatos if evento.id in selecionados]
+    if not eventos_sel:
+        st.info("Selecione pelo menos um evento.")
+        render_footer()
+        return
+
+    with st.spinner("A carregar agregados dos eventos..."):
+        agregados = load_event_aggregates(evento.id for evento in eventos_sel)
+    dados = combine_aggregates(eventos_sel, agregados)
+    if dados.empty:
+        st.info("Sem pedidos nos eventos selecionados.")
+        render_footer()
+        return
+
+    por_evento = compare_events(dados)
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Receita total", f"€ {por_evento['Valor'].sum():,.2f}")
+    with col2:
+        st.metric("Pedidos", int(por_evento["Pedidos"].sum()))
+    with col3:
+        pedidos = por_evento["Pedidos"].sum()
+        st.metric("Ticket médio", f"€ {por_evento['Valor'].sum() / pedidos:,.2f}" if pedidos else "—")
+
+    st.subheader("Por evento")
+    st.dataframe(
+        por_evento.drop(columns=["Evento ID"]).style.format(
+            {"Valor": "€ {:,.2f}", "Ticket médio": "€ {:,.2f}"}, na_rep="—"
+        ),
+        use_container_width=True,
+    )
+    st.plotly_chart(
+        px.bar(por_evento, x="Evento", y="Valor", color="Época", title="Receita por evento"),
+        use_container_width=True,
+    )
+    st.plotly_chart(
+        px.line(por_evento, x="Evento", y="Ticket médio", markers=True, title="Ticket médio por evento"),
+        use_container_width=True,
+    )
+
+    st.subheader("Por época")
+    st.dataframe(compare_seasons(dados), use_container_width=True)
+
+    st.subheader("Mix de ementas")
+    st.plotly_chart(
+        px.bar(mix_by(dados, "Ementa"), x="Evento", y="Percentagem", color="Ementa", title="Peso de cada ementa (%)"),
+        use_container_width=True,
+    )
+
+    st.subheader("Mix de tipos de cliente")
+    st.plotly_chart(
+        px.bar(mix_by(dados, "Tipo"), x="Evento", y="Percentagem", color="Tipo", title="Peso de cada tipo de cliente (%)"),
+        use_container_width=True,
+    )
+
+    render_footer()
+
+
+if __name__ == "__main__":
+    main()
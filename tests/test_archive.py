@@ -0,0 +1,97 @@
+from itertools import count
+
+import pytest
+
+from data import archive
+from data.event_summary import EventSummary
+from data.models import Evento
+from data.schema import SchemaRegistry
+
+
+class FakeBase:
+    """In-memory tables that, like Airtable, empty links to deleted records."""
+
+    def __init__(self, tables):
+        self.tables = {name: dict(rows) for name, rows in tables.items()}
+        self._ids = count(1)
+
+    def iter_records(self, table, fields=None, where=None, model=None, **kwargs):
+        for record_id, cells in list(self.tables.setdefault(table, {}).items()):
+            record = model.from_fields(dict(cells), record_id) if model else {**cells, "id": record_id}
+            if where is None or where(record):
+                yield record
+
+    def batch_create(self, table, records):
+        created = []
+        for cells in records:
+            record_id = f"rec{next(self._ids):05d}"
+            self.tables.setdefault(table, {})[record_id] = dict(cells)
+            created.append({"id": record_id, "fields": dict(cells)})
+        return created
+
+    def batch_delete(self, table, record_ids):
+        for record_id in record_ids:
+            del self.tables[table][record_id]
+            for rows in self.tables.values():
+                for cells in rows.values():
+                    for name, value in cells.items():
+                        if isinstance(value, list) and record_id in value:
+                            cells[name] = [linked for linked in value if linked != record_id]
+        return [{"id": record_id, "deleted": True} for record_id in record_ids]
+
+
+@pytest.fixture
+def base(monkeypatch):
+    base = FakeBase(
+        {
+            "Pedidos": {
+                "recPed1": {"Evento": ["recEvt"], "Valor": 10.0, "Chave Idempotência": "k1", "Total": 10},
+                "recPed2": {"Evento": ["recEvt"], "Valor": 5.0},
+            },
+            "Recebimentos": {"recRec1": {"Evento": ["recEvt"], "Pedido": ["recPed1"], "Valor": 10.0}},
+            "Sangria de Caixa": {"recSan1": {"Evento": ["recEvt"], "Valor": 2.0}},
+        }
+    )
+    registry = SchemaRegistry([{"name": "Pedidos Arquivo", "fields": [{"name": "Total", "type": "formula"}]}], "test")
+    monkeypatch.setattr(archive, "iter_records", base.iter_records)
+    monkeypatch.setattr(archive, "batch_create", base.batch_create)
+    monkeypatch.setattr(archive, "batch_delete", base.batch_delete)
+    monkeypatch.setattr(archive, "get_schema_registry", lambda: registry)
+    monkeypatch.setattr(archive, "read_all", lambda table: [Evento("recEvt", nome="Acampamento", ativo=False)])
+    monkeypatch.setattr(archive, "reconcile", lambda event_id: EventSummary(event_id))
+    monkeypatch.setattr(archive, "update_record", lambda *args, **kwargs: None)
+    monkeypatch.setattr(archive, "invalidate_cache", lambda: None)
+    return base
+
+
+def _by_origin(base, table):
+    return {cells[archive._ORIGIN_FIELD]: (record_id, cells) for record_id, cells in base.tables[table].items()}
+
+
+def test_archived_receipts_point_at_archived_orders(base):
+    report = archive.archive_event("recEvt")
+
+    pedidos = _by_origin(base, "Pedidos Arquivo")
+    recebimentos = _by_origin(base, "Recebimentos Arquivo")
+    assert recebimentos["recRec1"][1]["Pedido"] == [pedidos["recPed1"][0]]
+    assert report.movidos == {"Pedidos": 2, "Recebimentos": 1, "Sangria de Caixa": 1}
+    assert not any(base.tables[table] for table in archive.ARCHIVE_TABLES)
+
+
+def test_unmodelled_fields_are_copied_and_computed_ones_skipped(base):
+    archive.archive_event("recEvt")
+
+    copia = _by_origin(base, "Pedidos Arquivo")["recPed1"][1]
+    assert copia["Chave Idempotência"] == "k1"
+    assert "Total" not in copia
+
+
+def test_interrupted_run_resumes_without_duplicates(base):
+    archive._copy_table("Pedidos", "recEvt", {}, archive.ArchiveReport("recEvt"))
+
+    report = archive.archive_event("recEvt")
+
+    assert report.retomados["Pedidos"] == 2
+    assert len(base.tables["Pedidos Arquivo"]) == 2
+    recebimento = next(iter(base.tables["Recebimentos Arquivo"].values()))
+    assert recebimento["Pedido"] == [_by_origin(base, "Pedidos Arquivo")["recPed1"][0]]
@@ -0,0 +1,56 @@
+import pytest
+
+from data import airtable_client
+from data.airtable_client import _same_value, diff_fields, update_record
+
+
+@pytest.mark.parametrize(
+    "old, new",
+    [
+        (None, ""),
+        (None, False),
+        ((), []),
+        (("recA", "recB"), ["recB", "recA"]),
+        ("recA", ["recA"]),
+        (3, 3),
+    ],
+)
+def test_equivalent_values(old, new):
+    assert _same_value(old, new)
+
+
+@pytest.mark.parametrize(
+    "old, new",
+    [
+        (("recA",), ["recA", "recB"]),
+        ("x", None),
+        (True, False),
+        (2, 3),
+    ],
+)
+def test_different_values(old, new):
+    assert not _same_value(old, new)
+
+
+def test_unhashable_items_compare_in_order():
+    anexos = [{"url": "a"}, {"url": "b"}]
+
+    assert _same_value(anexos, list(anexos))
+    assert not _same_value(anexos, anexos[::-1])
+
+
+def test_diff_keeps_only_changed_fields():
+    current = {"Nome": "Ana", "Eventos": ("rec1", "rec2"), "Ativo": True}
+    data = {"Nome": "Ana", "Eventos": ["rec2", "rec1"], "Ativo": False}
+
+    assert diff_fields(current, data) == {"Ativo": False}
+
+
+def test_unchanged_update_sends_nothing(monkeypatch):
+    class Backend:
+        def update(self, *args):
+            raise AssertionError("no write expected")
+
+    monkeypatch.setattr(airtable_client, "get_backend", Backend)
+
+    assert update_record("Utilizadores", "rec1", {"Eventos": ["b", "a"]}, current={"Eventos": ("a", "b")}) is None
@@ -0,0 +1,127 @@
+from itertools import count
+
+import pytest
+import requests
+
+from data import airtable_client
+from data.airtable_client import IDEMPOTENCY_FIELD, batch_create_idempotent, create_idempotent, line_keys
+from data.schema import SchemaRegistry
+
+
+def _http_error(status):
+    response = requests.Response()
+    response.status_code = status
+    return requests.HTTPError(f"{status}", response=response)
+
+
+class FlakyBackend:
+    """Stores records in memory; ``failures`` are raised by the next creates, after writing if ``written``."""
+
+    def __init__(self, failures=(), written=False):
+        self.records = []
+        self.failures = list(failures)
+        self.written = written
+        self.creates = 0
+        self._ids = count(1)
+
+    def _store(self, fields):
+        record = {"id": f"rec{next(self._ids):05d}", "createdTime": f"{len(self.records):05d}", "fields": dict(fields)}
+        self.records.append(record)
+        return record
+
+    def _send(self, records):
+        self.creates += 1
+        if self.failures:
+            error = self.failures.pop(0)
+            if self.written:
+                for fields in records:
+                    self._store(fields)
+            raise error
+        return [self._store(fields) for fields in records]
+
+    def create(self, table, fields):
+        return self._send([fields])[0]
+
+    def batch_create(self, table, records):
+        return self._send(records)
+
+    def all(self, table, formula=None):
+        return [record for record in self.records if f"'{record['fields'][IDEMPOTENCY_FIELD]}'" in formula]
+
+
+@pytest.fixture
+def backend(monkeypatch):
+    def install(**kwargs):
+        backend = FlakyBackend(**kwargs)
+        monkeypatch.setattr(airtable_client, "get_backend", lambda: backend)
+        return backend
+
+    registry = SchemaRegistry([{"name": "Pedidos", "fields": [{"name": IDEMPOTENCY_FIELD, "type": "singleLineText"}]}], "test")
+    monkeypatch.setattr(airtable_client, "get_schema_registry", lambda: registry)
+    monkeypatch.setattr(airtable_client.time, "sleep", lambda seconds: None)
+    airtable_client._recent_writes.clear()
+    return install
+
+
+def test_timeout_after_write_returns_the_stored_record(backend):
+    fake = backend(failures=[requests.Timeout()], written=True)
+
+    record, created = create_idempotent("Pedidos", {"Valor": 5}, "pedido:1")
+
+    assert not created
+    assert len(fake.records) == 1 and record["id"] == fake.records[0]["id"]
+
+
+def test_server_errors_and_throttling_are_retried(backend):
+    fake = backend(failures=[_http_error(503), _http_error(429)])
+
+    record, created = create_idempotent("Pedidos", {"Valor": 5}, "pedido:2")
+
+    assert created and fake.creates == 3
+
+
+@pytest.mark.parametrize("status", [403, 422])
+def test_client_errors_are_not_retried(backend, status):
+    fake = backend(failures=[_http_error(status), _http_error(status)])
+
+    with pytest.raises(requests.HTTPError):
+        create_idempotent("Pedidos", {"Valor": 5}, f"pedido:{status}")
+    with pytest.raises(requests.HTTPError):
+        batch_create_idempotent("Pedidos", [{"Valor": 5}], f"carrinho:{status}")
+
+    assert fake.creates == 2 and fake.records == []
+
+
+def test_repeated_call_is_served_from_recent_writes(backend):
+    fake = backend()
+
+    first, _ = create_idempotent("Pedidos", {"Valor": 5}, "pedido:3")
+    again, created = create_idempotent("Pedidos", {"Valor": 5}, "pedido:3")
+
+    assert not created and again is first and fake.creates == 1
+
+
+def test_missing_key_column_is_reported(backend, monkeypatch):
+    backend()
+    monkeypatch.setattr(airtable_client, "get_schema_registry", lambda: SchemaRegistry([{"name": "Pedidos", "fields": []}], "test"))
+
+    with pytest.raises(RuntimeError, match=IDEMPOTENCY_FIELD):
+        create_idempotent("Pedidos", {"Valor": 5}, "pedido:4")
+
+
+def test_batch_retry_only_creates_missing_lines(backend):
+    fake = backend(failures=[requests.ConnectionError()], written=True)
+    lines = [{"Valor": 1}, {"Valor": 2}]
+
+    stored, created = batch_create_idempotent("Pedidos", lines, "carrinho:1")
+
+    assert created == [] and len(fake.records) == 2
+    assert [record["fields"]["Valor"] for record in stored] == [1, 2]
+
+
+def test_line_keys_follow_content_not_position():
+    a, b = {"Valor": 1}, {"Valor": 2}
+
+    assert line_keys("k", [a, b])[1] == line_keys("k", [b])[0]
+    first, second = line_keys("k", [a, a])
+    assert first != second
@@ -0,0 +1,57 @@
+from datetime import datetime, timezone
+
+from data import kitchen
+from data.models import Pedido
+
+
+def _pedido(record_id, created_time):
+    return Pedido.from_fields({"Evento": ["recEvt"], "Quantidade": 1}, record_id, created_time)
+
+
+def _serve(monkeypatch, pedidos):
+    calls = []
+
+    def fake_iter_records(table, **kwargs):
+        calls.append((table, kwargs))
+        return iter(pedidos)
+
+    monkeypatch.setattr(kitchen, "iter_records", fake_iter_records)
+    return calls
+
+
+def test_new_orders_come_oldest_first_and_advance_the_cursor(monkeypatch):
+    calls = _serve(monkeypatch, [
+        _pedido("recB", "2026-05-01T12:00:05.000Z"),
+        _pedido("recA", "2026-05-01T12:00:01.000Z"),
+    ])
+
+    novos, cursor = kitchen.fetch_new_orders("recEvt", "2026-05-01T12:00:00.000Z")
+
+    assert [pedido.id for pedido in novos] == ["recA", "recB"]
+    assert cursor == "2026-05-01T12:00:05.000Z"
+    table, kwargs = calls[0]
+    assert table == "Pedidos" and kwargs["include_created_time"]
+    assert "2026-05-01T12:00:00.000Z" in kwargs["formula"]
+
+
+def test_seen_orders_are_skipped_and_an_empty_poll_keeps_the_cursor(monkeypatch):
+    since = "2026-05-01T12:00:05.000Z"
+    _serve(monkeypatch, [_pedido("recB", since)])
+
+    novos, cursor = kitchen.fetch_new_orders("recEvt", since, seen={"recB"})
+
+    assert novos == [] and cursor == since
+
+
+def test_fields_are_passed_through(monkeypatch):
+    calls = _serve(monkeypatch, [])
+
+    kitchen.fetch_new_orders("recEvt", "2026-05-01T12:00:00.000Z", fields=("Evento", "Valor"))
+
+    assert calls[0][1]["fields"] == ("Evento", "Valor")
+
+
+def test_initial_cursor_looks_back_one_window():
+    now = datetime(2026, 5, 1, 12, 0, tzinfo=timezone.utc)
+
+    assert kitchen.initial_cursor(now) == "2026-05-01T11:30:00.000Z"
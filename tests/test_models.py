@@ -0,0 +1,68 @@
+import pytest
+
+from data.models import Pedido, Preco, as_link_list
+from data.schema import SchemaRegistry
+
+
+@pytest.fixture
+def restore_preco():
+    yield
+    Preco.compile({})
+
+
+def test_fields_are_converted_once():
+    pedido = Pedido.from_fields({"Evento": "recEvt", "Quantidade": "2", "Valor": None, "Pago": 1}, "recPed")
+
+    assert pedido.eventos == ("recEvt",)
+    assert pedido.quantidade == 2 and pedido.valor == 0.0 and pedido.pago is True
+    assert pedido.evento_id == "recEvt" and pedido.in_event("recEvt")
+
+
+def test_mapping_interface_uses_airtable_names():
+    pedido = Pedido.from_fields({"Quantidade": 1, "Valor": 3.5, "Notas": "sem sal"}, "recPed")
+
+    assert pedido["id"] == "recPed"
+    assert pedido.get("Valor") == 3.5 and pedido.get("Notas") == "sem sal"
+    assert "Pago" not in pedido and pedido.get("Pago", "não") == "não"
+    with pytest.raises(KeyError):
+        pedido["Pago"]
+    assert dict(pedido) == {"id": "recPed", "Quantidade": 1, "Valor": 3.5, "Notas": "sem sal"}
+
+
+def test_earlier_alias_wins_whatever_the_cell_order():
+    preco = Preco.from_fields({"Preco": 1.0, "Preço (€)": 2.0})
+
+    assert preco.valor == 2.0
+
+
+def test_to_fields_writes_links_as_lists_and_extra_on_request():
+    pedido = Pedido.from_fields({"Evento": ["recEvt"], "Quantidade": 1, "Valor": 3, "Chave Idempotência": "k"})
+
+    assert pedido.to_fields() == {"Evento": ["recEvt"], "Quantidade": 1, "Valor": 3.0}
+    assert pedido.to_fields(extra=True)["Chave Idempotência"] == "k"
+
+
+def test_schema_compiles_to_the_base_spelling(restore_preco):
+    registry = SchemaRegistry(
+        [{"name": "Preços", "fields": [{"name": "Preco", "type": "currency"}, {"name": "Ementa", "type": "multipleRecordLinks"}]}],
+        "test",
+    )
+    registry.compile([Preco])
+
+    preco = Preco.from_fields({"Preço (€)": 9.0, "Preco": 4, "Ementa": ["recEme"]})
+
+    assert preco.valor == 4.0 and preco.ementas == ("recEme",)
+    assert Preco.field_name("valor") == "Preco"
+    assert preco.to_fields(extra=True)["Preço (€)"] == 9.0  # no longer modelled, kept as an extra cell
+    assert registry.missing(Preco) == ["tipos", "eventos"]
+    assert Preco._COMPILED[0]["Ementa"][1] is as_link_list
+
+
+def test_writable_drops_computed_fields():
+    registry = SchemaRegistry([{"name": "Pedidos", "fields": [{"name": "Total", "type": "formula"}]}], "test")
+
+    assert registry.writable("Pedidos", {"Total": 3, "Valor": 3}) == {"Valor": 3}
+
+
+def test_record_without_id_has_a_repr():
+    assert repr(Pedido(valor=2.0)).startswith("Pedido(")
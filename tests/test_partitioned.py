@@ -0,0 +1,88 @@
+import random
+import re
+import string
+
+import pytest
+
+from data import partitioned
+from data.partitioned import IncompleteReadError, fetch_partitioned, id_partitions
+
+
+def _record_id(rng):
+    return "rec" + "".join(rng.choice(partitioned.ID_ALPHABET) for _ in range(14))
+
+
+class PartitionedBackend:
+    """Answers REGEX_MATCH(RECORD_ID(), '^rec[...]') partitions from a list of records."""
+
+    def __init__(self, records, leak=None):
+        self.records = records
+        self.leak = leak
+
+    def iterate(self, table, formula=None, sort=None, page_size=3, **kwargs):
+        chars = re.search(r"\^rec\[(\w+)\]", formula).group(1)
+        rows = [record for record in self.records if record["id"][3] in chars]
+        if self.leak and self.leak["id"][3] not in chars:
+            rows.append(self.leak)
+        for key in reversed(sort or []):
+            rows.sort(key=lambda record: record["fields"][key.lstrip("-")], reverse=key.startswith("-"))
+        for start in range(0, len(rows), page_size):
+            yield rows[start : start + page_size]
+
+
+@pytest.fixture(autouse=True)
+def no_throttle(monkeypatch):
+    monkeypatch.setattr(partitioned, "REQUESTS_PER_SECOND", 10_000)
+
+
+@pytest.fixture
+def records():
+    rng = random.Random(7)
+    return [{"id": _record_id(rng), "fields": {"Valor": rng.randint(0, 20)}} for _ in range(200)]
+
+
+def test_id_groups_cover_the_alphabet_once():
+    for count in (1, 3, 8, 62):
+        partitions = id_partitions(count)
+        classes = "".join(re.search(r"\[(\w+)\]", formula).group(1) for formula, _ in partitions)
+        assert sorted(classes) == sorted(string.digits + string.ascii_letters)
+
+
+def test_bad_id_groups_are_rejected():
+    with pytest.raises(ValueError):
+        partitioned._check_id_groups(["0123456789", string.ascii_uppercase])
+    with pytest.raises(ValueError):
+        partitioned._check_id_groups([partitioned.ID_ALPHABET, "a"])
+
+
+def test_unsorted_read_returns_every_record_once(records):
+    result = list(fetch_partitioned(PartitionedBackend(records), "Pedidos", id_partitions()))
+
+    assert sorted(record["id"] for record in result) == sorted(record["id"] for record in records)
+
+
+@pytest.mark.parametrize("sort", [["Valor"], ["-Valor"]])
+def test_sorted_partitions_are_merge_sorted(records, sort):
+    result = list(fetch_partitioned(PartitionedBackend(records), "Pedidos", id_partitions(), sort=sort))
+
+    valores = [record["fields"]["Valor"] for record in result]
+    assert valores == sorted(valores, reverse=sort[0].startswith("-"))
+    assert len(result) == len(records)
+
+
+def test_record_outside_its_partition_fails(records):
+    backend = PartitionedBackend(records, leak=records[0])
+
+    with pytest.raises(IncompleteReadError):
+        list(fetch_partitioned(backend, "Pedidos", id_partitions()))
+
+
+def test_partition_errors_reach_the_reader(records):
+    class Failing(PartitionedBackend):
+        def iterate(self, table, formula=None, **kwargs):
+            if "0" in formula:
+                raise ConnectionError("sem rede")
+            yield from super().iterate(table, formula=formula, **kwargs)
+
+    with pytest.raises(ConnectionError):
+        list(fetch_partitioned(Failing(records), "Pedidos", id_partitions()))
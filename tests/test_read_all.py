@@ -0,0 +1,45 @@
+import threading
+
+from data import airtable_client
+from data.airtable_client import _freeze, links_to, read_all
+
+
+class SlowBackend:
+    name = "sqlite"
+
+    def __init__(self):
+        self.calls = 0
+        self.release = threading.Event()
+
+    def iterate(self, table, page_size=100, fields=None, links=None, **kwargs):
+        self.calls += 1
+        self.release.wait(5)
+        yield [{"id": "rec1", "fields": {"Evento": ["recEvt"]}}, {"id": "rec2", "fields": {"Evento": ["recOutro"]}}]
+
+
+def test_equal_link_filters_share_a_key():
+    assert _freeze({"where": links_to("Evento", "rec1")}) == _freeze({"where": links_to("Evento", "rec1")})
+    assert _freeze({"where": links_to("Evento", "rec1")}) != _freeze({"where": links_to("Evento", "rec2")})
+
+
+def test_concurrent_filtered_reads_coalesce(monkeypatch):
+    backend = SlowBackend()
+    monkeypatch.setattr(airtable_client, "get_backend", lambda: backend)
+    monkeypatch.setattr(airtable_client, "_model_for", lambda name: None)
+    coalesced = airtable_client.get_read_stats()["reads_coalesced"]
+    results = []
+
+    def reader():
+        results.append(read_all("Tabela", where=links_to("Evento", "recEvt")))
+
+    threads = [threading.Thread(target=reader) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    while airtable_client.get_read_stats()["reads_coalesced"] < coalesced + 3 and backend.calls < 4:
+        threading.Event().wait(0.01)
+    backend.release.set()
+    for thread in threads:
+        thread.join()
+
+    assert backend.calls == 1
+    assert [[record["id"] for record in result] for result in results] == [["rec1"]] * 4
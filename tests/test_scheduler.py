@@ -0,0 +1,91 @@
+import threading
+import time
+
+import pytest
+
+from data import scheduler as scheduler_module
+from data.scheduler import Job, Scheduler
+
+
+def _wait_for(condition, timeout=5.0):
+    limit = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > limit:
+            raise AssertionError("condition not met in time")
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def fast_ticks(monkeypatch):
+    monkeypatch.setattr(scheduler_module, "TICK_SECONDS", 0.01)
+
+
+def test_jobs_run_and_record_results(fast_ticks):
+    scheduler = Scheduler([Job("eco", lambda: "ok", interval=0.05, timeout=1)], jitter=0)
+    scheduler.start()
+    try:
+        _wait_for(lambda: scheduler.statuses()["eco"].runs >= 2)
+    finally:
+        scheduler.stop()
+
+    status = scheduler.statuses()["eco"]
+    assert status.last_result == "ok" and status.failures == 0 and not status.running
+
+
+def test_failures_are_recorded_and_the_scheduler_keeps_going(fast_ticks):
+    def falha():
+        raise RuntimeError("sem rede")
+
+    scheduler = Scheduler([Job("falha", falha, interval=0.02, timeout=1)], jitter=0)
+    scheduler.start()
+    try:
+        _wait_for(lambda: scheduler.statuses()["falha"].failures >= 2)
+    finally:
+        scheduler.stop()
+
+    assert scheduler.statuses()["falha"].last_error == "RuntimeError: sem rede"
+
+
+def test_slow_job_never_overlaps_and_is_flagged(fast_ticks):
+    release = threading.Event()
+    running = []
+
+    def lenta():
+        running.append(1)
+        release.wait(5)
+        return "feito"
+
+    scheduler = Scheduler([Job("lenta", lenta, interval=0.01, timeout=0.05)], jitter=0)
+    scheduler.start()
+    try:
+        _wait_for(lambda: scheduler.statuses()["lenta"].timeouts == 1 and scheduler.statuses()["lenta"].skipped >= 3)
+        assert len(running) == 1
+    finally:
+        release.set()
+        scheduler.stop()
+
+
+def test_run_now_moves_the_job_forward(fast_ticks):
+    scheduler = Scheduler([Job("diaria", lambda: "ok", interval=3600, timeout=1)], jitter=0)
+    scheduler.start()
+    try:
+        scheduler.run_now("diaria")
+        _wait_for(lambda: scheduler.statuses()["diaria"].runs == 1)
+    finally:
+        scheduler.stop()
+
+
+def test_start_scheduler_creates_one_scheduler_per_process(monkeypatch):
+    created = []
+    monkeypatch.setattr(scheduler_module, "_scheduler_started", False)
+    monkeypatch.setattr(scheduler_module, "_scheduler", None)
+    monkeypatch.setattr(scheduler_module, "_create_scheduler", lambda: created.append(object()) or created[-1])
+
+    threads = [threading.Thread(target=scheduler_module.start_scheduler) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(created) == 1
+    assert scheduler_module.start_scheduler() is created[0]
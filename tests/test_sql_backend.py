@@ -0,0 +1,76 @@
+import pytest
+import requests
+
+from data.sql_backend import FormulaError, SQLiteBackend, compile_formula
+
+
+@pytest.fixture
+def backend(tmp_path):
+    backend = SQLiteBackend(str(tmp_path / "dados.db"))
+    backend.import_records(
+        "Pedidos",
+        [
+            {"id": "recA", "createdTime": "2024-05-01T10:00:00.000Z", "fields": {"Evento": ["recEvt"], "Valor": 4, "Pago": True}},
+            {"id": "recB", "createdTime": "2024-05-01T11:00:00.000Z", "fields": {"Evento": ["recEvt"], "Valor": 9}},
+            {
+                "id": "recC",
+                "createdTime": "2024-05-01T12:00:00.000Z",
+                "fields": {"Evento": ["recOutro"], "Valor": 7, "Chave Idempotência": "pedido:it's"},
+            },
+        ],
+    )
+    return backend
+
+
+def _ids(backend, **kwargs):
+    return [record["id"] for page in backend.iterate("Pedidos", **kwargs) for record in page]
+
+
+@pytest.mark.parametrize(
+    "formula, expected",
+    [
+        ("{Pago}", ["recA"]),
+        ("{Pago}=TRUE()", ["recA"]),
+        ("{Pago}=FALSE()", ["recB", "recC"]),
+        ("NOT({Pago})", ["recB", "recC"]),
+        ("AND({Valor}>5, NOT({Pago}))", ["recB", "recC"]),
+        ("OR(RECORD_ID()='recA', RECORD_ID()='recC')", ["recA", "recC"]),
+        ("{Chave Idempotência}='pedido:it\\'s'", ["recC"]),
+        ("NOT(IS_BEFORE(CREATED_TIME(), DATETIME_PARSE('2024-05-01T11:00:00.000Z')))", ["recB", "recC"]),
+        ("{Valor}!=9", ["recA", "recC"]),
+    ],
+)
+def test_formulas_select_like_airtable(backend, formula, expected):
+    assert _ids(backend, formula=formula) == expected
+
+
+def test_numbers_and_strings_become_parameters():
+    sql, params = compile_formula("AND({Valor}>=2.5, {Nome}='x')")
+
+    assert params == [2.5, "x"]
+    assert "2.5" not in sql and "'x'" not in sql
+
+
+@pytest.mark.parametrize("formula", ["SEARCH('a', {Nome})", "{Valor} +", "AND(", "{Valor} = = 1"])
+def test_unsupported_formulas_raise(formula):
+    with pytest.raises(FormulaError):
+        compile_formula(formula)
+
+
+def test_link_filter_and_sort(backend):
+    assert _ids(backend, links=("Evento", "recEvt")) == ["recA", "recB"]
+    assert _ids(backend, sort=["-Valor"]) == ["recB", "recC", "recA"]
+
+
+def test_missing_record_raises_http_404(backend):
+    with pytest.raises(requests.HTTPError) as error:
+        backend.get("Pedidos", "recNada")
+
+    assert error.value.response.status_code == 404
+
+
+def test_blank_values_are_dropped_on_update(backend):
+    backend.update("Pedidos", "recA", {"Pago": False, "Valor": 5})
+
+    assert backend.get("Pedidos", "recA")["fields"] == {"Evento": ["recEvt"], "Valor": 5}
+    assert _ids(backend, formula="{Pago}=FALSE()") == ["recA", "recB", "recC"]
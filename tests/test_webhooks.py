@@ -0,0 +1,80 @@
+import base64
+import hashlib
+import hmac
+
+import pytest
+
+from data import airtable_client, cache_utils
+from data.webhooks import ReplayPayloadSource, collect_changes, make_handler, replay, verify_signature
+
+SECRET = base64.b64encode(b"segredo").decode()
+
+
+def _payload(table="tblPed", created=(), changed=(), destroyed=(), **extra):
+    return {
+        "changedTablesById": {
+            table: {
+                "createdRecordsById": {record_id: {} for record_id in created},
+                "changedRecordsById": {record_id: {} for record_id in changed},
+                "destroyedRecordIds": list(destroyed),
+                **extra,
+            }
+        }
+    }
+
+
+def test_created_then_destroyed_record_is_only_destroyed():
+    changes = collect_changes([_payload(created=["rec1", "rec2"]), _payload(destroyed=["rec1"])])
+
+    assert changes["tblPed"].upserted == {"rec2"}
+    assert changes["tblPed"].destroyed == {"rec1"}
+
+
+def test_destroyed_then_recreated_record_is_upserted():
+    changes = collect_changes([_payload(destroyed=["rec1"]), _payload(created=["rec1"])])
+
+    assert changes["tblPed"].upserted == {"rec1"}
+    assert changes["tblPed"].destroyed == set()
+
+
+def test_field_changes_flag_the_schema():
+    changes = collect_changes([_payload(changedFieldsById={"fld1": {}}), {"createdTablesById": {"tblNova": {}}}])
+
+    assert changes["tblPed"].schema_changed
+    assert changes["tblNova"].schema_changed
+
+
+def test_signature_must_match_body_and_secret():
+    body = b'{"base":{"id":"app1"}}'
+    header = "hmac-sha256=" + hmac.new(b"segredo", body, hashlib.sha256).hexdigest()
+
+    assert verify_signature(body, header, SECRET)
+    assert not verify_signature(body + b" ", header, SECRET)
+    assert not verify_signature(body, None, SECRET)
+    assert not verify_signature(body, header, "")
+
+
+def test_receiver_requires_a_mac_secret():
+    with pytest.raises(ValueError):
+        make_handler(sync=None, mac_secret="")
+
+
+def test_replay_patches_the_cache_and_reports_missing_records(monkeypatch):
+    monkeypatch.setattr(cache_utils, "_patches", {})
+    monkeypatch.setattr(airtable_client, "get_schema_registry", lambda: None)
+    recording = {
+        "tables": {"tblPed": "Pedidos"},
+        "startCursor": 5,
+        "pages": [
+            {"payloads": [_payload(created=["rec1", "rec2"])], "cursor": 6, "mightHaveMore": True},
+            {"payloads": [_payload(destroyed=["rec3"])], "cursor": 7, "mightHaveMore": False},
+        ],
+        "records": {"Pedidos": [{"id": "rec1", "fields": {"Valor": 3}}]},
+    }
+
+    erros = replay(ReplayPayloadSource(recording))
+
+    overlay = cache_utils.patch_overlay("Pedidos")
+    assert overlay["rec1"].valor == 3.0
+    assert overlay["rec3"] is None
+    assert erros == ["Pedidos: rec2 não atualizado"]
@@ -0,0 +1,16 @@
+"""Process-wide background services every page starts.
+
+Streamlit only runs the page a user opens, so app.py alone cannot start
+them: a page opened directly or reloaded would run without them. Every
+page calls :func:`start_background_services` first; each service guards
+against starting twice in the process.
+"""
+from __future__ import annotations
+
+from data.scheduler import start_scheduler
+from data.webhooks import start_webhook_listener
+
+
+def start_background_services() -> None:
+    start_webhook_listener()
+    start_scheduler()
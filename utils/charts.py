@@ -0,0 +1,59 @@
+"""Cached Plotly chart specs.
+
+Building a Plotly Express figure (grouping the frame, resolving colours and
+traces) is a visible part of a page rerun on low-powered tablets.
+:func:`chart_figure` keeps the built figure as an immutable JSON spec per
+event and data version in a bounded process-wide cache, and every call gets
+its own :class:`~plotly.graph_objects.Figure` rebuilt from that spec, so
+sessions never share a mutable figure. ``st.plotly_chart`` still serialises
+the figure it is given on each rerun; only the Plotly Express build is
+skipped. Builds are recorded in the fragment statistics table under
+``<name> (construção)``.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Tuple
+
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+import plotly.io as pio
+
+from .fragments import timed
+
+CHART_BUILDERS = {"bar": px.bar, "pie": px.pie, "line": px.line}
+MAX_SPECS = 64
+
+# Process-wide and separate from st.cache_data, which invalidate_cache() clears on every save.
+_specs: "OrderedDict[Tuple[str, ...], str]" = OrderedDict()
+_specs_lock = threading.Lock()
+
+
+def data_version(frame: pd.DataFrame) -> str:
+    """Content hash of ``frame`` (columns and values)."""
+
+    digest = hashlib.sha1("\x1f".join(map(str, frame.columns)).encode())
+    digest.update(pd.util.hash_pandas_object(frame, index=False).values.tobytes())
+    return digest.hexdigest()
+
+
+def chart_figure(name: str, kind: str, event_id: str, frame: pd.DataFrame, **options: Any) -> go.Figure:
+    """``px.<kind>(frame, **options)``, rebuilt from the cached spec while the data version is unchanged."""
+
+    key = (name, kind, event_id, data_version(frame), json.dumps(options, sort_keys=True, default=str))
+    with _specs_lock:
+        spec = _specs.get(key)
+        if spec is not None:
+            _specs.move_to_end(key)
+    if spec is None:
+        with timed(f"{name} (construção)"):
+            spec = CHART_BUILDERS[kind](frame, **options).to_json()
+        with _specs_lock:
+            _specs[key] = spec
+            while len(_specs) > MAX_SPECS:
+                _specs.popitem(last=False)
+    return pio.from_json(spec, skip_invalid=True)
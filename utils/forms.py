@@ -1,50 +1,76 @@
 """Reusable form helpers for Streamlit pages."""
 from __future__ import annotations
 
-from typing import Dict, Iterable, List, Optional
+import uuid
+from typing import Any, Dict, Iterable, List, Mapping, Optional
 
 import streamlit as st
 
+from data.airtable_client import content_digest
+from data.models import Ementa, Evento, Preco, TipoCliente
+
 
 def _option_label(record: Dict[str, any], default_field: str = "Nome") -> str:
     name = record.get(default_field) or record.get("Email") or record.get("id")
     return str(name)
 
 
-def select_event(events: Iterable[Dict[str, any]], event_id: Optional[str] = None) -> Optional[Dict[str, any]]:
-    events = [event for event in events if event.get("Ativo")]
+def submission_key(name: str, data: Optional[Mapping[str, Any]] = None) -> str:
+    """Idempotency key of the ``name`` submission in progress.
+
+    The key survives reruns, so resubmitting after a failed or timed-out write
+    reuses it; call :func:`clear_submission_key` once the write succeeded.
+    With ``data`` the key also covers the submitted fields, so a form edited
+    before resubmitting gets a new key instead of matching the earlier write.
+    """
+
+    state_key = f"chave_{name}"
+    if state_key not in st.session_state:
+        st.session_state[state_key] = f"{name}:{uuid.uuid4().hex}"
+    key = st.session_state[state_key]
+    return f"{key}:{content_digest(data)}" if data is not None else key
+
+
+def clear_submission_key(name: str) -> None:
+    st.session_state.pop(f"chave_{name}", None)
+
+
+def select_event(events: Iterable[Evento], event_id: Optional[str] = None) -> Optional[Evento]:
+    events = [event for event in events if event.ativo]
     if not events:
         st.warning("Não existem eventos ativos configurados.")
         return None
 
-    options = {event.get("id"): _option_label(event) for event in events}
+    options = {event.id: _option_label(event) for event in events}
     default_index = 0
     if event_id and event_id in options:
         default_index = list(options.keys()).index(event_id)
     selected_label = st.selectbox("Evento", list(options.values()), index=default_index, key="evento_select")
     selected_id = [key for key, value in options.items() if value == selected_label][0]
-    return next(event for event in events if event.get("id") == selected_id)
+    return next(event for event in events if event.id == selected_id)
+
+
+def _resolve_event(eventos: Iterable[Evento], default_event_id: Optional[str]) -> Optional[Evento]:
+    event = None
+    if default_event_id:
+        event = next((e for e in eventos if e.id == default_event_id), None)
+    return event or select_event(eventos, default_event_id)
 
 
 def pedido_form(
     *,
-    eventos: Iterable[Dict[str, any]],
-    tipos: Iterable[Dict[str, any]],
-    ementas: Iterable[Dict[str, any]],
-    precos: Iterable[Dict[str, any]],
+    eventos: Iterable[Evento],
+    tipos: Iterable[TipoCliente],
+    ementas: Iterable[Ementa],
+    precos: Iterable[Preco],
     default_event_id: Optional[str],
 ) -> Optional[Dict[str, any]]:
-    event = None
-    if default_event_id:
-        event = next((e for e in eventos if e.get("id") == default_event_id), None)
-
+    event = _resolve_event(eventos, default_event_id)
     if not event:
-        event = select_event(eventos, default_event_id)
-        if not event:
-            return None
+        return None
 
-    tipos_map = {tipo.get("id"): _option_label(tipo) for tipo in tipos}
-    ementas_map = {ementa.get("id"): _option_label(ementa) for ementa in ementas}
+    tipos_map = {tipo.id: _option_label(tipo) for tipo in tipos}
+    ementas_map = {ementa.id: _option_label(ementa) for ementa in ementas}
 
     if not tipos_map or not ementas_map:
         st.info("Configure as ementas e tipos de cliente antes de criar pedidos.")
@@ -59,7 +85,7 @@ def pedido_form(
 
         quantidade = st.number_input("Quantidade", min_value=1, step=1, value=1)
 
-        preco = _resolver_preco(precos, ementa_id, tipo_id, event.get("id"))
+        preco = _resolver_preco(precos, ementa_id, tipo_id, event.id)
         st.metric("Preço Unitário", f"€ {preco:.2f}")
 
         submitted = st.form_submit_button("Registar Pedido")
@@ -68,7 +94,7 @@ def pedido_form(
                 st.error("Não existe preço configurado para a combinação selecionada.")
                 return None
             return {
-                "Evento": [event.get("id")],
+                "Evento": [event.id],
                 "TipoCliente": [tipo_id],
                 "Ementa": [ementa_id],
                 "Quantidade": quantidade,
@@ -78,28 +104,92 @@ def pedido_form(
     return None
 
 
-def _resolver_preco(precos: Iterable[Dict[str, any]], ementa_id: str, tipo_id: str, evento_id: Optional[str]) -> float:
-    for preco in precos:
-        if (
-            _match_link(preco.get("Ementa"), ementa_id)
-            and _match_link(preco.get("TipoCliente"), tipo_id)
-            and (not evento_id or _match_event(preco.get("Evento"), evento_id))
-        ):
-            valor = preco.get("Preço (€)") or preco.get("Preco") or preco.get("Preço")
-            try:
-                return float(valor)
-            except (TypeError, ValueError):
-                return 0.0
-    return 0.0
+CART_STATE = "carrinho"
+
+
+def _remove_cart_line(index: int) -> None:
+    linhas = st.session_state.get(CART_STATE, [])
+    if 0 <= index < len(linhas):
+        del linhas[index]
 
 
-def _match_event(event_field: any, event_id: str) -> bool:
-    if isinstance(event_field, list):
-        return event_id in event_field
-    return event_field == event_id
+def clear_cart() -> None:
+    st.session_state[CART_STATE] = []
 
 
-def _match_link(field_value: any, record_id: str) -> bool:
-    if isinstance(field_value, list):
-        return record_id in field_value
-    return field_value == record_id
+def carrinho_form(
+    *,
+    eventos: Iterable[Evento],
+    tipos: Iterable[TipoCliente],
+    ementas: Iterable[Ementa],
+    precos: Iterable[Preco],
+    default_event_id: Optional[str],
+) -> Optional[List[Dict[str, any]]]:
+    """Collect several order lines in session state; return them all when the cart is registered.
+
+    Lines are priced from ``precos`` when added, so building the cart costs
+    no requests. Call :func:`clear_cart` once the lines have been written.
+    """
+
+    event = _resolve_event(eventos, default_event_id)
+    if not event:
+        return None
+
+    tipos_map = {tipo.id: _option_label(tipo) for tipo in tipos}
+    ementas_map = {ementa.id: _option_label(ementa) for ementa in ementas}
+    if not tipos_map or not ementas_map:
+        st.info("Configure as ementas e tipos de cliente antes de criar pedidos.")
+        return None
+
+    linhas = st.session_state.setdefault(CART_STATE, [])
+    with st.form("form_carrinho"):
+        tipo_id = st.selectbox("Tipo de Cliente", list(tipos_map), format_func=tipos_map.get)
+        ementa_id = st.selectbox("Ementa", list(ementas_map), format_func=ementas_map.get)
+        quantidade = st.number_input("Quantidade", min_value=1, step=1, value=1)
+        if st.form_submit_button("Adicionar ao carrinho"):
+            preco = _resolver_preco(precos, ementa_id, tipo_id, event.id)
+            if preco <= 0:
+                st.error("Não existe preço configurado para a combinação selecionada.")
+            else:
+                linhas.append({"tipo_id": tipo_id, "ementa_id": ementa_id, "quantidade": quantidade, "preco": preco})
+
+    if not linhas:
+        st.caption("O carrinho está vazio.")
+        return None
+
+    for index, linha in enumerate(linhas):
+        col_linha, col_valor, col_remover = st.columns([6, 2, 1])
+        col_linha.write(
+            f"{linha['quantidade']} × {ementas_map.get(linha['ementa_id'], linha['ementa_id'])}"
+            f" ({tipos_map.get(linha['tipo_id'], linha['tipo_id'])})"
+        )
+        col_valor.write(f"€ {linha['quantidade'] * linha['preco']:.2f}")
+        col_remover.button("✕", key=f"carrinho_remover_{index}", on_click=_remove_cart_line, args=(index,))
+    st.metric("Total", f"€ {sum(linha['quantidade'] * linha['preco'] for linha in linhas):.2f}")
+
+    col_registar, col_limpar = st.columns(2)
+    col_limpar.button("Esvaziar carrinho", on_click=clear_cart)
+    if col_registar.button(f"Registar pedido ({len(linhas)} linhas)", type="primary"):
+        return [
+            {
+                "Evento": [event.id],
+                "TipoCliente": [linha["tipo_id"]],
+                "Ementa": [linha["ementa_id"]],
+                "Quantidade": linha["quantidade"],
+                "Valor": linha["quantidade"] * linha["preco"],
+                "Pago": False,
+            }
+            for linha in linhas
+        ]
+    return None
+
+
+def _resolver_preco(precos: Iterable[Preco], ementa_id: str, tipo_id: str, evento_id: Optional[str]) -> float:
+    for preco in precos:
+        if (
+            ementa_id in preco.ementas
+            and tipo_id in preco.tipos
+            and (not evento_id or evento_id in preco.eventos)
+        ):
+            return preco.valor
+    return 0.0
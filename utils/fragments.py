@@ -0,0 +1,97 @@
+"""Instrumented Streamlit fragments.
+
+Widgets inside a fragment only rerun that fragment, so interacting with a
+form or a single row no longer re-executes the page's table reads and
+DataFrame builds. :func:`timed_fragment` wraps ``st.fragment`` and counts how
+often and how long each fragment runs, per process; :func:`timed` records
+any other block (e.g. chart building) in the same table.
+"""
+from __future__ import annotations
+
+import functools
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Callable, ContextManager, Dict, Iterator, List, Optional
+
+import pandas as pd
+import streamlit as st
+
+
+@dataclass
+class FragmentStats:
+    runs: int = 0
+    total_ms: float = 0.0
+    last_ms: float = 0.0
+    max_ms: float = 0.0
+
+    @property
+    def mean_ms(self) -> float:
+        return self.total_ms / self.runs if self.runs else 0.0
+
+
+_stats: Dict[str, FragmentStats] = {}
+_stats_lock = threading.Lock()
+
+
+def _record(name: str, elapsed_ms: float) -> None:
+    with _stats_lock:
+        stats = _stats.setdefault(name, FragmentStats())
+        stats.runs += 1
+        stats.total_ms += elapsed_ms
+        stats.last_ms = elapsed_ms
+        stats.max_ms = max(stats.max_ms, elapsed_ms)
+
+
+def timed_fragment(name: str, run_every: Optional[float] = None) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """Decorate a function as a Streamlit fragment recorded under ``name``."""
+
+    def decorator(func: Callable[..., Any]) -> Callable[..., Any]:
+        @functools.wraps(func)
+        def run(*args: Any, **kwargs: Any) -> Any:
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                _record(name, (time.perf_counter() - start) * 1000)
+
+        return st.fragment(run, run_every=run_every)
+
+    return decorator
+
+
+@contextmanager
+def timed(name: str) -> Iterator[None]:
+    """Record the duration of the enclosed block under ``name``."""
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _record(name, (time.perf_counter() - start) * 1000)
+
+
+def timed_page(name: str) -> ContextManager[None]:
+    """Record a full script run of page ``name`` next to its fragments."""
+
+    return timed(f"{name} (página)")
+
+
+def get_fragment_stats() -> Dict[str, FragmentStats]:
+    with _stats_lock:
+        return {name: FragmentStats(**vars(stats)) for name, stats in _stats.items()}
+
+
+def fragment_stats_frame() -> pd.DataFrame:
+    linhas: List[Dict[str, Any]] = [
+        {
+            "Fragmento": name,
+            "Execuções": stats.runs,
+            "Média (ms)": round(stats.mean_ms, 1),
+            "Última (ms)": round(stats.last_ms, 1),
+            "Máximo (ms)": round(stats.max_ms, 1),
+        }
+        for name, stats in sorted(get_fragment_stats().items())
+    ]
+    return pd.DataFrame(linhas, columns=["Fragmento", "Execuções", "Média (ms)", "Última (ms)", "Máximo (ms)"])